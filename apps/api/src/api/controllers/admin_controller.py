@@ -1,9 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
 from services.system_auditlog_service import SystemAuditLogService
 from api.schemas.system_auditlog_schema import SystemAuditLogSchema
 from api.middleware import token_required, role_required
+from infrastructure.services import gemini_client
+from utils.profiler import profile_store
+from infrastructure.databases.slow_query_log import slow_query_log
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 schema = SystemAuditLogSchema()
@@ -70,3 +73,262 @@ def reindex_search(search_service = Provide[Container.search_service],
         count += 1
         
     return jsonify({'message': f'Search index recreated and {count} syllabuses indexed'}), 200
+
+@admin_bp.route('/ai/metrics', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def ai_metrics():
+    """AI client metrics for this worker process
+    ---
+    get:
+      summary: Queueing time vs model time, retries and rejections of Gemini calls (Admin only)
+      tags:
+        - Admin
+      responses:
+        200:
+          description: Per-client counters (calls, errors, retries, rejected, queue_ms_*, model_ms_*, in_flight)
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    return jsonify(gemini_client.all_stats()), 200
+
+@admin_bp.route('/kpis/reconcile', methods=['POST', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def reconcile_kpis(kpi_service=Provide[Container.kpi_service]):
+    """Rebuild the KPI rollup now
+    ---
+    post:
+      summary: Recompute status counters and review timings from syllabuses and workflow_logs (Admin only)
+      tags:
+        - Admin
+      responses:
+        200:
+          description: Reconciled counters
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    counters = kpi_service.reconcile()
+    return jsonify({'message': 'KPI rollup reconciled', 'counters': counters}), 200
+
+@admin_bp.route('/kpis/snapshots', methods=['POST', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def backfill_kpi_snapshots():
+    """Rebuild the daily KPI time series
+    ---
+    post:
+      summary: Queue recomputation of the last N days of KPI snapshots from workflow_logs (Admin only)
+      tags:
+        - Admin
+      parameters:
+        - name: days
+          in: query
+          schema: {type: integer, default: 30}
+      responses:
+        202:
+          description: One snapshot task queued per day
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    from datetime import date, timedelta
+    from tasks import snapshot_kpi_daily_task
+
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    today = date.today()
+    for offset in range(days, 0, -1):
+        snapshot_kpi_daily_task.delay((today - timedelta(days=offset)).isoformat())
+    return jsonify({'message': f'KPI snapshots queued for {days} days'}), 202
+
+@admin_bp.route('/workflow', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def get_workflow(workflow_engine=Provide[Container.workflow_engine]):
+    """Workflow graph used by this process
+    ---
+    get:
+      summary: States, transitions and allowed roles of the syllabus workflow (Admin only)
+      tags:
+        - Admin
+      responses:
+        200:
+          description: Graph with its version and source (database or default)
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    return jsonify(workflow_engine.get_graph().to_dict()), 200
+
+@admin_bp.route('/workflow/seed', methods=['POST', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def seed_workflow(workflow_engine=Provide[Container.workflow_engine]):
+    """Write the built-in workflow into workflow_states/workflow_transitions (missing rows only)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    created = workflow_engine.seed_defaults()
+    return jsonify({'message': f'{created} transitions created', 'graph': workflow_engine.get_graph().to_dict()}), 200
+
+@admin_bp.route('/workflow/reload', methods=['POST', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def reload_workflow(workflow_engine=Provide[Container.workflow_engine]):
+    """Reload the workflow graph in every process after editing the tables"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    workflow_engine.invalidate()
+    return jsonify(workflow_engine.get_graph().to_dict()), 200
+
+@admin_bp.route('/outbox', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def list_outbox(outbox_service=Provide[Container.outbox_service]):
+    """Outbox events (workflow side effects)
+    ---
+    get:
+      summary: Latest outbox events, optionally filtered by status (Admin only)
+      tags:
+        - Admin
+      parameters:
+        - in: query
+          name: status
+          schema:
+            type: string
+            enum: [PENDING, PROCESSING, DISPATCHED, FAILED]
+        - in: query
+          name: limit
+          schema:
+            type: integer
+      responses:
+        200:
+          description: Events with attempts, handled consumers and last error
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify(outbox_service.list_events(request.args.get('status'), limit)), 200
+
+@admin_bp.route('/outbox/<int:event_id>/retry', methods=['POST', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+@inject
+def retry_outbox_event(event_id, outbox_service=Provide[Container.outbox_service]):
+    """Requeue an outbox event; consumers that already succeeded are not run again"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    if not outbox_service.retry(event_id):
+        return jsonify({'message': 'Không tìm thấy event'}), 404
+    return jsonify({'message': 'Event đã được đưa lại vào hàng đợi'}), 202
+
+@admin_bp.route('/profiles', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def list_profiles():
+    """Request profiles recorded by this worker
+    ---
+    get:
+      summary: Profiles of Admin requests sent with the profiling header (X-Profile), newest first (Admin only)
+      tags:
+        - Admin
+      responses:
+        200:
+          description: id, method, path, status_code, duration_ms, engine (pyinstrument or cprofile), created_at
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    return jsonify(profile_store.list()), 200
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def get_profile(profile_id):
+    """Profile metadata with a text summary (hottest call paths)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    meta = profile_store.get(profile_id)
+    if not meta:
+        return jsonify({'message': 'Không tìm thấy profile'}), 404
+    return jsonify(meta), 200
+
+@admin_bp.route('/profiles/<profile_id>/download', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def download_profile(profile_id):
+    """Raw profile: speedscope JSON (speedscope.app) or pstats dump (snakeviz, flameprof)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    path = profile_store.data_path(profile_id)
+    if path is None:
+        return jsonify({'message': 'Không tìm thấy profile'}), 404
+    return send_file(str(path.resolve()), as_attachment=True, download_name=path.name)
+
+@admin_bp.route('/slow-queries', methods=['GET', 'DELETE', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def slow_queries():
+    """Slow queries recorded by this worker
+    ---
+    get:
+      summary: Statements above SLOW_QUERY_MS, newest first (Admin only)
+      tags:
+        - Admin
+      parameters:
+        - in: query
+          name: limit
+          schema:
+            type: integer
+        - in: query
+          name: plans
+          description: Include captured execution plans (large)
+          schema:
+            type: boolean
+      responses:
+        200:
+          description: statement, parameters, duration_ms, caller (repository/service method), request_id, plan
+    delete:
+      summary: Clear the buffer (Admin only)
+      tags:
+        - Admin
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+        return jsonify({'message': 'Đã xóa slow-query log'}), 200
+
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    include_plans = request.args.get('plans', 'false').lower() in ('true', '1')
+    return jsonify({
+        'threshold_ms': slow_query_log.threshold * 1000,
+        'capture_plans': slow_query_log.capture_plans,
+        'items': slow_query_log.entries(limit, include_plans)
+    }), 200
+
+@admin_bp.route('/slow-queries/<int:entry_id>', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@token_required
+@role_required(['Admin'])
+def get_slow_query(entry_id):
+    """One slow query with its execution plan (SHOWPLAN_XML / EXPLAIN JSON) when captured"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    entry = slow_query_log.get(entry_id)
+    if not entry:
+        return jsonify({'message': 'Không tìm thấy slow query'}), 404
+    return jsonify(entry), 200
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
 from services.ai_service import AiService
+from services.alignment_batch_service import AlignmentBatchService
+from api.middleware import token_required, role_required
+import json
 import logging
 import re
 from celery.result import AsyncResult
@@ -14,6 +17,10 @@ def to_camel_case(snake_str):
     components = snake_str.split('_')
     return components[0] + ''.join(x.title() for x in components[1:])
 
+def use_ai_cache(data):
+    """Requests can pass "refresh": true to bypass the AI result cache"""
+    return not bool((data or {}).get('refresh'))
+
 def convert_keys_to_camel(data):
     """Recursively convert all keys in dict/list from snake_case to camelCase"""
     if isinstance(data, dict):
@@ -40,6 +47,9 @@ def generate(ai_service: AiService = Provide[Container.ai_service]):
           properties:
             subject_name:
               type: string
+            refresh:
+              type: boolean
+              description: Bypass the AI result cache
     responses:
       200:
         description: Generated syllabus data
@@ -61,7 +71,7 @@ def generate(ai_service: AiService = Provide[Container.ai_service]):
         
         # Call service with error handling
         try:
-            res = ai_service.generate(subject_name)
+            res = ai_service.generate(subject_name, use_cache=use_ai_cache(data))
         except Exception as e:
             logger.error(f"AI service error: {e}", exc_info=True)
             return jsonify({'message': f'AI service error: {str(e)}'}), 500
@@ -90,6 +100,61 @@ def generate(ai_service: AiService = Provide[Container.ai_service]):
         logger.error(f"Unexpected error in /ai/generate: {e}", exc_info=True)
         return jsonify({'message': 'Unexpected error occurred'}), 500
 
+@ai_bp.route('/generate/stream', methods=['GET', 'POST'], strict_slashes=False)
+@inject
+def generate_stream(ai_service: AiService = Provide[Container.ai_service]):
+    """
+    Generate syllabus using AI, streamed as Server-Sent Events.
+    ---
+    tags:
+      - AI
+    description: >
+      Each top-level section of the syllabus is sent as a `section` event
+      ({"key": ..., "value": ...}) as soon as the model has finished it, followed by
+      a `done` event with the full syllabus or an `error` event. GET accepts
+      `subject_name` / `refresh` as query parameters for EventSource clients.
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            subject_name:
+              type: string
+            refresh:
+              type: boolean
+              description: Bypass the AI result cache
+    responses:
+      200:
+        description: text/event-stream of section, done and error events
+      400:
+        description: Invalid input
+    """
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    subject_name = (data.get('subject_name') or '').strip()
+    if not subject_name:
+        return jsonify({'message': 'subject_name is required and cannot be empty'}), 400
+
+    use_cache = str(data.get('refresh', '')).lower() not in ('1', 'true')
+    logger.info(f"AI streaming generation request for: {subject_name}")
+
+    def events():
+        for event, payload in ai_service.generate_stream(subject_name, use_cache=use_cache):
+            if event == 'section':
+                payload = {'key': to_camel_case(payload['key']), 'value': convert_keys_to_camel(payload['value'])}
+            elif event == 'done':
+                payload = convert_keys_to_camel(payload)
+            else:
+                payload = {'message': payload}
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering so sections reach the editor as they are produced
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @ai_bp.route('/summary/async', methods=['POST'], strict_slashes=False)
 @inject
 def summary_async(syllabus_service = Provide[Container.syllabus_service]):
@@ -201,12 +266,56 @@ def summary(ai_service: AiService = Provide[Container.ai_service],
     schema = SyllabusSchema()
     s_data = schema.dump(s)
     
-    res = ai_service.summarize_syllabus(s_data, sid)
+    res = ai_service.summarize_syllabus(s_data, sid, use_cache=use_ai_cache(data))
+    if 'precheck' in res:
+        return jsonify({'message': res['error'], 'precheck': res['precheck']}), 422
     if 'error' in res:
         return jsonify({'message': res['error']}), 500
         
     return jsonify(res), 200
 
+@ai_bp.route('/precheck', methods=['POST'], strict_slashes=False)
+@inject
+def precheck(ai_service: AiService = Provide[Container.ai_service],
+             syllabus_service = Provide[Container.syllabus_service]):
+    """
+    Rule-based syllabus pre-check (Bloom verbs, CLO/PLO coverage, weights) without calling AI.
+    ---
+    tags:
+      - AI
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            syllabus_id:
+              type: integer
+    responses:
+      200:
+        description: passed flag, findings (severity/code/message/target) and detected Bloom level per CLO
+      404:
+        description: Syllabus not found
+    """
+    data = request.get_json() or {}
+    sid = data.get('syllabus_id')
+    if not sid:
+        return jsonify({'message': 'syllabus_id is required'}), 400
+
+    s = syllabus_service.get_syllabus_details(sid)
+    if not s:
+        return jsonify({'message': 'Syllabus not found'}), 404
+
+    checker = ai_service.precheck_service
+    clos, plos, mappings = AlignmentBatchService.alignment_input(s)
+    schemes = [{
+        'name': scheme.name,
+        'components': [{'weight': c.weight} for c in (scheme.components or [])]
+    } for scheme in (s.assessment_schemes or [])]
+    findings = checker.check_alignment(clos, plos, mappings) + checker.check_weights(schemes)
+    return jsonify(checker.report(findings, clos)), 200
+
 @ai_bp.route('/analyze-alignment', methods=['POST'], strict_slashes=False)
 @inject
 def analyze_alignment(ai_service: AiService = Provide[Container.ai_service],
@@ -221,32 +330,131 @@ def analyze_alignment(ai_service: AiService = Provide[Container.ai_service],
     if not s:
         return jsonify({'message': 'Syllabus not found'}), 404
     
-    # Prepare data for AI
-    clos = [{'code': c.code, 'description': c.description} for c in (s.clos or [])]
-    
-    # Get PLOs from program
-    plos = []
-    program = s.program
-    if program and hasattr(program, 'outcomes'):
-        plos = [{'code': p.code, 'description': p.description} for p in (program.outcomes or [])]
-    
-    # Get current mappings
-    mappings = []
-    for c in (s.clos or []):
-        if hasattr(c, 'plo_mappings'):
-            for m in (c.plo_mappings or []):
-                mappings.append({
-                    'clo': c.code,
-                    'plo': m.program_plo.code if m.program_plo else 'N/A',
-                    'level': m.level
-                })
-            
-    res = ai_service.analyze_clo_plo_alignment(clos, plos, mappings)
+    clos, plos, mappings = AlignmentBatchService.alignment_input(s)
+    res = ai_service.analyze_clo_plo_alignment(clos, plos, mappings, use_cache=use_ai_cache(data))
     if 'error' in res:
         return jsonify({'message': res['error']}), 500
         
     return jsonify(res), 200
 
+def _batch_job_to_dict(job, include_report: bool = True):
+    data = {
+        'id': job.id,
+        'program_id': job.program_id,
+        'status': job.status,
+        'total': job.total,
+        'analyzed': job.analyzed,
+        'failed': job.failed,
+        'attempts': job.attempts,
+        'task_id': job.task_id,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+    if include_report:
+        data['report'] = json.loads(job.report) if job.report else None
+    return data
+
+@ai_bp.route('/analyze-alignment/program', methods=['POST'], strict_slashes=False)
+@token_required
+@role_required(['Admin', 'Head of Dept', 'Academic Affairs'])
+@inject
+def analyze_program_alignment(batch_service: AlignmentBatchService = Provide[Container.alignment_batch_service]):
+    """
+    Start a program-wide CLO-PLO alignment analysis in the background.
+    ---
+    tags:
+      - AI
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            program_id:
+              type: integer
+            statuses:
+              type: array
+              items:
+                type: string
+              description: Restrict to syllabuses in these statuses (default all, latest per subject)
+            refresh:
+              type: boolean
+              description: Bypass the AI result cache
+    responses:
+      202:
+        description: Batch job started (or the already running job of the program)
+      400:
+        description: Invalid input
+    """
+    from flask import g
+    data = request.get_json() or {}
+    program_id = data.get('program_id')
+    if not program_id:
+        return jsonify({'message': 'program_id is required'}), 400
+    try:
+        job = batch_service.start(program_id, user_id=getattr(g, 'user_id', None),
+                                  use_cache=use_ai_cache(data), statuses=data.get('statuses'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(_batch_job_to_dict(job, include_report=False)), 202
+
+@ai_bp.route('/analyze-alignment/jobs/<int:job_id>', methods=['GET'])
+@token_required
+@inject
+def get_alignment_job(job_id, batch_service: AlignmentBatchService = Provide[Container.alignment_batch_service]):
+    """
+    Progress and aggregated report of a program alignment job.
+    ---
+    tags:
+      - AI
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        type: integer
+    responses:
+      200:
+        description: Job status, counters and report when completed
+      404:
+        description: Job not found
+    """
+    job = batch_service.get_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(_batch_job_to_dict(job)), 200
+
+@ai_bp.route('/analyze-alignment/jobs/<int:job_id>/resume', methods=['POST'])
+@token_required
+@role_required(['Admin', 'Head of Dept', 'Academic Affairs'])
+@inject
+def resume_alignment_job(job_id, batch_service: AlignmentBatchService = Provide[Container.alignment_batch_service]):
+    """
+    Resume an interrupted program alignment job; completed analyses come from the AI cache.
+    ---
+    tags:
+      - AI
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        type: integer
+    responses:
+      202:
+        description: Job re-dispatched
+      400:
+        description: Job already completed
+      404:
+        description: Job not found
+    """
+    try:
+        job = batch_service.resume(job_id)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(_batch_job_to_dict(job, include_report=False)), 202
+
 @ai_bp.route('/compare', methods=['POST'], strict_slashes=False)
 @inject
 def compare(ai_service: AiService = Provide[Container.ai_service],
@@ -296,7 +504,8 @@ def compare(ai_service: AiService = Provide[Container.ai_service],
     base_data = schema.dump(base_s)
     target_data = schema.dump(target_s)
 
-    res = ai_service.compare_syllabuses(base_data, target_data)
+    res = ai_service.compare_syllabuses(base_data, target_data, syllabus_id=target_id,
+                                        use_cache=use_ai_cache(data))
     if 'error' in res:
         return jsonify({'message': res['error']}), 500
         
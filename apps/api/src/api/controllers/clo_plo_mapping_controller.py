@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
+from domain.constants import WorkflowStatus
 from services.clo_plo_mapping_service import CloPloMappingService
 from api.schemas.clo_plo_mapping_schema import CloPloMappingSchema
 
@@ -54,4 +55,126 @@ def delete_mapping(id: int, service: CloPloMappingService = Provide[Container.cl
     ok = service.delete_mapping(id)
     if not ok:
         return jsonify({'message': 'Mapping not found'}), 404
-    return '', 204
\ No newline at end of file
+    return '', 204
+
+@clo_plo_mapping_bp.route('/suggestions', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@inject
+def get_suggestions(service: CloPloMappingService = Provide[Container.clo_plo_mapping_service]):
+    """
+    Suggest PLOs for saved CLOs using local embeddings (no AI call)
+    ---
+    tags:
+      - Mappings (CLO-PLO)
+    parameters:
+      - name: clo_id
+        in: query
+        schema: {type: integer}
+      - name: syllabus_id
+        in: query
+        schema: {type: integer}
+        description: Suggestions for every CLO of the syllabus (used when clo_id is absent)
+      - name: top_k
+        in: query
+        schema: {type: integer, default: 3}
+    responses:
+      200: {description: Top-k PLOs with cosine scores}
+      400: {description: Missing parameters}
+      404: {description: CLO or syllabus not found}
+      503: {description: Embedding model unavailable}
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    clo_id = request.args.get('clo_id', type=int)
+    syllabus_id = request.args.get('syllabus_id', type=int)
+    top_k = request.args.get('top_k', type=int)
+    if not clo_id and not syllabus_id:
+        return jsonify({'error': 'clo_id or syllabus_id is required'}), 400
+    try:
+        if clo_id:
+            result = service.suggest_for_clo(clo_id, top_k)
+        else:
+            result = service.suggest_for_syllabus(syllabus_id, top_k)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    if result is None:
+        return jsonify({'message': 'Not found'}), 404
+    return jsonify(result), 200
+
+@clo_plo_mapping_bp.route('/suggestions', methods=['POST'], strict_slashes=False)
+@inject
+def suggest_for_drafts(service: CloPloMappingService = Provide[Container.clo_plo_mapping_service]):
+    """
+    Suggest PLOs for CLO drafts from the syllabus editor
+    ---
+    tags:
+      - Mappings (CLO-PLO)
+    requestBody:
+      required: true
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              program_id: {type: integer}
+              clos:
+                type: array
+                items: {type: string}
+              top_k: {type: integer, default: 3}
+    responses:
+      200: {description: One list of top-k PLOs per CLO text, in input order}
+      400: {description: Error}
+      503: {description: Embedding model unavailable}
+    """
+    data = request.get_json() or {}
+    texts = [t for t in (data.get('clos') or []) if isinstance(t, str)]
+    try:
+        result = service.suggest_for_texts(data.get('program_id'), texts, data.get('top_k'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(result), 200
+
+@clo_plo_mapping_bp.route('/coverage/program/<int:program_id>', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@inject
+def get_program_coverage(program_id: int, service: CloPloMappingService = Provide[Container.clo_plo_mapping_service]):
+    """
+    CLO x PLO coverage matrix of a program (latest approved/published syllabus of each subject)
+    ---
+    tags:
+      - Mappings (CLO-PLO)
+    parameters:
+      - name: program_id
+        in: path
+        required: true
+        schema: {type: integer}
+      - name: refresh
+        in: query
+        schema: {type: boolean, default: false}
+        description: Rebuild the matrix instead of serving the cached one
+      - name: statuses
+        in: query
+        schema: {type: string, example: 'APPROVED,PUBLISHED'}
+        description: Comma-separated syllabus statuses eligible as a subject's latest version (default APPROVED,PUBLISHED)
+      - name: include_drafts
+        in: query
+        schema: {type: boolean, default: false}
+        description: Use the latest syllabus of each subject whatever its status
+    responses:
+      200: {description: Dense I/R/M/A matrix per CLO and per subject with per-PLO coverage aggregates}
+      503: {description: numpy unavailable}
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    refresh = request.args.get('refresh', 'false').lower() in ('1', 'true', 'yes')
+    include_drafts = request.args.get('include_drafts', 'false').lower() in ('1', 'true', 'yes')
+    statuses = [s.strip().upper() for s in request.args.get('statuses', '').split(',') if s.strip()]
+    unknown = [s for s in statuses if s not in WorkflowStatus.ALL_STATES]
+    if unknown:
+        return jsonify({'error': f'Trạng thái không hợp lệ: {", ".join(unknown)}'}), 400
+    try:
+        result = service.get_program_coverage(program_id, use_cache=not refresh, statuses=statuses,
+                                              include_drafts=include_drafts)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(result), 200
@@ -1,9 +1,11 @@
-from flask import Blueprint, jsonify
+from datetime import date
+from flask import Blueprint, jsonify, request
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
 from services.syllabus_service import SyllabusService
 from services.user_service import UserService
 from services.analysis_service import AnalysisService
+from services.kpi_trend_service import KpiTrendService
 from domain.constants import WorkflowStatus
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/stats')
@@ -11,8 +13,10 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/stats')
 @dashboard_bp.route('/impact-analysis/<int:syllabus_id>', methods=['GET'])
 @inject
 def impact_analysis(syllabus_id: int, analysis_service: AnalysisService = Provide[Container.analysis_service]):
-    """Analyze impact of changing a syllabus"""
-    result = analysis_service.get_impact_analysis(syllabus_id)
+    """Analyze impact of changing a syllabus (transitive; ?max_depth=N&types=PREREQUISITE,COREQUISITE)"""
+    max_depth = request.args.get('max_depth', type=int)
+    types = {t.strip().upper() for t in request.args.get('types', '').split(',') if t.strip()} or None
+    result = analysis_service.get_impact_analysis(syllabus_id, max_depth=max_depth, types=types)
     if not result:
         return jsonify({"message": "Syllabus not found"}), 404
     return jsonify(result), 200
@@ -78,3 +82,40 @@ def get_kpis(syllabus_service: SyllabusService = Provide[Container.syllabus_serv
         return jsonify(kpis), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
+
+def _parse_date(name: str):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} phải có dạng YYYY-MM-DD')
+
+@dashboard_bp.route('/trends/backlog', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@inject
+def backlog_trend(trend_service: KpiTrendService = Provide[Container.kpi_trend_service]):
+    """Daily end-of-day backlog (?from=&to=&faculty_id=&statuses=PENDING_REVIEW,PENDING_APPROVAL)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    statuses = [s.strip() for s in request.args.get('statuses', '').split(',') if s.strip()] or None
+    try:
+        result = trend_service.get_backlog_trend(_parse_date('from'), _parse_date('to'),
+                                                 request.args.get('faculty_id', type=int), statuses)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(result), 200
+
+@dashboard_bp.route('/trends/review-time', methods=['GET', 'OPTIONS'], strict_slashes=False)
+@inject
+def review_time_trend(trend_service: KpiTrendService = Provide[Container.kpi_trend_service]):
+    """Review-time percentiles per faculty (?from=&to=&faculty_id=&status=PUBLISHED)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    try:
+        result = trend_service.get_review_time_trend(_parse_date('from'), _parse_date('to'),
+                                                     request.args.get('faculty_id', type=int),
+                                                     request.args.get('status'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(result), 200
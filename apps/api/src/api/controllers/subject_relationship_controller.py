@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
 from services.subject_relationship_service import SubjectRelationshipService
+from services.curriculum_analytics_service import CurriculumAnalyticsService
 from api.schemas.subject_relationship_schema import SubjectRelationshipSchema
 
 subject_rel_bp = Blueprint('subject_relationship', __name__, url_prefix='/subject-relationships')
@@ -31,20 +32,40 @@ def list_relationships(subject_id: int, service: SubjectRelationshipService = Pr
 def get_tree(subject_id: int, service: SubjectRelationshipService = Provide[Container.subject_relationship_service]):
     """Get subject tree data (pre-reqs and successors) with recursive logic"""
     tree_data = service.get_tree(subject_id)
+    subjects = tree_data["subjects"]
+
+    def label(sid, attr):
+        node = subjects.get(sid)
+        return getattr(node, attr) if node else "N/A"
+
+    # Same shape as SubjectRelationshipSchema (camelCase) for prerequisites
+    prereqs_dump = [
+        {
+            "id": e.id,
+            "subjectId": e.subject_id,
+            "relatedSubjectId": e.related_subject_id,
+            "type": e.type,
+            "relatedSubjectCode": label(e.related_subject_id, "code"),
+            "relatedSubjectName": label(e.related_subject_id, "name_vi"),
+            "relatedSubject": {
+                "id": e.related_subject_id,
+                "code": label(e.related_subject_id, "code"),
+                "nameVi": label(e.related_subject_id, "name_vi"),
+                "name_vi": label(e.related_subject_id, "name_vi")
+            }
+        } for e in tree_data["prerequisites"]
+    ]
     
-    # Use schema to dump prerequisites (already returns camelCase)
-    prereqs_dump = schema.dump(tree_data["prerequisites"], many=True)
-    
-    # Manually format successors and ensure camelCase to match Frontend expectation
+    # Successors keep the flat shape expected by the Frontend
     successors_dump = [
         {
-            "id": s.id,
-            "type": s.type,
-            "subjectId": s.subject_id,
-            "relatedSubjectId": s.related_subject_id,
-            "subjectCode": s.subject.code if s.subject else "N/A",
-            "subjectName": s.subject.name_vi if s.subject else "N/A"
-        } for s in tree_data["successors"]
+            "id": e.id,
+            "type": e.type,
+            "subjectId": e.subject_id,
+            "relatedSubjectId": e.related_subject_id,
+            "subjectCode": label(e.subject_id, "code"),
+            "subjectName": label(e.subject_id, "name_vi")
+        } for e in tree_data["successors"]
     ]
     
     return jsonify({
@@ -52,6 +73,28 @@ def get_tree(subject_id: int, service: SubjectRelationshipService = Provide[Cont
         "successors": successors_dump
     }), 200
 
+@subject_rel_bp.route('/analytics/program/<int:program_id>', methods=['GET'])
+@inject
+def program_analytics(program_id: int,
+                      service: CurriculumAnalyticsService = Provide[Container.curriculum_analytics_service]):
+    """
+    Curriculum graph analytics for a program
+    ---
+    tags:
+      - Subject Relationships
+    parameters:
+      - name: program_id
+        in: path
+        required: true
+        schema: {type: integer}
+    responses:
+      200:
+        description: >
+          Prerequisite cycles, topological semester layers, longest prerequisite
+          chains, orphan subjects and co-requisite pairs over the program's subjects
+    """
+    return jsonify(service.get_program_analytics(program_id)), 200
+
 @subject_rel_bp.route('/', methods=['POST'], strict_slashes=False)
 @inject
 def create_relationship(service: SubjectRelationshipService = Provide[Container.subject_relationship_service]):
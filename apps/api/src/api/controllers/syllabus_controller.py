@@ -1,14 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from dependency_injector.wiring import inject, Provide
 from dependency_container import Container
 from services.syllabus_service import SyllabusService
-from services.ai_service import AiService
 from services.syllabus_snapshot_service import SyllabusSnapshotService
 from api.schemas.syllabus_schema import SyllabusSchema, SyllabusListSchema
 from api.schemas.syllabus_detail_schema import SyllabusDetailSchema
 from api.middleware import token_required, role_required
 from utils.pagination import get_pagination_params, Pagination
-from utils.performance import log_api_request
 
 syllabus_bp = Blueprint('syllabus', __name__, url_prefix='/syllabuses')
 
@@ -16,6 +14,9 @@ schema = SyllabusSchema()
 list_schema = SyllabusListSchema()
 detail_schema = SyllabusDetailSchema()
 
+# Snapshot payloads never change once written
+SNAPSHOT_CACHE_MAX_AGE = 31536000
+
 @syllabus_bp.route('/check-deadlines', methods=['POST'])
 @inject
 @role_required('Admin') # Only admin can trigger global deadline check for now
@@ -38,7 +39,6 @@ def check_deadlines(syllabus_service: SyllabusService = Provide[Container.syllab
 
 @syllabus_bp.route('/', methods=['GET'], strict_slashes=False)
 @inject
-@log_api_request
 def list_syllabuses(syllabus_service: SyllabusService = Provide[Container.syllabus_service]):
     """List syllabuses with pagination
     ---
@@ -164,15 +164,45 @@ def get_syllabus_details(id: int, syllabus_service: SyllabusService = Provide[Co
     return jsonify(detail_schema.dump(s)), 200
 
 
+def _ai_mode():
+    """Map the optional ?ai= query flag to a comparison mode (None, 'sync' or 'async')"""
+    raw = (request.args.get('ai') or '').strip().lower()
+    if raw == 'sync':
+        return 'sync'
+    if raw in ('1', 'true', 'yes', 'async'):
+        return 'async'
+    return None
+
+
+def _bypass_ai_cache():
+    """?refresh=1 forces a fresh AI call instead of a cached result"""
+    return (request.args.get('refresh') or '').strip().lower() in ('1', 'true', 'yes')
+
+
 @syllabus_bp.route('/compare', methods=['GET', 'OPTIONS'], strict_slashes=False)
 @inject
-def compare_syllabuses(syllabus_service: SyllabusService = Provide[Container.syllabus_service], ai_service: AiService = Provide[Container.ai_service]):
-    """Compare two syllabuses by id with AI Change Detection
+def compare_syllabuses(syllabus_service: SyllabusService = Provide[Container.syllabus_service],
+                       snapshot_service: SyllabusSnapshotService = Provide[Container.syllabus_snapshot_service]):
+    """Compare two syllabuses by id (structural diff, optional AI analysis)
     ---
     get:
       summary: Compare two syllabuses
       tags:
         - Syllabuses
+      parameters:
+        - name: base_id
+          in: query
+          schema:
+            type: integer
+        - name: target_id
+          in: query
+          schema:
+            type: integer
+        - name: ai
+          in: query
+          description: "'async' queues an AI analysis (poll /ai/task-status/<ai_task_id>), 'sync' waits for it"
+          schema:
+            type: string
     """
     try:
         base_id = int(request.args.get('baseId') or request.args.get('base_id'))
@@ -186,32 +216,26 @@ def compare_syllabuses(syllabus_service: SyllabusService = Provide[Container.syl
     if not base or not target:
         return jsonify({'message': 'One or both syllabuses not found'}), 404
 
-    # Basic Comparison
-    fields = ['subject_name_vi', 'credits', 'description', 'student_duties', 'course_type', 'component_type']
-    diffs = []
-    for f in fields:
-        base_val = getattr(base, f, None)
-        target_val = getattr(target, f, None)
-        if base_val != target_val:
-            diffs.append({
-                'field': f, 
-                'old_value': str(base_val or 'N/A'), 
-                'new_value': str(target_val or 'N/A'),
-                'type': 'Modified'
-            })
+    report = snapshot_service.compare_data(schema.dump(base), schema.dump(target), ai=_ai_mode(),
+                                           use_cache=not _bypass_ai_cache())
 
-    # AI Analysis (if requested or by default)
-    # We pass serialized versions of both syllabuses to AI
-    base_dict = schema.dump(base)
-    target_dict = schema.dump(target)
-    
-    ai_report = ai_service.compare_syllabuses(base_dict, target_dict)
+    # Flat field-level list kept for the compare page
+    diffs = [{
+        'field': c['path'],
+        'old_value': str(c['old_value'] if c['old_value'] is not None else 'N/A'),
+        'new_value': str(c['new_value'] if c['new_value'] is not None else 'N/A'),
+        'type': c['type']
+    } for c in report['changes']]
 
     return jsonify({
         'base_version': base.version or '1.0',
         'target_version': target.version or '2.0',
         'diffs': diffs,
-        'ai_report': ai_report
+        'summary': report['summary'],
+        'stats': report['stats'],
+        'is_significant_change': report['is_significant_change'],
+        'ai_report': report.get('ai_report'),
+        'ai_task_id': report.get('ai_task_id')
     }), 200
 
 
@@ -422,20 +446,20 @@ def delete_syllabus(id: int, syllabus_service: SyllabusService = Provide[Contain
 @inject
 @token_required
 def get_syllabus_history(id: int, current_user, snapshot_service: SyllabusSnapshotService = Provide[Container.syllabus_snapshot_service]):
-    """Get history of snapshots for a syllabus"""
+    """Get history of snapshots for a syllabus (metadata only, no payloads)"""
     history = snapshot_service.get_syllabus_history(id)
     return jsonify([{
         'id': s.id,
         'version': s.version,
-        'created_at': s.created_at.isoformat(),
-        'created_by': s.creator.full_name if s.creator else "System"
+        'created_at': s.created_at.isoformat() if s.created_at else None,
+        'created_by': s.creator_name or "System"
     } for s in history])
 
 @syllabus_bp.route('/compare-versions', methods=['GET'])
 @inject
 @token_required
 def compare_versions(current_user, snapshot_service: SyllabusSnapshotService = Provide[Container.syllabus_snapshot_service]):
-    """Compare two snapshots or a snapshot with current version"""
+    """Compare two snapshots or a snapshot with current version (structural diff, ?ai=async|sync for AI)"""
     s1_id = request.args.get('s1', type=int)
     s2_id_raw = request.args.get('s2')
     syllabus_id = request.args.get('syllabus_id', type=int)
@@ -447,9 +471,11 @@ def compare_versions(current_user, snapshot_service: SyllabusSnapshotService = P
         if s2_id_raw == 'current':
             if not syllabus_id:
                 return jsonify({'message': 'syllabus_id required for current comparison'}), 400
-            diff = snapshot_service.compare_with_current(s1_id, syllabus_id)
+            diff = snapshot_service.compare_with_current(s1_id, syllabus_id, ai=_ai_mode(),
+                                                         use_cache=not _bypass_ai_cache())
         else:
-            diff = snapshot_service.compare_snapshots(s1_id, int(s2_id_raw))
+            diff = snapshot_service.compare_snapshots(s1_id, int(s2_id_raw), ai=_ai_mode(),
+                                                      use_cache=not _bypass_ai_cache())
         return jsonify(diff)
     except Exception as e:
         return jsonify({'message': str(e)}), 400
@@ -458,8 +484,20 @@ def compare_versions(current_user, snapshot_service: SyllabusSnapshotService = P
 @inject
 @token_required
 def get_snapshot_details(snapshot_id: int, current_user, snapshot_service: SyllabusSnapshotService = Provide[Container.syllabus_snapshot_service]):
-    """Get full data of a specific snapshot"""
-    snapshot = snapshot_service.get_snapshot(snapshot_id)
-    if not snapshot:
-        return jsonify({'message': 'Snapshot not found'}), 404
-    return jsonify(snapshot.snapshot_data)
\ No newline at end of file
+    """Get full data of a specific snapshot
+
+    Snapshots are immutable, so the payload is served with a long-lived
+    private cache and a stable ETag; revalidations short-circuit to 304
+    without touching the database.
+    """
+    etag = f'snapshot-{snapshot_id}'
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        payload = snapshot_service.get_snapshot_payload(snapshot_id)
+        if payload is None:
+            return jsonify({'message': 'Snapshot not found'}), 404
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={SNAPSHOT_CACHE_MAX_AGE}, immutable'
+    return response
\ No newline at end of file
@@ -1,10 +1,12 @@
 # Middleware functions for processing requests and responses
 
+import logging
 from flask import  request, jsonify
 
 def log_request_info(app):
-    app.logger.debug('Headers: %s', request.headers)
-    app.logger.debug('Body: %s', request.get_data())
+    # No headers (Authorization) or body: reading the body is not free and may hold credentials
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug('%s %s (%s bytes)', request.method, request.path, request.content_length or 0)
 
 def handle_options_request():
     return jsonify({'message': 'CORS preflight response'}), 200
@@ -44,18 +46,257 @@ def add_custom_headers(response):
     response.headers['X-Custom-Header'] = 'Value'
     return response
 
+import ipaddress
+import time
 from functools import wraps
+from infrastructure.databases import query_stats
+from utils import metrics
+from utils import request_context
+from utils import tracing
+from utils.profiler import profile_store
+from utils.logging_config import get_logger
+
+sql_logger = get_logger('api.sql')
+request_logger = get_logger('api.request')
+
+
+def _setting(app, name):
+    return app.config.get(name, getattr(Config, name))
+
+
+def report_query_stats(app, response):
+    """
+    SQL stats of the request: X-DB-* headers (dev), one structured log record
+    (warning on N+1 / many queries), failure above the budget (TESTING only).
+    """
+    stats = query_stats.stop()
+    if stats is None:
+        return response
+    threshold = _setting(app, 'SQL_N_PLUS_ONE_THRESHOLD')
+    summary = stats.summary(threshold)
+    repeated = summary['db_repeated']
+
+    if _setting(app, 'SQL_STATS_HEADERS') or app.debug:
+        response.headers['X-DB-Query-Count'] = str(stats.count)
+        response.headers['X-DB-Time-ms'] = str(stats.duration_ms)
+        if repeated:
+            response.headers['X-DB-N-Plus-One'] = str(len(repeated))
+
+    extra = dict(summary, method=request.method, path=request.path,
+                 endpoint=request.endpoint, status_code=response.status_code)
+    if repeated or stats.count > _setting(app, 'SQL_WARN_QUERY_COUNT'):
+        sql_logger.warning(
+            "SQL: %s %s issued %d queries (%sms), %d repeated statements",
+            request.method, request.path, stats.count, stats.duration_ms, len(repeated),
+            extra=extra
+        )
+    else:
+        sql_logger.debug("SQL: %s %s issued %d queries", request.method, request.path, stats.count, extra=extra)
+
+    if app.testing:
+        budget = _setting(app, 'SQL_MAX_QUERIES_PER_REQUEST')
+        if budget and stats.count > budget:
+            raise query_stats.QueryBudgetExceeded(
+                f"{request.method} {request.path} issued {stats.count} queries (budget {budget})")
+        if repeated and _setting(app, 'SQL_FAIL_ON_N_PLUS_ONE'):
+            raise query_stats.QueryBudgetExceeded(
+                f"{request.method} {request.path} N+1: {repeated[0]['count']}x {repeated[0]['statement']}")
+    return response
+
+
+def record_request_metrics(response):
+    """Latency histogram per blueprint/endpoint/status (url rule, not raw path)"""
+    from flask import g
+    started = getattr(g, 'metrics_started', None)
+    if started is None or request.endpoint == 'metrics':
+        return response
+    stats = query_stats.current()
+    metrics.observe_request(request.blueprint, request.endpoint, request.method, response.status_code,
+                            time.perf_counter() - started, stats.count if stats else None)
+    return response
+
+
+def finish_request(app, response):
+    """
+    X-Request-ID on the response, phase timings (auth, db, serialize, other)
+    in one structured log record and, in dev, a Server-Timing header.
+    """
+    from flask import g
+    request_id = getattr(g, 'request_id', None)
+    if request_id is None:
+        return response
+    response.headers[request_context.REQUEST_ID_HEADER] = request_id
+
+    total_ms = (time.perf_counter() - g.metrics_started) * 1000
+    phases = request_context.get_phases()
+    stats = query_stats.current()
+    if stats is not None:
+        phases['db'] = stats.duration_ms
+    phases['other'] = round(max(total_ms - sum(phases.values()), 0.0), 2)
+
+    if _setting(app, 'SERVER_TIMING_HEADER') or app.debug:
+        response.headers['Server-Timing'] = ', '.join(
+            [f'{name};dur={ms}' for name, ms in phases.items()] + [f'total;dur={total_ms:.2f}'])
+
+    if request.endpoint != 'metrics':
+        request_logger.info('%s %s %s %.1fms', request.method, request.path, response.status_code, total_ms,
+                            extra={'method': request.method, 'path': request.path, 'endpoint': request.endpoint,
+                                   'status_code': response.status_code, 'duration_ms': round(total_ms, 2),
+                                   'phases': phases})
+    return response
+
+
+class TimedJSONProvider:
+    """Mixin: time JSON encoding of responses as the 'serialize' phase"""
+
+    def dumps(self, obj, **kwargs):
+        with request_context.phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+def install_json_timing(app):
+    try:
+        from flask.json.provider import DefaultJSONProvider
+    except ImportError:  # Flask < 2.2: no pluggable JSON provider
+        return
+    if isinstance(app.json, DefaultJSONProvider) and not isinstance(app.json, TimedJSONProvider):
+        provider_cls = type('TimedDefaultJSONProvider', (TimedJSONProvider, type(app.json)), {})
+        app.json = provider_cls(app)
+
+
+def _bearer_is_admin() -> bool:
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return False
+    try:
+        payload = jwt.decode(auth.split(' ', 1)[1], Config.SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return False
+    return payload.get('role') == 'Admin'
+
+
+def start_profiling():
+    """Profile this request when PROFILER_ENABLED and an Admin sent the profiling header"""
+    from flask import g
+    if not Config.PROFILER_ENABLED or not request.headers.get(Config.PROFILE_HEADER):
+        return
+    if _bearer_is_admin():
+        g.profile = profile_store.begin(g.request_id)
+
+
+def finish_profiling(response=None):
+    from flask import g
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile_id = profile_store.end(profile, {
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status_code': response.status_code if response is not None else 500,
+        'user_id': getattr(g, 'user_id', None),
+        'request_id': getattr(g, 'request_id', None),
+    })
+    if response is not None and profile_id:
+        response.headers['X-Profile-Id'] = profile_id
+    return response
+
+
+def start_request_span():
+    """Server span per url rule, continuing the caller's trace when it sent traceparent"""
+    from flask import g
+    if not tracing.is_enabled():
+        return
+    route = request.url_rule.rule if request.url_rule is not None else None
+    g.trace_span = tracing.start_span(
+        f'{request.method} {route or request.path}', carrier=dict(request.headers), server=True,
+        attributes={'http.method': request.method, 'http.route': route or '', 'http.target': request.path,
+                    'smd.request_id': g.request_id}
+    )
+
+
+def end_request_span(exception=None):
+    from flask import g
+    handle = g.pop('trace_span', None)
+    if handle is None:
+        return
+    status = g.pop('trace_status', None) or 500
+    tracing.end_span(handle, error=exception, failed=status >= 500, attributes={
+        'http.status_code': status,
+        'enduser.id': getattr(g, 'user_id', None),
+    })
+
+
+def _metrics_client_allowed() -> bool:
+    """Direct (not proxied) connection from one of METRICS_ALLOWED_NETWORKS"""
+    if request.headers.get('X-Forwarded-For') or request.headers.get('Forwarded'):
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    for network in Config.METRICS_ALLOWED_NETWORKS:
+        try:
+            if address in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def metrics_view():
+    """
+    Prometheus scrape endpoint, closed by default. With METRICS_TOKEN set the
+    scraper sends 'Authorization: Bearer <token>' (bearer_token_file in the
+    scrape config); without it only direct connections from
+    METRICS_ALLOWED_NETWORKS (loopback by default) are served and everyone
+    else gets 404, as if the endpoint did not exist.
+    """
+    token = Config.METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization', '') != f'Bearer {token}':
+            return jsonify({'message': 'Unauthorized'}), 401
+    elif not _metrics_client_allowed():
+        return jsonify({'error': 'Not Found'}), 404
+    if not metrics.enabled:
+        return jsonify({'message': 'prometheus_client chưa được cài đặt'}), 501
+    body, content_type = metrics.render()
+    return body, 200, {'Content-Type': content_type}
 
 
 def middleware(app):
+    install_json_timing(app)
+
     @app.before_request
     def before_request():
+        from flask import g
+        g.metrics_started = time.perf_counter()
+        g.request_id = request_context.accept_request_id(request.headers.get(request_context.REQUEST_ID_HEADER))
+        request_context.bind(g.request_id)
+        start_request_span()
+        start_profiling()
+        if Config.SQL_STATS_ENABLED:
+            query_stats.start()
         log_request_info(app)
 
     @app.after_request
     def after_request(response):
+        from flask import g
+        g.trace_status = response.status_code
+        response = finish_profiling(response)
+        response = record_request_metrics(response)
+        response = finish_request(app, response)
+        response = report_query_stats(app, response)
         return add_custom_headers(response)
 
+    @app.teardown_request
+    def teardown_request(exception=None):
+        finish_profiling()  # after_request skipped (unhandled error)
+        end_request_span(exception)
+        request_context.clear()
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+
     @app.errorhandler(Exception)
     def handle_exception(error):
         return error_handling_middleware(error)
@@ -81,17 +322,19 @@ def token_required(f):
             return jsonify({'message': 'Authorization token is missing'}), 401
         token = auth.split(' ', 1)[1]
         try:
-            payload = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
-            # Attach user info to Flask g context
-            g.user_id = payload.get('user_id')
-            g.username = payload.get('username')
-            g.role = payload.get('role')
-            
-            # If the function expects current_user, pass it from g
-            import inspect
-            sig = inspect.signature(f)
-            if 'current_user' in sig.parameters:
-                kwargs['current_user'] = g
+            with request_context.phase('auth'):
+                payload = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
+                # Attach user info to Flask g context
+                g.user_id = payload.get('user_id')
+                g.username = payload.get('username')
+                g.role = payload.get('role')
+                request_context.set_user_id(g.user_id)
+
+                # If the function expects current_user, pass it from g
+                import inspect
+                sig = inspect.signature(f)
+                if 'current_user' in sig.parameters:
+                    kwargs['current_user'] = g
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token expired'}), 401
         except jwt.InvalidTokenError:
@@ -38,11 +38,24 @@ from api.controllers.search_controller import search_bp
 from api.controllers.public_controller import public_bp
 from api.controllers.admin_controller import admin_bp
 from utils.socket_io import socketio, init_socketio
+from utils.tracing import init_tracing
+from utils.logging_config import setup_logging as setup_structured_logging, parse_sampling, attach_flask_logger
+from config import Config
 
 
 def create_app():
     app = Flask(__name__)
 
+    # Structured logging: queue handler, request context filter, logger sampling
+    setup_structured_logging(
+        app_name='smd-api',
+        log_level=Config.LOG_LEVEL,
+        log_dir=Config.LOG_DIR,
+        sampling=parse_sampling(Config.LOG_SAMPLING),
+        queue_size=Config.LOG_QUEUE_SIZE
+    )
+    attach_flask_logger(app)
+
     # Initialize CORS early so Swagger and other blueprints respect it
     try:
         init_cors(app)
@@ -154,6 +167,13 @@ def create_app():
         if os.getenv('ENVIRONMENT', 'development') == 'production':
             raise
 
+    # Tracing (no-op unless OTEL_ENABLED): before the middleware opens request spans
+    try:
+        from infrastructure.databases.mssql import engine
+        init_tracing(engine=engine)
+    except Exception as e:
+        print(f"[WARNING] Tracing init failure: {e}")
+
     # Register middleware
     middleware(app)
     print("[OK] Middleware registered")
@@ -1,6 +1,14 @@
+import time
+
 from celery import Celery, Task
+from celery.signals import before_task_publish, task_prerun, task_postrun
 from flask import Flask
 
+from utils import request_context, tracing
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
 def celery_init_app(app: Flask) -> Celery:
     class FlaskTask(Task):
         def __call__(self, *args: object, **kwargs: object) -> object:
@@ -11,4 +19,43 @@ def celery_init_app(app: Flask) -> Celery:
     celery_app.config_from_object(app.config["CELERY"])
     celery_app.set_default()
     app.extensions["celery"] = celery_app
+    connect_request_id_signals()
     return celery_app
+
+
+def _on_publish(headers=None, **kwargs):
+    """Carry the publishing request's id and trace context in the task message headers"""
+    request_id = request_context.get_request_id()
+    if request_id and headers is not None and 'request_id' not in headers:
+        headers['request_id'] = request_id
+    if headers is not None and 'traceparent' not in headers:
+        tracing.inject(headers)
+
+
+def _on_prerun(task_id=None, task=None, **kwargs):
+    req = getattr(task, 'request', None)
+    request_id = getattr(req, 'request_id', None) or (getattr(req, 'headers', None) or {}).get('request_id')
+    request_context.bind(request_id or f'task-{task_id}')
+    if req is not None:
+        req.smd_started = time.perf_counter()
+        req.smd_span = tracing.start_span(f'task {task.name}', carrier=tracing.extract_headers(req),
+                                          attributes={'celery.task_name': task.name, 'celery.task_id': task_id})
+
+
+def _on_postrun(task_id=None, task=None, state=None, **kwargs):
+    req = getattr(task, 'request', None)
+    tracing.end_span(getattr(req, 'smd_span', None), attributes={'celery.state': state},
+                     failed=state == 'FAILURE')
+    started = getattr(req, 'smd_started', None)
+    if started is not None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        logger.info('Task %s %s in %.1fms', task.name, state, duration_ms,
+                    extra={'task': task.name, 'task_id': task_id, 'duration_ms': round(duration_ms, 2)})
+    request_context.clear()
+
+
+def connect_request_id_signals():
+    """Request id and trace propagation API -> worker; safe to call more than once"""
+    before_task_publish.connect(_on_publish, weak=False, dispatch_uid='smd_request_id_publish')
+    task_prerun.connect(_on_prerun, weak=False, dispatch_uid='smd_request_id_prerun')
+    task_postrun.connect(_on_postrun, weak=False, dispatch_uid='smd_request_id_postrun')
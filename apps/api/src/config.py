@@ -1,6 +1,7 @@
 # Configuration settings for the Flask application
 
 import os
+from celery.schedules import crontab
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -16,12 +17,63 @@ class Config:
     # Logging Configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+    # Keep only a fraction of INFO/DEBUG records of high-volume loggers: "logger=rate,..."
+    LOG_SAMPLING = os.environ.get('LOG_SAMPLING', '')
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
     
     # Caching Configuration
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
     CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Socket.IO message queue: lets Celery workers emit to clients connected to the API process
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE',
+                                            os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
+    
+    # AI result cache (TTL in seconds per operation, 0 = never expires)
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', 'True').lower() in ['true', '1']
+    AI_CACHE_TTLS = {
+        'DEFAULT': int(os.environ.get('AI_CACHE_TTL_DEFAULT', 86400)),
+        'GENERATE': int(os.environ.get('AI_CACHE_TTL_GENERATE', 86400)),
+        'COMPARE_DIFF': int(os.environ.get('AI_CACHE_TTL_COMPARE', 7 * 86400)),
+        'ALIGNMENT': int(os.environ.get('AI_CACHE_TTL_ALIGNMENT', 7 * 86400)),
+        'SUMMARIZE': int(os.environ.get('AI_CACHE_TTL_SUMMARIZE', 7 * 86400)),
+    }
     
+    # SQL instrumentation: per-request query count, DB time and repeated statements (N+1)
+    SQL_STATS_ENABLED = os.environ.get('SQL_STATS_ENABLED', 'True').lower() in ['true', '1']
+    SQL_STATS_HEADERS = os.environ.get('SQL_STATS_HEADERS', str(DEBUG)).lower() in ['true', '1']  # X-DB-* response headers
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))  # same statement N times = N+1
+    SQL_WARN_QUERY_COUNT = int(os.environ.get('SQL_WARN_QUERY_COUNT', 50))
+    # Tests only (TESTING): fail the request above this many queries / on N+1, 0 = off
+    SQL_MAX_QUERIES_PER_REQUEST = int(os.environ.get('SQL_MAX_QUERIES_PER_REQUEST', 0))
+    SQL_FAIL_ON_N_PLUS_ONE = os.environ.get('SQL_FAIL_ON_N_PLUS_ONE', 'False').lower() in ['true', '1']
+
+    # Slow-query log (/admin/slow-queries): threshold in ms (0 = off), ring buffer size, plan capture
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get('SLOW_QUERY_BUFFER_SIZE', 200))
+    SLOW_QUERY_CAPTURE_PLANS = os.environ.get('SLOW_QUERY_CAPTURE_PLANS', 'False').lower() in ['true', '1']
+
+    # Server-Timing response header with per-request phases (auth, db, serialize, other)
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', str(DEBUG)).lower() in ['true', '1']
+
+    # On-demand profiler: Admin requests with PROFILE_HEADER run under pyinstrument/cProfile
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'False').lower() in ['true', '1']
+    PROFILE_HEADER = os.environ.get('PROFILE_HEADER', 'X-Profile')
+
+    # /metrics (Prometheus) is closed by default. Either set METRICS_TOKEN and give the
+    # scraper the same value as bearer token, or scrape from an address in
+    # METRICS_ALLOWED_NETWORKS (comma-separated CIDRs, e.g. the Docker network of the
+    # Prometheus container). Requests relayed by a reverse proxy are never trusted by address.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_NETWORKS = [n.strip() for n in os.environ.get(
+        'METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128').split(',') if n.strip()]
+
+    # OpenTelemetry tracing (utils.tracing): OTEL_TRACES_EXPORTER file | otlp | console
+    OTEL_ENABLED = os.environ.get('OTEL_ENABLED', 'False').lower() in ['true', '1']
+    OTEL_TRACES_EXPORTER = os.environ.get('OTEL_TRACES_EXPORTER', 'file').lower()
+    OTEL_FILE_PATH = os.environ.get('OTEL_FILE_PATH', os.path.join(os.environ.get('LOG_DIR', 'logs'), 'traces.jsonl'))
+
     # Pagination
     DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 20))
     MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
@@ -40,9 +92,30 @@ class Config:
         "result_backend": os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
         "task_ignore_result": False,
         "beat_schedule": {
-            "check-deadlines-every-morning": {
+            "catch-up-workflow-deadlines": {
+                # Reminders are sent by per-workflow timers; this only catches lost ones
                 "task": "tasks.check_deadlines_periodic_task",
-                "schedule": 86400.0,  # Once every 24 hours
+                "schedule": float(os.environ.get('WORKFLOW_DEADLINE_SWEEP_SECONDS', 3600)),
+            },
+            "purge-expired-ai-cache": {
+                "task": "tasks.purge_ai_cache_task",
+                "schedule": 86400.0,
+            },
+            "reconcile-kpi-rollup": {
+                "task": "tasks.reconcile_kpi_rollup_task",
+                "schedule": float(os.environ.get('KPI_RECONCILE_INTERVAL_SECONDS', 3600)),
+            },
+            "snapshot-kpi-daily": {
+                "task": "tasks.snapshot_kpi_daily_task",
+                "schedule": crontab(hour=0, minute=15),  # just after the day closes
+            },
+            "dispatch-outbox": {
+                "task": "tasks.dispatch_outbox_task",
+                "schedule": float(os.environ.get('OUTBOX_SWEEP_SECONDS', 15)),
+            },
+            "purge-outbox": {
+                "task": "tasks.purge_outbox_task",
+                "schedule": 86400.0,
             },
         },
     }
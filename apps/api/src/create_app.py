@@ -6,7 +6,8 @@ from infrastructure.databases import init_db
 from utils.caching import cache
 from utils.socket_io import init_socketio
 from utils.mail import init_mail
-from utils.logging_config import setup_logging as setup_structured_logging
+from utils.logging_config import setup_logging as setup_structured_logging, parse_sampling, attach_flask_logger
+from utils.tracing import init_tracing
 from celery_utils import celery_init_app
 
 def create_app():
@@ -20,8 +21,11 @@ def create_app():
     setup_structured_logging(
         app_name=app.config.get('APP_NAME', 'smd-api'),
         log_level=app.config.get('LOG_LEVEL', 'INFO'),
-        log_dir=app.config.get('LOG_DIR', 'logs')
+        log_dir=app.config.get('LOG_DIR', 'logs'),
+        sampling=parse_sampling(app.config.get('LOG_SAMPLING', '')),
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000)
     )
+    attach_flask_logger(app)
     
     # Setup Flask-Caching
     cache.init_app(app, config={
@@ -31,6 +35,8 @@ def create_app():
     })
 
     init_db(app)
+    from infrastructure.databases.mssql import engine
+    init_tracing(service_name=app.config.get('APP_NAME', 'smd-api') + '-worker', engine=engine)
     init_socketio(app)
     init_mail(app)
     middleware(app)
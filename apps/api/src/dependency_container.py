@@ -44,12 +44,20 @@ from infrastructure.repositories.clo_plo_mapping_repository import CloPloMapping
 from services.clo_plo_mapping_service import CloPloMappingService
 from infrastructure.repositories.subject_relationship_repository import SubjectRelationshipRepository
 from services.subject_relationship_service import SubjectRelationshipService
+from services.curriculum_graph_service import CurriculumGraphService
+from services.curriculum_analytics_service import CurriculumAnalyticsService
 from infrastructure.repositories.syllabus_comment_repository import SyllabusCommentRepository
 from services.syllabus_comment_service import SyllabusCommentService
 from infrastructure.repositories.notification_repository import NotificationRepository
 from services.notification_service import NotificationService
 from infrastructure.repositories.system_setting_repository import SystemSettingRepository
 from infrastructure.repositories.ai_auditlog_repository import AiAuditLogRepository
+from infrastructure.repositories.ai_result_cache_repository import AiResultCacheRepository
+from services.ai_result_cache_service import AiResultCacheService
+from infrastructure.repositories.alignment_batch_job_repository import AlignmentBatchJobRepository
+from services.alignment_batch_service import AlignmentBatchService
+from services.plo_suggestion_service import PloSuggestionService
+from services.program_coverage_service import ProgramCoverageService
 from infrastructure.repositories.system_auditlog_repository import SystemAuditLogRepository
 from infrastructure.repositories.student_subscription_repository import StudentSubscriptionRepository
 from infrastructure.repositories.student_report_repository import StudentReportRepository
@@ -61,8 +69,19 @@ from services.student_service import StudentService
 from services.email_service import EmailService
 from infrastructure.repositories.syllabus_snapshot_repository import SyllabusSnapshotRepository
 from services.syllabus_snapshot_service import SyllabusSnapshotService
+from services.syllabus_diff_service import SyllabusDiffService
 from infrastructure.repositories.syllabus_current_workflow_repository import SyllabusCurrentWorkflowRepository
 from services.analysis_service import AnalysisService
+from infrastructure.repositories.kpi_rollup_repository import KpiRollupRepository
+from services.kpi_service import KpiService
+from infrastructure.repositories.kpi_snapshot_repository import KpiSnapshotRepository
+from services.kpi_trend_service import KpiTrendService
+from infrastructure.repositories.workflow_repository import WorkflowRepository
+from services.workflow_engine import WorkflowEngine
+from infrastructure.repositories.outbox_repository import OutboxRepository
+from services.outbox_service import OutboxService
+from services.syllabus_event_handlers import SyllabusEventHandlers
+from services.workflow_deadline_service import WorkflowDeadlineService
 
 class Container(containers.DeclarativeContainer):
     """Dependency Injection Container for SMD services."""
@@ -258,6 +277,16 @@ class Container(containers.DeclarativeContainer):
         session=db_session
     )
 
+    ai_result_cache_repository = providers.Factory(
+        AiResultCacheRepository,
+        session=db_session
+    )
+
+    alignment_batch_job_repository = providers.Factory(
+        AlignmentBatchJobRepository,
+        session=db_session
+    )
+
     system_auditlog_repository = providers.Factory(
         SystemAuditLogRepository,
         session=db_session
@@ -273,10 +302,24 @@ class Container(containers.DeclarativeContainer):
         repository=academic_year_repository
     )
 
+    # Singleton: holds the in-memory curriculum graph for this process
+    curriculum_graph_service = providers.Singleton(
+        CurriculumGraphService,
+        repository=subject_relationship_repository
+    )
+
+    # Singleton: memoizes analytics per curriculum graph version
+    curriculum_analytics_service = providers.Singleton(
+        CurriculumAnalyticsService,
+        graph_service=curriculum_graph_service,
+        syllabus_repository=syllabus_repository
+    )
+
     analysis_service = providers.Factory(
         AnalysisService,
         syllabus_repository=syllabus_repository,
-        rel_repository=subject_relationship_repository
+        rel_repository=subject_relationship_repository,
+        graph_service=curriculum_graph_service
     )
 
     program_service = providers.Factory(
@@ -288,18 +331,37 @@ class Container(containers.DeclarativeContainer):
         EmailService
     )
 
+    syllabus_diff_service = providers.Singleton(SyllabusDiffService)
+
+    ai_result_cache_service = providers.Singleton(
+        AiResultCacheService,
+        repository=ai_result_cache_repository
+    )
+
     # Move AI Service provider up so it can be used by syllabus_snapshot_service
     from services.ai_service import AiService
     ai_service = providers.Singleton(
         AiService,
-        audit_repository=ai_auditlog_repository
+        audit_repository=ai_auditlog_repository,
+        diff_service=syllabus_diff_service,
+        cache_service=ai_result_cache_service
+    )
+
+    alignment_batch_service = providers.Factory(
+        AlignmentBatchService,
+        repository=alignment_batch_job_repository,
+        syllabus_repository=syllabus_repository,
+        program_repository=program_repository,
+        program_outcome_repository=program_outcome_repository,
+        ai_service=ai_service
     )
 
     syllabus_snapshot_service = providers.Factory(
         SyllabusSnapshotService,
         repository=syllabus_snapshot_repository,
         ai_service=ai_service,
-        syllabus_repository=syllabus_repository
+        syllabus_repository=syllabus_repository,
+        diff_service=syllabus_diff_service
     )
 
     notification_service = providers.Factory(
@@ -313,6 +375,60 @@ class Container(containers.DeclarativeContainer):
     
     search_service = providers.Singleton(SearchService)
 
+    # Singleton: keeps the per-program coverage matrices and their version tokens
+    program_coverage_service = providers.Singleton(
+        ProgramCoverageService,
+        repository=clo_plo_mapping_repository,
+        program_outcome_repository=program_outcome_repository
+    )
+
+    kpi_rollup_repository = providers.Factory(
+        KpiRollupRepository,
+        session=db_session
+    )
+
+    kpi_service = providers.Factory(
+        KpiService,
+        repository=kpi_rollup_repository
+    )
+
+    kpi_snapshot_repository = providers.Factory(
+        KpiSnapshotRepository,
+        session=db_session
+    )
+
+    kpi_trend_service = providers.Factory(
+        KpiTrendService,
+        repository=kpi_snapshot_repository
+    )
+
+    workflow_repository = providers.Factory(
+        WorkflowRepository,
+        session=db_session
+    )
+
+    outbox_repository = providers.Factory(
+        OutboxRepository,
+        session=db_session
+    )
+
+    # Singleton: holds the in-memory workflow state/transition graph for this process
+    workflow_engine = providers.Singleton(
+        WorkflowEngine,
+        repository=workflow_repository,
+        workflow_log_repository=workflow_log_repository,
+        current_workflow_repository=syllabus_current_workflow_repository,
+        outbox_repository=outbox_repository
+    )
+
+    workflow_deadline_service = providers.Factory(
+        WorkflowDeadlineService,
+        repository=syllabus_current_workflow_repository,
+        syllabus_repository=syllabus_repository,
+        notification_service=notification_service,
+        workflow_engine=workflow_engine
+    )
+
     syllabus_service = providers.Factory(
         SyllabusService,
         repository=syllabus_repository,
@@ -336,13 +452,34 @@ class Container(containers.DeclarativeContainer):
         program_outcome_repository=program_outcome_repository,
         search_service=search_service,
         student_subscription_repository=student_subscription_repository,
-        system_setting_service=system_setting_service
+        system_setting_service=system_setting_service,
+        coverage_service=program_coverage_service,
+        kpi_service=kpi_service,
+        workflow_engine=workflow_engine,
+        deadline_service=workflow_deadline_service
+    )
+
+    syllabus_event_handlers = providers.Factory(
+        SyllabusEventHandlers,
+        syllabus_repository=syllabus_repository,
+        syllabus_service=syllabus_service,
+        snapshot_service=syllabus_snapshot_service,
+        notification_service=notification_service,
+        student_subscription_repository=student_subscription_repository,
+        coverage_service=program_coverage_service
+    )
+
+    outbox_service = providers.Factory(
+        OutboxService,
+        repository=outbox_repository,
+        handlers=syllabus_event_handlers
     )
 
     syllabus_clo_service = providers.Factory(
         SyllabusCloService,
         repository=syllabus_clo_repository,
-        syllabus_repository=syllabus_repository
+        syllabus_repository=syllabus_repository,
+        coverage_service=program_coverage_service
     )
 
     syllabus_material_service = providers.Factory(
@@ -396,17 +533,29 @@ class Container(containers.DeclarativeContainer):
         repository=file_repository
     )
 
+    # Singleton: keeps the per-program PLO embedding matrices in memory
+    plo_suggestion_service = providers.Singleton(
+        PloSuggestionService,
+        search_service=search_service,
+        program_outcome_repository=program_outcome_repository,
+        syllabus_clo_repository=syllabus_clo_repository,
+        syllabus_repository=syllabus_repository
+    )
+
     clo_plo_mapping_service = providers.Factory(
         CloPloMappingService,
         repository=clo_plo_mapping_repository,
         syllabus_clo_repository=syllabus_clo_repository,
-        program_outcome_repository=program_outcome_repository
+        program_outcome_repository=program_outcome_repository,
+        suggestion_service=plo_suggestion_service,
+        coverage_service=program_coverage_service
     )
 
     subject_relationship_service = providers.Factory(
         SubjectRelationshipService,
         repository=subject_relationship_repository,
-        subject_repository=subject_repository
+        subject_repository=subject_repository,
+        graph_service=curriculum_graph_service
     )
 
     syllabus_comment_service = providers.Factory(
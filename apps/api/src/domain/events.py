@@ -0,0 +1,25 @@
+# Domain events
+
+# Syllabus workflow events written to the outbox together with the transition
+# that caused them; consumers run in the outbox worker after commit.
+class SyllabusEvent:
+    """Syllabus domain event types."""
+    SUBMITTED = 'SyllabusSubmitted'
+    APPROVED = 'SyllabusApproved'      # intermediate approval step
+    PUBLISHED = 'SyllabusPublished'
+    RETURNED = 'SyllabusReturned'
+    REJECTED = 'SyllabusRejected'
+
+    AGGREGATE = 'syllabus'
+
+    @classmethod
+    def for_transition(cls, action: str, to_status: str) -> str:
+        from domain.constants import WorkflowStatus
+        if to_status == WorkflowStatus.PUBLISHED:
+            return cls.PUBLISHED
+        return {
+            'SUBMIT': cls.SUBMITTED,
+            'APPROVE': cls.APPROVED,
+            'RETURN': cls.RETURNED,
+            'REJECT': cls.REJECTED,
+        }.get((action or '').upper(), cls.APPROVED)
@@ -2,6 +2,8 @@ from infrastructure.databases.mssql import init_mssql
 from infrastructure.models import (
     academic_year_model,
     ai_auditlog_model,
+    ai_result_cache_model,
+    alignment_batch_job_model,
     assessment_clo_model,
     assessment_component_model,
     assessment_scheme_model,
@@ -9,8 +11,11 @@ from infrastructure.models import (
     department_model,
     faculty_model,
     file_model,
+    kpi_counter_model,
+    kpi_daily_snapshot_model,
     notification_model,
     notification_template_model,
+    outbox_event_model,
     program_model,
     program_outcome_model,
     role_model,
@@ -24,6 +29,7 @@ from infrastructure.models import (
     syllabus_current_workflow,
     syllabus_material_model,
     syllabus_model,
+    syllabus_review_timing_model,
     system_auditlog_model,
     system_setting_model,
     teaching_plan_model,
@@ -3,6 +3,9 @@ from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
 from config import Config
 from infrastructure.databases.base import Base
+from infrastructure.databases import query_stats
+from infrastructure.databases.slow_query_log import slow_query_log
+from utils import metrics
 
 # Database configuration
 DATABASE_URI = Config.DATABASE_URI
@@ -21,6 +24,13 @@ engine = create_engine(
     }
 )
 
+# Per-request query count / DB time / N+1 detection (see api.middleware)
+if Config.SQL_STATS_ENABLED:
+    query_stats.install(engine)
+metrics.instrument_pool(engine)
+if Config.SLOW_QUERY_MS > 0:
+    slow_query_log.install(engine)
+
 # Use sessionmaker to create a factory for Session objects
 SessionLocal = sessionmaker(
     autocommit=False,
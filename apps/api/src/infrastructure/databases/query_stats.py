@@ -0,0 +1,111 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor-execute hooks on the engine count statements and DB time into the
+QueryStats of the current context (a request, a Celery task or a
+track_queries() block). Statements are already parameterised by SQLAlchemy,
+so the same text executed many times in one unit of work is an N+1 pattern:
+a lazy load in a loop, a Nested schema field, etc.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+_current: ContextVar[Optional['QueryStats']] = ContextVar('query_stats', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (tests only) when a request exceeds the configured query budget"""
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, most frequent first"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+    def summary(self, threshold: int, limit: int = 5) -> dict:
+        repeated = self.repeated(threshold)
+        return {
+            'db_query_count': self.count,
+            'db_time_ms': self.duration_ms,
+            'db_repeated': [{'count': n, 'statement': ' '.join(sql.split())[:300]} for sql, n in repeated[:limit]],
+        }
+
+
+def start() -> QueryStats:
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def stop() -> Optional[QueryStats]:
+    stats = _current.get()
+    _current.set(None)
+    return stats
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries():
+    """
+    Count queries of a block (tasks, scripts, tests):
+
+        with track_queries() as stats:
+            service.get_kpis()
+        assert stats.count <= 3
+    """
+    token = _current.set(QueryStats())
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def install(engine):
+    """Attach the cursor hooks once per engine"""
+    if getattr(engine, '_query_stats_installed', False):
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault('query_stats_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None:
+            return
+        starts = conn.info.get('query_stats_start')
+        if not starts:
+            return
+        stats.duration += time.perf_counter() - starts.pop()
+        stats.count += 1
+        stats.statements[statement] += 1
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get('query_stats_start') if conn is not None else None
+        if starts:
+            starts.pop()
+
+    engine._query_stats_installed = True
@@ -0,0 +1,193 @@
+"""
+Slow-query recorder.
+
+Statements slower than the threshold are kept in a bounded in-process ring
+buffer with their parameters, duration, calling repository/service method
+and request id. Optionally the estimated plan is fetched afterwards on a
+separate pooled connection (SHOWPLAN_XML on MSSQL, EXPLAIN on Postgres) by a
+single background thread, so the slow request does not wait for it.
+"""
+import itertools
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from config import Config
+from utils import request_context
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_CALLER_PACKAGES = ('infrastructure/repositories/', 'infrastructure\\repositories\\', 'services/', 'services\\')
+_PARAM_MAX_CHARS = 200
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200, size: int = 200, capture_plans: bool = False):
+        self.threshold = threshold_ms / 1000
+        self.capture_plans = capture_plans
+        self._entries = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._engine = None
+        self._plan_executor = None
+
+    # ------------------------------------------------------------------ #
+    # Recording
+    # ------------------------------------------------------------------ #
+    def install(self, engine):
+        if getattr(engine, '_slow_query_log_installed', False):
+            return
+        self._engine = engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('slow_query_start')
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            if elapsed >= self.threshold:
+                self._record(statement, parameters, elapsed, executemany)
+
+        @event.listens_for(engine, 'handle_error')
+        def _error(exception_context):
+            conn = exception_context.connection
+            starts = conn.info.get('slow_query_start') if conn is not None else None
+            if starts:
+                starts.pop()
+
+        engine._slow_query_log_installed = True
+
+    def _record(self, statement, parameters, elapsed, executemany):
+        entry = {
+            'id': next(self._ids),
+            'at': datetime.now().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': statement,
+            'parameters': None if executemany else _safe_params(parameters),
+            'executemany': executemany,
+            'caller': _caller(),
+            'request_id': request_context.get_request_id(),
+            'plan': None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning('Slow query %.1fms in %s: %s', entry['duration_ms'], entry['caller'] or '?',
+                       ' '.join(statement.split())[:300])
+        if self.capture_plans and not executemany and _is_select(statement):
+            self._submit_plan(entry, statement, parameters)
+
+    # ------------------------------------------------------------------ #
+    # Plans
+    # ------------------------------------------------------------------ #
+    def _submit_plan(self, entry, statement, parameters):
+        if self._plan_executor is None:
+            with self._lock:
+                if self._plan_executor is None:
+                    self._plan_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-plan')
+        try:
+            self._plan_executor.submit(self._capture_plan, entry, statement, parameters)
+        except RuntimeError:  # interpreter shutting down
+            pass
+
+    def _capture_plan(self, entry, statement, parameters):
+        """Raw DBAPI connection: no cursor events, so this is not recorded itself"""
+        dialect = self._engine.dialect.name
+        raw = self._engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if dialect == 'mssql':
+                cursor.execute('SET SHOWPLAN_XML ON')
+                try:
+                    cursor.execute(statement, parameters)
+                    row = cursor.fetchone()
+                    entry['plan'] = {'format': 'showplan_xml', 'plan': row[0] if row else None}
+                finally:
+                    cursor.execute('SET SHOWPLAN_XML OFF')
+            elif dialect == 'postgresql':
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+                row = cursor.fetchone()
+                entry['plan'] = {'format': 'explain_json', 'plan': row[0] if row else None}
+                raw.rollback()
+            else:
+                entry['plan'] = {'format': None, 'error': f'Plan capture not supported for {dialect}'}
+        except Exception as e:
+            entry['plan'] = {'format': None, 'error': str(e)}
+            # Session options (SHOWPLAN) may still be on: never give this connection back
+            raw.invalidate()
+        finally:
+            raw.close()
+
+    # ------------------------------------------------------------------ #
+    # Listing
+    # ------------------------------------------------------------------ #
+    def entries(self, limit: int = 50, include_plans: bool = False) -> List[dict]:
+        with self._lock:
+            items = list(self._entries)[-limit:][::-1]
+        if include_plans:
+            return [dict(e) for e in items]
+        return [dict(e, plan=_plan_status(e['plan'])) for e in items]
+
+    def get(self, entry_id: int) -> Optional[dict]:
+        with self._lock:
+            for entry in self._entries:
+                if entry['id'] == entry_id:
+                    return dict(entry)
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _plan_status(plan) -> Optional[str]:
+    if plan is None:
+        return None
+    return 'error' if plan.get('error') else 'captured'
+
+
+def _is_select(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    return head in ('SELECT', 'WITH')
+
+
+def _safe_params(parameters):
+    """Parameters truncated for the buffer (large blobs, long texts)"""
+    def clip(value):
+        text = repr(value)
+        return text if len(text) <= _PARAM_MAX_CHARS else text[:_PARAM_MAX_CHARS] + '...'
+    if isinstance(parameters, dict):
+        return {k: clip(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [clip(v) for v in parameters]
+    return clip(parameters)
+
+
+def _caller() -> Optional[str]:
+    """Innermost repository/service frame on the stack: 'module.Class.method:line'"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if any(pkg in filename for pkg in _CALLER_PACKAGES) and 'site-packages' not in filename:
+            owner = frame.f_locals.get('self')
+            qualname = f'{type(owner).__name__}.{frame.f_code.co_name}' if owner is not None else frame.f_code.co_name
+            return f"{frame.f_globals.get('__name__', '?')}.{qualname}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=Config.SLOW_QUERY_MS,
+    size=Config.SLOW_QUERY_BUFFER_SIZE,
+    capture_plans=Config.SLOW_QUERY_CAPTURE_PLANS
+)
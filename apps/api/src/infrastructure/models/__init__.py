@@ -27,6 +27,12 @@ from .workflow_state_model import WorkflowState
 from .workflow_transition_model import WorkflowTransition
 from .syllabus_current_workflow import SyllabusCurrentWorkflow
 from .ai_auditlog_model import AiAuditLog
+from .ai_result_cache_model import AiResultCache
+from .alignment_batch_job_model import AlignmentBatchJob
+from .kpi_counter_model import KpiCounter
+from .syllabus_review_timing_model import SyllabusReviewTiming
+from .kpi_daily_snapshot_model import KpiDailySnapshot
+from .outbox_event_model import OutboxEvent
 
 __all__ = [
     "User", "UserRole", "Role", "Faculty", "Department", "Program",
@@ -35,5 +41,6 @@ __all__ = [
     "CloPloMapping", "AssessmentClo", "SubjectRelationship", "SystemSetting",
     "StudentSubscription", "StudentReport", "Notification", "SyllabusComment",
     "WorkflowLog", "WorkflowState", "WorkflowTransition", "SyllabusCurrentWorkflow",
-    "AiAuditLog"
+    "AiAuditLog", "AiResultCache", "AlignmentBatchJob", "KpiCounter", "SyllabusReviewTiming",
+    "KpiDailySnapshot", "OutboxEvent"
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column, BigInteger, String, Integer, Date, DateTime, Boolean,
+    ForeignKey, UnicodeText, DECIMAL, CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.dialects.mssql import NVARCHAR
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from infrastructure.databases.base import Base
+
+class AiResultCache(Base):
+    __tablename__ = 'ai_result_cache'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    cache_key = Column(NVARCHAR(64), unique=True, nullable=False)  # sha256(model + operation + prompt)
+    operation = Column(NVARCHAR(50), nullable=False)  # GENERATE, COMPARE_DIFF, ALIGNMENT, SUMMARIZE
+    model_name = Column(NVARCHAR(100), nullable=False)
+    result = Column(UnicodeText, nullable=False)  # JSON
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=True, index=True)  # NULL = never expires (immutable inputs)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column, BigInteger, String, Integer, Date, DateTime, Boolean,
+    ForeignKey, UnicodeText, DECIMAL, CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.dialects.mssql import NVARCHAR
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from infrastructure.databases.base import Base
+
+class AlignmentBatchJob(Base):
+    __tablename__ = 'alignment_batch_jobs'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    program_id = Column(BigInteger, ForeignKey('programs.id'), nullable=False, index=True)
+    status = Column(NVARCHAR(20), nullable=False, default='PENDING')  # PENDING, RUNNING, COMPLETED, FAILED
+    syllabus_ids = Column(UnicodeText, nullable=False)  # JSON array, fixed when the job is created
+    total = Column(Integer, nullable=False, default=0)
+    analyzed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)  # incremented on each (re)dispatch
+    task_id = Column(NVARCHAR(64), nullable=True)  # chord callback id of the latest dispatch
+    report = Column(UnicodeText, nullable=True)  # JSON aggregated program report
+    created_by = Column(BigInteger, ForeignKey('users.id'), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    program = relationship("Program")
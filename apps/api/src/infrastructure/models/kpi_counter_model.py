@@ -0,0 +1,12 @@
+from sqlalchemy import Column, BigInteger, DateTime
+from sqlalchemy.dialects.mssql import NVARCHAR
+from sqlalchemy.sql import func
+from infrastructure.databases.base import Base
+
+class KpiCounter(Base):
+    __tablename__ = 'kpi_counters'
+    
+    # status:<STATUS>, review_count, review_seconds
+    name = Column(NVARCHAR(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
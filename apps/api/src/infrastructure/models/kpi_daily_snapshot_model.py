@@ -0,0 +1,32 @@
+from sqlalchemy import (
+    Column, BigInteger, Integer, Float, Date, DateTime,
+    ForeignKey, UnicodeText, UniqueConstraint
+)
+from sqlalchemy.dialects.mssql import NVARCHAR
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from infrastructure.databases.base import Base
+
+class KpiDailySnapshot(Base):
+    __tablename__ = 'kpi_daily_snapshots'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    faculty_id = Column(BigInteger, ForeignKey('faculties.id'), nullable=True)
+    status = Column(NVARCHAR(50), nullable=False)
+    syllabus_count = Column(Integer, nullable=False, default=0)  # syllabuses in this status at the end of the day
+    entered_count = Column(Integer, nullable=False, default=0)  # transitions into this status during the day
+    # Hours from first submission to entering this status, over the day's transitions
+    duration_avg_hours = Column(Float, nullable=True)
+    duration_p50_hours = Column(Float, nullable=True)
+    duration_p90_hours = Column(Float, nullable=True)
+    duration_p95_hours = Column(Float, nullable=True)
+    duration_histogram = Column(UnicodeText, nullable=True)  # JSON bucket counts, merged for range percentiles
+    created_at = Column(DateTime, default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'faculty_id', 'status', name='uq_kpi_daily_snapshot'),
+    )
+
+    # Relationships
+    faculty = relationship("Faculty")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, BigInteger, Integer, DateTime, UnicodeText, Index
+from sqlalchemy.dialects.mssql import NVARCHAR
+from sqlalchemy.sql import func
+from infrastructure.databases.base import Base
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_type = Column(NVARCHAR(50), nullable=False)  # SyllabusSubmitted, SyllabusPublished...
+    aggregate_type = Column(NVARCHAR(50), nullable=False)
+    aggregate_id = Column(BigInteger, nullable=False)
+    payload = Column(UnicodeText, nullable=False)  # JSON
+    status = Column(NVARCHAR(20), nullable=False, default='PENDING')  # PENDING, PROCESSING, DISPATCHED, FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    handled = Column(UnicodeText, nullable=True)  # JSON list of consumers that already succeeded
+    last_error = Column(UnicodeText, nullable=True)
+    available_at = Column(DateTime, default=func.now())  # next attempt / lease expiry while PROCESSING
+    created_at = Column(DateTime, default=func.now())
+    dispatched_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_outbox_events_status_available', 'status', 'available_at'),
+    )
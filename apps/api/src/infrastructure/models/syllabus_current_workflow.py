@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, BigInteger, String, Integer, Date, DateTime, Boolean,
-    ForeignKey, UnicodeText, DECIMAL, CheckConstraint, UniqueConstraint
+    ForeignKey, UnicodeText, DECIMAL, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.mssql import NVARCHAR
@@ -11,6 +11,10 @@ from infrastructure.databases.base import Base
 
 class SyllabusCurrentWorkflow(Base):
     __tablename__ = 'syllabus_current_workflows'
+    __table_args__ = (
+        # Catch-up sweep: unreminded rows ordered by due date
+        Index('ix_current_workflows_reminder_due', 'reminded_at', 'due_date'),
+    )
     
     syllabus_id = Column(BigInteger, ForeignKey('syllabuses.id'), primary_key=True)
     state = Column(NVARCHAR(50), nullable=False)  # Current string state (DRAFT, PENDING, etc.)
@@ -18,6 +22,10 @@ class SyllabusCurrentWorkflow(Base):
     assigned_user_id = Column(BigInteger, ForeignKey('users.id'), nullable=True)
     assigned_to_user_id = Column(BigInteger, ForeignKey('users.id'), nullable=True) # Legacy
     due_date = Column(DateTime, nullable=True)
+    # Identifies the deadline timer scheduled for due_date; a new token
+    # (or deleting the row) turns already queued timers into no-ops
+    deadline_token = Column(String(32), nullable=True)
+    reminded_at = Column(DateTime, nullable=True)
     last_action_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now()) # Legacy
     
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, BigInteger, DateTime
+from infrastructure.databases.base import Base
+
+class SyllabusReviewTiming(Base):
+    __tablename__ = 'syllabus_review_timings'
+    
+    # First SUBMIT and first APPROVE of a syllabus, recorded when they happen.
+    # No FK: rollup rows are removed by KpiService after the syllabus is deleted
+    syllabus_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    submitted_at = Column(DateTime, nullable=True)
+    approved_at = Column(DateTime, nullable=True)
+    review_seconds = Column(BigInteger, nullable=True)  # approved_at - submitted_at
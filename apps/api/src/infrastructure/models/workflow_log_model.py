@@ -20,7 +20,7 @@ class WorkflowLog(Base):
     from_status = Column(NVARCHAR(50))
     to_status = Column(NVARCHAR(50))
     comment = Column(UnicodeText)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     
     # Relationships
     syllabus = relationship("Syllabus", back_populates="workflow_logs")
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from infrastructure.databases.mssql import session
+from infrastructure.models.ai_result_cache_model import AiResultCache
+
+class AiResultCacheRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    def get_valid(self, cache_key: str) -> Optional[AiResultCache]:
+        return (self.session.query(AiResultCache)
+                .filter(AiResultCache.cache_key == cache_key)
+                .filter(or_(AiResultCache.expires_at.is_(None), AiResultCache.expires_at > datetime.now()))
+                .first())
+
+    def upsert(self, cache_key: str, operation: str, model_name: str, result: str,
+               expires_at: Optional[datetime] = None) -> AiResultCache:
+        item = self.session.query(AiResultCache).filter_by(cache_key=cache_key).first()
+        if item:
+            item.result = result
+            item.expires_at = expires_at
+            item.created_at = datetime.now()
+        else:
+            item = AiResultCache(cache_key=cache_key, operation=operation, model_name=model_name,
+                                 result=result, expires_at=expires_at)
+            self.session.add(item)
+        try:
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return item
+
+    def delete_expired(self) -> int:
+        count = (self.session.query(AiResultCache)
+                 .filter(AiResultCache.expires_at.isnot(None))
+                 .filter(AiResultCache.expires_at <= datetime.now())
+                 .delete(synchronize_session=False))
+        self.session.commit()
+        return count
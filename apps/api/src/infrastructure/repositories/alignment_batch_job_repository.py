@@ -0,0 +1,62 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from infrastructure.databases.mssql import session
+from infrastructure.models.alignment_batch_job_model import AlignmentBatchJob
+
+class AlignmentBatchJobRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    def get_by_id(self, id: int) -> Optional[AlignmentBatchJob]:
+        return self.session.query(AlignmentBatchJob).filter_by(id=id).first()
+
+    def get_by_program(self, program_id: int, limit: int = 20) -> List[AlignmentBatchJob]:
+        return (self.session.query(AlignmentBatchJob)
+                .filter_by(program_id=program_id)
+                .order_by(AlignmentBatchJob.created_at.desc())
+                .limit(limit)
+                .all())
+
+    def get_unfinished(self, program_id: int) -> Optional[AlignmentBatchJob]:
+        return (self.session.query(AlignmentBatchJob)
+                .filter(AlignmentBatchJob.program_id == program_id)
+                .filter(AlignmentBatchJob.status.in_(['PENDING', 'RUNNING']))
+                .order_by(AlignmentBatchJob.created_at.desc())
+                .first())
+
+    def create(self, data: dict) -> AlignmentBatchJob:
+        job = AlignmentBatchJob(**data)
+        self.session.add(job)
+        try:
+            self.session.commit()
+            self.session.refresh(job)
+        except Exception:
+            self.session.rollback()
+            raise
+        return job
+
+    def update(self, id: int, data: dict) -> Optional[AlignmentBatchJob]:
+        job = self.get_by_id(id)
+        if not job:
+            return None
+        for key, value in data.items():
+            setattr(job, key, value)
+        try:
+            self.session.commit()
+            self.session.refresh(job)
+        except Exception:
+            self.session.rollback()
+            raise
+        return job
+
+    def increment(self, id: int, analyzed: int = 0, failed: int = 0, attempt: int = None):
+        """Atomic progress update; per-syllabus tasks run concurrently. Ignored for an older attempt"""
+        query = self.session.query(AlignmentBatchJob).filter_by(id=id)
+        if attempt is not None:
+            query = query.filter_by(attempts=attempt)
+        (query
+         .update({
+             AlignmentBatchJob.analyzed: AlignmentBatchJob.analyzed + analyzed,
+             AlignmentBatchJob.failed: AlignmentBatchJob.failed + failed
+         }, synchronize_session=False))
+        self.session.commit()
@@ -1,7 +1,13 @@
 from typing import List, Optional
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from infrastructure.databases.mssql import session
 from infrastructure.models.clo_plo_mapping_model import CloPloMapping
+from infrastructure.models.syllabus_clo_model import SyllabusClo
+from infrastructure.models.syllabus_model import Syllabus
+from infrastructure.models.program_outcome_model import ProgramOutcome
+from infrastructure.models.subject_model import Subject
+from infrastructure.repositories.syllabus_repository import latest_syllabus_per_subject
 
 class CloPloMappingRepository:
     def __init__(self, session: Session = session):
@@ -29,4 +35,32 @@ class CloPloMappingRepository:
             return False
         self.session.delete(item)
         self.session.commit()
-        return True
\ No newline at end of file
+        return True
+
+    def get_program_matrix_rows(self, program_id: int, statuses: List[str] = None):
+        """
+        Every CLO of the latest syllabus of each subject in a program with its PLO
+        mappings, in one query (latest_syllabus_per_subject picks the syllabus, the
+        same one the alignment batch analyses; outer joins keep unmapped CLOs). Rows: (syllabus_id, subject_id, subject_code, subject_name,
+        clo_id, clo_code, plo_id, level), plo_id/level are NULL for unmapped CLOs.
+        """
+        latest = latest_syllabus_per_subject(self.session, Syllabus.program_id == program_id, statuses=statuses)
+
+        return (self.session.query(
+                    latest.c.id.label('syllabus_id'),
+                    Subject.id.label('subject_id'),
+                    Subject.code.label('subject_code'),
+                    Subject.name_vi.label('subject_name'),
+                    SyllabusClo.id.label('clo_id'),
+                    SyllabusClo.code.label('clo_code'),
+                    ProgramOutcome.id.label('plo_id'),
+                    CloPloMapping.level)
+                .select_from(latest)
+                .join(Subject, Subject.id == latest.c.subject_id)
+                .join(SyllabusClo, SyllabusClo.syllabus_id == latest.c.id)
+                .outerjoin(CloPloMapping, CloPloMapping.syllabus_clo_id == SyllabusClo.id)
+                # mappings to another program's PLO are ignored
+                .outerjoin(ProgramOutcome, and_(ProgramOutcome.id == CloPloMapping.program_plo_id,
+                                                ProgramOutcome.program_id == program_id))
+                .order_by(Subject.code, latest.c.id, SyllabusClo.code, SyllabusClo.id)
+                .all())
@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from infrastructure.databases.mssql import session
+from infrastructure.models.kpi_counter_model import KpiCounter
+from infrastructure.models.syllabus_review_timing_model import SyllabusReviewTiming
+from infrastructure.models.syllabus_model import Syllabus
+from infrastructure.models.workflow_log_model import WorkflowLog
+
+class KpiRollupRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    # ------------------------------------------------------------------ #
+    # Locking
+    # ------------------------------------------------------------------ #
+    def lock_rollup(self, exclusive: bool = False, timeout_ms: int = 30000):
+        """
+        Transaction-scoped application lock on the rollup: increments take it
+        shared, reconcile exclusive, so no increment lands between reconcile's
+        read and its replace. Released on commit/rollback.
+        """
+        dialect = self.session.get_bind().dialect.name
+        if dialect == 'mssql':
+            result = self.session.execute(
+                text("DECLARE @r INT; EXEC @r = sp_getapplock @Resource = 'kpi_rollup', @LockMode = :mode, "
+                     "@LockOwner = 'Transaction', @LockTimeout = :timeout; SELECT @r"),
+                {'mode': 'Exclusive' if exclusive else 'Shared', 'timeout': timeout_ms}
+            ).scalar()
+            if result is not None and result < 0:
+                raise TimeoutError(f'KPI rollup lock not acquired (sp_getapplock returned {result})')
+        elif dialect == 'postgresql':
+            fn = 'pg_advisory_xact_lock' if exclusive else 'pg_advisory_xact_lock_shared'
+            self.session.execute(text(f"SELECT {fn}(hashtext('kpi_rollup'))"))
+
+    # ------------------------------------------------------------------ #
+    # Counters
+    # ------------------------------------------------------------------ #
+    def get_counters(self) -> Dict[str, int]:
+        return {row.name: int(row.value or 0) for row in self.session.query(KpiCounter.name, KpiCounter.value)}
+
+    def increment(self, deltas: Dict[str, int], commit: bool = True):
+        """Atomic value = value + delta per counter; missing counters are created"""
+        for name, delta in deltas.items():
+            if not delta:
+                continue
+            updated = (self.session.query(KpiCounter)
+                       .filter(KpiCounter.name == name)
+                       .update({KpiCounter.value: KpiCounter.value + delta,
+                                KpiCounter.updated_at: datetime.now()},
+                               synchronize_session=False))
+            if not updated:
+                self.session.add(KpiCounter(name=name, value=delta, updated_at=datetime.now()))
+        if commit:
+            self.session.commit()
+
+    def replace_counters(self, values: Dict[str, int], commit: bool = True):
+        self.session.query(KpiCounter).delete(synchronize_session=False)
+        now = datetime.now()
+        self.session.add_all([KpiCounter(name=name, value=value, updated_at=now) for name, value in values.items()])
+        if commit:
+            self.session.commit()
+
+    # ------------------------------------------------------------------ #
+    # Review timings
+    # ------------------------------------------------------------------ #
+    def get_timing(self, syllabus_id: int) -> Optional[SyllabusReviewTiming]:
+        return self.session.query(SyllabusReviewTiming).filter_by(syllabus_id=syllabus_id).first()
+
+    def record_submit(self, syllabus_id: int, at: datetime) -> bool:
+        """Stores the first submission only; returns True if it was recorded"""
+        if self.get_timing(syllabus_id):
+            return False
+        self.session.add(SyllabusReviewTiming(syllabus_id=syllabus_id, submitted_at=at))
+        self.session.flush()
+        return True
+
+    def record_approve(self, syllabus_id: int, at: datetime) -> Optional[int]:
+        """Stores the first approval after a submission; returns the review duration in seconds"""
+        timing = self.get_timing(syllabus_id)
+        if not timing or timing.approved_at is not None or not timing.submitted_at or timing.submitted_at >= at:
+            return None
+        seconds = int((at - timing.submitted_at).total_seconds())
+        # guarded update: concurrent approvals of the same syllabus count once
+        updated = (self.session.query(SyllabusReviewTiming)
+                   .filter(SyllabusReviewTiming.syllabus_id == syllabus_id,
+                           SyllabusReviewTiming.approved_at.is_(None))
+                   .update({SyllabusReviewTiming.approved_at: at,
+                            SyllabusReviewTiming.review_seconds: seconds},
+                           synchronize_session=False))
+        return seconds if updated else None
+
+    def delete_timing(self, syllabus_id: int) -> Optional[SyllabusReviewTiming]:
+        timing = self.get_timing(syllabus_id)
+        if timing:
+            self.session.delete(timing)
+            self.session.flush()
+        return timing
+
+    # ------------------------------------------------------------------ #
+    # Reconciliation (full scans, periodic job only)
+    # ------------------------------------------------------------------ #
+    def count_by_status(self) -> Dict[Optional[str], int]:
+        rows = (self.session.query(func.upper(Syllabus.status), func.count(Syllabus.id))
+                .group_by(func.upper(Syllabus.status))
+                .all())
+        return {status: int(count) for status, count in rows}
+
+    def scan_review_timings(self) -> Iterable:
+        """First SUBMIT and first APPROVE per syllabus from workflow_logs: rows (syllabus_id, submitted_at, approved_at)"""
+        submits = (self.session.query(WorkflowLog.syllabus_id, func.min(WorkflowLog.created_at).label('submitted_at'))
+                   .filter(WorkflowLog.action == 'SUBMIT')
+                   .group_by(WorkflowLog.syllabus_id)
+                   .subquery())
+        approves = (self.session.query(WorkflowLog.syllabus_id, func.min(WorkflowLog.created_at).label('approved_at'))
+                    .filter(WorkflowLog.action == 'APPROVE')
+                    .group_by(WorkflowLog.syllabus_id)
+                    .subquery())
+        return (self.session.query(submits.c.syllabus_id, submits.c.submitted_at, approves.c.approved_at)
+                .outerjoin(approves, approves.c.syllabus_id == submits.c.syllabus_id)
+                .yield_per(1000))
+
+    def replace_timings(self, rows: Iterable[dict], commit: bool = True):
+        self.session.query(SyllabusReviewTiming).delete(synchronize_session=False)
+        self.session.bulk_insert_mappings(SyllabusReviewTiming, list(rows))
+        if commit:
+            self.session.commit()
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from infrastructure.databases.mssql import session
+from infrastructure.models.kpi_daily_snapshot_model import KpiDailySnapshot
+from infrastructure.models.syllabus_model import Syllabus
+from infrastructure.models.subject_model import Subject
+from infrastructure.models.department_model import Department
+from infrastructure.models.workflow_log_model import WorkflowLog
+from infrastructure.models.syllabus_review_timing_model import SyllabusReviewTiming
+
+class KpiSnapshotRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    def _with_faculty(self, query):
+        return (query.join(Subject, Subject.id == Syllabus.subject_id)
+                .join(Department, Department.id == Subject.department_id))
+
+    # ------------------------------------------------------------------ #
+    # Sources (used by the daily job only)
+    # ------------------------------------------------------------------ #
+    def current_backlog(self) -> List:
+        """Syllabus count per (faculty_id, status) right now"""
+        status = func.upper(Syllabus.status)
+        query = self.session.query(Department.faculty_id, status.label('status'), func.count(Syllabus.id).label('count'))
+        return self._with_faculty(query.select_from(Syllabus)).group_by(Department.faculty_id, status).all()
+
+    def backlog_as_of(self, end: datetime) -> List:
+        """
+        Syllabus count per (faculty_id, status) at a past instant, rebuilt from the
+        last workflow log before it (ROW_NUMBER per syllabus); syllabuses without a
+        log yet are counted as DRAFT. Used for backfill.
+        """
+        rn = func.row_number().over(
+            partition_by=WorkflowLog.syllabus_id,
+            order_by=(WorkflowLog.created_at.desc(), WorkflowLog.id.desc())
+        ).label('rn')
+        ranked = (self.session.query(WorkflowLog.syllabus_id, WorkflowLog.to_status, rn)
+                  .filter(WorkflowLog.created_at < end)
+                  .subquery())
+        status = func.upper(func.coalesce(ranked.c.to_status, 'DRAFT'))
+        query = (self.session.query(Department.faculty_id, status.label('status'), func.count(Syllabus.id).label('count'))
+                 .select_from(Syllabus)
+                 .outerjoin(ranked, (ranked.c.syllabus_id == Syllabus.id) & (ranked.c.rn == 1))
+                 .filter(Syllabus.created_at < end))
+        return self._with_faculty(query).group_by(Department.faculty_id, status).all()
+
+    def transitions_between(self, start: datetime, end: datetime) -> List:
+        """Workflow logs of one period: rows (faculty_id, status, created_at, submitted_at)"""
+        query = (self.session.query(Department.faculty_id,
+                                    func.upper(WorkflowLog.to_status).label('status'),
+                                    WorkflowLog.created_at,
+                                    SyllabusReviewTiming.submitted_at)
+                 .select_from(WorkflowLog)
+                 .join(Syllabus, Syllabus.id == WorkflowLog.syllabus_id)
+                 .outerjoin(SyllabusReviewTiming, SyllabusReviewTiming.syllabus_id == WorkflowLog.syllabus_id)
+                 .filter(WorkflowLog.created_at >= start, WorkflowLog.created_at < end))
+        return self._with_faculty(query).all()
+
+    # ------------------------------------------------------------------ #
+    # Snapshot rows
+    # ------------------------------------------------------------------ #
+    def replace_day(self, day: date, rows: List[dict]):
+        """Idempotent: re-running the job for a day overwrites its rows"""
+        try:
+            self.session.query(KpiDailySnapshot).filter(KpiDailySnapshot.day == day).delete(synchronize_session=False)
+            self.session.bulk_insert_mappings(KpiDailySnapshot, rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def get_range(self, start: date, end: date, faculty_id: Optional[int] = None,
+                  statuses: Optional[List[str]] = None) -> List[KpiDailySnapshot]:
+        query = (self.session.query(KpiDailySnapshot)
+                 .filter(KpiDailySnapshot.day >= start, KpiDailySnapshot.day <= end))
+        if faculty_id:
+            query = query.filter(KpiDailySnapshot.faculty_id == faculty_id)
+        if statuses:
+            query = query.filter(KpiDailySnapshot.status.in_(list(statuses)))
+        return query.order_by(KpiDailySnapshot.day, KpiDailySnapshot.faculty_id, KpiDailySnapshot.status).all()
+
+    def get_latest_day(self) -> Optional[date]:
+        return self.session.query(func.max(KpiDailySnapshot.day)).scalar()
+
+    def get_faculty_names(self) -> Dict[int, str]:
+        from infrastructure.models.faculty_model import Faculty
+        return {row.id: row.name for row in self.session.query(Faculty.id, Faculty.name)}
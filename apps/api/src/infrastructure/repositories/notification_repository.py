@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from infrastructure.databases.mssql import session
@@ -20,6 +21,16 @@ class NotificationRepository:
         self.session.refresh(item)
         return item
 
+    def create_many(self, rows: List[dict]) -> List[dict]:
+        """One commit for a whole fan-out; returns id/user_id/created_at read before the commit expires them"""
+        now = datetime.now()
+        items = [Notification(created_at=now, **data) for data in rows]
+        self.session.add_all(items)
+        self.session.flush()
+        created = [{'id': item.id, 'user_id': item.user_id, 'created_at': now} for item in items]
+        self.session.commit()
+        return created
+
     def mark_as_read(self, id: int) -> bool:
         item = self.session.query(Notification).filter_by(id=id).first()
         if not item:
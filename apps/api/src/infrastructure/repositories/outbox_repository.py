@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from infrastructure.databases.mssql import session
+from infrastructure.models.outbox_event_model import OutboxEvent
+
+class OutboxRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    def add(self, event_type: str, aggregate_type: str, aggregate_id: int, payload: dict) -> OutboxEvent:
+        """Stage an event in the caller's transaction (no commit)"""
+        event = OutboxEvent(
+            event_type=event_type,
+            aggregate_type=aggregate_type,
+            aggregate_id=aggregate_id,
+            payload=json.dumps(payload, ensure_ascii=False, default=str),
+            status='PENDING',
+            attempts=0,
+            available_at=datetime.now()
+        )
+        self.session.add(event)
+        self.session.flush()
+        return event
+
+    def get_by_id(self, id: int) -> Optional[OutboxEvent]:
+        return self.session.query(OutboxEvent).filter_by(id=id).first()
+
+    def get_due_ids(self, limit: int = 100) -> List[int]:
+        """Pending events and PROCESSING ones whose lease expired (crashed worker)"""
+        rows = (self.session.query(OutboxEvent.id)
+                .filter(OutboxEvent.status.in_(['PENDING', 'PROCESSING']))
+                .filter(OutboxEvent.available_at <= datetime.now())
+                .order_by(OutboxEvent.id)
+                .limit(limit)
+                .all())
+        return [row.id for row in rows]
+
+    def claim(self, id: int, lease_seconds: int) -> Optional[OutboxEvent]:
+        """Conditional update so that only one worker gets the event"""
+        now = datetime.now()
+        claimed = (self.session.query(OutboxEvent)
+                   .filter(OutboxEvent.id == id,
+                           OutboxEvent.status.in_(['PENDING', 'PROCESSING']),
+                           OutboxEvent.available_at <= now)
+                   .update({OutboxEvent.status: 'PROCESSING',
+                            OutboxEvent.attempts: OutboxEvent.attempts + 1,
+                            OutboxEvent.available_at: now + timedelta(seconds=lease_seconds)},
+                           synchronize_session=False))
+        self.session.commit()
+        return self.get_by_id(id) if claimed else None
+
+    def save_progress(self, id: int, handled: List[str]):
+        (self.session.query(OutboxEvent).filter_by(id=id)
+         .update({OutboxEvent.handled: json.dumps(handled)}, synchronize_session=False))
+        self.session.commit()
+
+    def mark_dispatched(self, id: int):
+        (self.session.query(OutboxEvent).filter_by(id=id)
+         .update({OutboxEvent.status: 'DISPATCHED', OutboxEvent.dispatched_at: datetime.now(),
+                  OutboxEvent.last_error: None}, synchronize_session=False))
+        self.session.commit()
+
+    def mark_failed(self, id: int, error: str, retry_at: Optional[datetime]):
+        """retry_at None = give up (dead letter)"""
+        (self.session.query(OutboxEvent).filter_by(id=id)
+         .update({OutboxEvent.status: 'PENDING' if retry_at else 'FAILED',
+                  OutboxEvent.available_at: retry_at or datetime.now(),
+                  OutboxEvent.last_error: (error or '')[:4000]}, synchronize_session=False))
+        self.session.commit()
+
+    def list(self, status: str = None, limit: int = 50) -> List[OutboxEvent]:
+        query = self.session.query(OutboxEvent)
+        if status:
+            query = query.filter(OutboxEvent.status == status.upper())
+        return query.order_by(OutboxEvent.id.desc()).limit(limit).all()
+
+    def requeue(self, id: int) -> bool:
+        updated = (self.session.query(OutboxEvent).filter_by(id=id)
+                   .update({OutboxEvent.status: 'PENDING', OutboxEvent.attempts: 0,
+                            OutboxEvent.available_at: datetime.now()}, synchronize_session=False))
+        self.session.commit()
+        return bool(updated)
+
+    def purge_dispatched(self, older_than: datetime) -> int:
+        count = (self.session.query(OutboxEvent)
+                 .filter(OutboxEvent.status == 'DISPATCHED', OutboxEvent.dispatched_at < older_than)
+                 .delete(synchronize_session=False))
+        self.session.commit()
+        return count
@@ -1,7 +1,8 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, aliased
 from infrastructure.databases.mssql import session
 from infrastructure.models.subject_relationship_model import SubjectRelationship
+from infrastructure.models.subject_model import Subject
 
 class SubjectRelationshipRepository:
     def __init__(self, session: Session = session):
@@ -21,6 +22,24 @@ class SubjectRelationshipRepository:
                 .options(joinedload(SubjectRelationship.subject))
                 .filter_by(related_subject_id=subject_id).all())
 
+    def get_edge_list(self):
+        """Whole relationship graph with subject labels in a single query"""
+        subject = aliased(Subject)
+        related = aliased(Subject)
+        return (self.session.query(
+                    SubjectRelationship.id,
+                    SubjectRelationship.subject_id,
+                    SubjectRelationship.related_subject_id,
+                    SubjectRelationship.type,
+                    subject.code.label('subject_code'),
+                    subject.name_vi.label('subject_name'),
+                    related.code.label('related_code'),
+                    related.name_vi.label('related_name'))
+                .join(subject, subject.id == SubjectRelationship.subject_id)
+                .join(related, related.id == SubjectRelationship.related_subject_id)
+                .order_by(SubjectRelationship.id)
+                .all())
+
     def create(self, data: dict) -> SubjectRelationship:
         item = SubjectRelationship(**data)
         self.session.add(item)
@@ -1,4 +1,6 @@
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from infrastructure.databases.mssql import session
 from infrastructure.models.syllabus_current_workflow import SyllabusCurrentWorkflow
@@ -10,7 +12,12 @@ class SyllabusCurrentWorkflowRepository:
     def get_by_syllabus_id(self, syllabus_id: int) -> Optional[SyllabusCurrentWorkflow]:
         return self.session.query(SyllabusCurrentWorkflow).filter_by(syllabus_id=syllabus_id).first()
 
-    def update_or_create(self, syllabus_id: int, data: dict) -> SyllabusCurrentWorkflow:
+    def update_or_create(self, syllabus_id: int, data: dict, commit: bool = True) -> SyllabusCurrentWorkflow:
+        """Setting due_date issues a new deadline_token; schedule the timer after commit"""
+        if 'due_date' in data:
+            data = dict(data,
+                        deadline_token=uuid.uuid4().hex if data['due_date'] else None,
+                        reminded_at=None)
         cw = self.get_by_syllabus_id(syllabus_id)
         if cw:
             for key, value in data.items():
@@ -20,20 +27,58 @@ class SyllabusCurrentWorkflowRepository:
             cw = SyllabusCurrentWorkflow(syllabus_id=syllabus_id, **data)
             self.session.add(cw)
         
-        self.session.commit()
-        self.session.refresh(cw)
+        if commit:
+            self.session.commit()
+            self.session.refresh(cw)
+        else:
+            self.session.flush()
         return cw
 
-    def delete(self, syllabus_id: int) -> bool:
+    def delete(self, syllabus_id: int, commit: bool = True) -> bool:
         cw = self.get_by_syllabus_id(syllabus_id)
         if not cw:
             return False
         self.session.delete(cw)
-        self.session.commit()
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
         return True
 
-    def get_overdue(self):
-        from datetime import datetime
-        return self.session.query(SyllabusCurrentWorkflow).filter(
-            SyllabusCurrentWorkflow.due_date < datetime.now()
-        ).all()
+    def get_overdue(self, limit: int = 500) -> List[SyllabusCurrentWorkflow]:
+        """Overdue rows not reminded yet (index seek on reminded_at, due_date)"""
+        return (self.session.query(SyllabusCurrentWorkflow)
+                .filter(SyllabusCurrentWorkflow.reminded_at.is_(None),
+                        SyllabusCurrentWorkflow.due_date < datetime.now())
+                .order_by(SyllabusCurrentWorkflow.due_date)
+                .limit(limit)
+                .all())
+
+    def claim_reminder(self, syllabus_id: int, token: Optional[str]) -> Optional[SyllabusCurrentWorkflow]:
+        """
+        Mark the deadline as reminded if the timer is still current (same token,
+        not reminded, due). Conditional update: a duplicate or stale timer gets None.
+        """
+        now = datetime.now()
+        token_filter = (SyllabusCurrentWorkflow.deadline_token.is_(None) if token is None
+                        else SyllabusCurrentWorkflow.deadline_token == token)
+        claimed = (self.session.query(SyllabusCurrentWorkflow)
+                   .filter(SyllabusCurrentWorkflow.syllabus_id == syllabus_id,
+                           token_filter,
+                           SyllabusCurrentWorkflow.reminded_at.is_(None),
+                           SyllabusCurrentWorkflow.due_date <= now)
+                   .update({SyllabusCurrentWorkflow.reminded_at: now}, synchronize_session=False))
+        self.session.commit()
+        return self.get_by_syllabus_id(syllabus_id) if claimed else None
+
+    def release_reminder(self, syllabus_id: int, token: Optional[str]) -> bool:
+        """Undo claim_reminder (notification not sent); a rescheduled row has a new token and is left alone"""
+        token_filter = (SyllabusCurrentWorkflow.deadline_token.is_(None) if token is None
+                        else SyllabusCurrentWorkflow.deadline_token == token)
+        released = (self.session.query(SyllabusCurrentWorkflow)
+                    .filter(SyllabusCurrentWorkflow.syllabus_id == syllabus_id,
+                            token_filter,
+                            SyllabusCurrentWorkflow.reminded_at.isnot(None))
+                    .update({SyllabusCurrentWorkflow.reminded_at: None}, synchronize_session=False))
+        self.session.commit()
+        return bool(released)
@@ -8,6 +8,28 @@ from infrastructure.models.assessment_scheme_model import AssessmentScheme
 from infrastructure.models.assessment_component_model import AssessmentComponent
 from infrastructure.models.assessment_clo_model import AssessmentClo
 
+
+def latest_syllabus_per_subject(session: Session, *criteria, statuses: List[str] = None):
+    """
+    Subquery (id, subject_id, status, version) holding the most recent syllabus
+    of each subject among those matching `criteria` and `statuses`:
+    ROW_NUMBER() partitioned by subject, newest first. Shared by every
+    "latest syllabus per subject" read so they all pick the same syllabus.
+    """
+    rn = func.row_number().over(
+        partition_by=Syllabus.subject_id,
+        order_by=(Syllabus.created_at.desc(), Syllabus.id.desc())
+    ).label('rn')
+    query = (session.query(Syllabus.id, Syllabus.subject_id, Syllabus.status, Syllabus.version, rn)
+             .filter(*criteria))
+    if statuses:
+        query = query.filter(Syllabus.status.in_(list(statuses)))
+    ranked = query.subquery()
+    return (session.query(ranked.c.id, ranked.c.subject_id, ranked.c.status, ranked.c.version)
+            .filter(ranked.c.rn == 1)
+            .subquery())
+
+
 class SyllabusRepository:
     def __init__(self, session: Session = session):
         self.session = session
@@ -120,6 +142,32 @@ class SyllabusRepository:
                 .order_by(Syllabus.created_at.desc())
                 .first())
 
+    def get_latest_ids_by_program(self, program_id: int, statuses: List[str] = None) -> List[int]:
+        """Id of the most recent syllabus of each subject in a program"""
+        latest = latest_syllabus_per_subject(self.session, Syllabus.program_id == program_id, statuses=statuses)
+        return [row.id for row in self.session.query(latest.c.id).order_by(latest.c.id)]
+
+    def get_program_subjects(self, program_id: int):
+        """Distinct subjects having a syllabus in the program: rows (id, code, name_vi, credits)"""
+        from infrastructure.models.subject_model import Subject
+        return (self.session.query(Subject.id, Subject.code, Subject.name_vi, Subject.credits)
+                .join(Syllabus, Syllabus.subject_id == Subject.id)
+                .filter(Syllabus.program_id == program_id)
+                .distinct()
+                .all())
+
+    def get_latest_by_subjects(self, subject_ids: List[int], statuses: List[str] = None) -> dict:
+        """
+        Most recent syllabus per subject (optionally restricted to statuses) in one
+        set-based query: ROW_NUMBER() partitioned by subject, newest first.
+        Returns {subject_id: row(id, subject_id, status, version)}.
+        """
+        if not subject_ids:
+            return {}
+        latest = latest_syllabus_per_subject(self.session, Syllabus.subject_id.in_(list(subject_ids)),
+                                             statuses=statuses)
+        return {row.subject_id: row for row in self.session.query(latest).all()}
+
     def get_details(self, id: int, for_update: bool = False) -> Optional[Syllabus]:
         # Eagerly load related metadata AND collections
         query = (
@@ -163,10 +211,13 @@ class SyllabusRepository:
         self.session.refresh(s)
         return s
 
-    def delete(self, id: int) -> bool:
+    def delete(self, id: int, commit: bool = True) -> bool:
         s = self.get_by_id(id)
         if not s:
             return False
         self.session.delete(s)
-        self.session.commit()
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
         return True
\ No newline at end of file
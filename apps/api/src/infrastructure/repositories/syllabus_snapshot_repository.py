@@ -1,5 +1,6 @@
 from infrastructure.models.syllabus_snapshot_model import SyllabusSnapshot
-from sqlalchemy.orm import Session
+from infrastructure.models.user_model import User
+from sqlalchemy.orm import Session, defer
 
 class SyllabusSnapshotRepository:
     def __init__(self, session: Session):
@@ -12,7 +13,33 @@ class SyllabusSnapshotRepository:
         return snapshot
 
     def get_by_syllabus(self, syllabus_id: int):
-        return self.session.query(SyllabusSnapshot).filter_by(syllabus_id=syllabus_id).order_by(SyllabusSnapshot.created_at.desc()).all()
+        # snapshot_data is deferred: callers iterating versions rarely need the payload
+        return (self.session.query(SyllabusSnapshot)
+                .options(defer(SyllabusSnapshot.snapshot_data))
+                .filter_by(syllabus_id=syllabus_id)
+                .order_by(SyllabusSnapshot.created_at.desc())
+                .all())
+
+    def get_history(self, syllabus_id: int):
+        """Version list only (id/version/created_at/created_by) - never touches snapshot_data"""
+        return (self.session.query(
+                    SyllabusSnapshot.id,
+                    SyllabusSnapshot.version,
+                    SyllabusSnapshot.created_at,
+                    SyllabusSnapshot.created_by,
+                    User.full_name.label('creator_name')
+                )
+                .outerjoin(User, User.id == SyllabusSnapshot.created_by)
+                .filter(SyllabusSnapshot.syllabus_id == syllabus_id)
+                .order_by(SyllabusSnapshot.created_at.desc())
+                .all())
+
+    def get_payload(self, id: int):
+        """Fetch only the JSON payload of one snapshot"""
+        row = (self.session.query(SyllabusSnapshot.snapshot_data)
+               .filter(SyllabusSnapshot.id == id)
+               .first())
+        return row.snapshot_data if row else None
 
     def get_by_id(self, id: int):
         return self.session.query(SyllabusSnapshot).get(id)
@@ -29,6 +29,21 @@ class UserRepository:
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self.session.query(User).filter_by(id=user_id).first()
 
+    def get_by_ids(self, user_ids: List[int]) -> List[User]:
+        if not user_ids:
+            return []
+        return self.session.query(User).filter(User.id.in_(list(user_ids))).all()
+
+    def get_role_names(self, user_id: int) -> List[str]:
+        """Role names of a user in one query (no User/UserRole objects loaded)"""
+        from infrastructure.models.user_role_model import UserRole
+        from infrastructure.models.role_model import Role
+        rows = (self.session.query(Role.name)
+                .join(UserRole, UserRole.role_id == Role.id)
+                .filter(UserRole.user_id == user_id)
+                .all())
+        return [row.name for row in rows]
+
     def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
         if not email or not isinstance(email, str):
@@ -5,9 +5,12 @@ class WorkflowLogRepository:
     def __init__(self, session):
         self.session = session
 
-    def create(self, data: dict):
+    def create(self, data: dict, commit: bool = True):
         wl = WorkflowLog(**data)
         self.session.add(wl)
+        if not commit:
+            self.session.flush()
+            return wl
         try:
             self.session.commit()
             self.session.refresh(wl)
@@ -0,0 +1,64 @@
+from typing import Iterable, List
+from sqlalchemy.orm import Session, aliased
+from infrastructure.databases.mssql import session
+from infrastructure.models.workflow_state_model import WorkflowState
+from infrastructure.models.workflow_transition_model import WorkflowTransition
+from infrastructure.models.role_model import Role
+
+class WorkflowRepository:
+    def __init__(self, session: Session = session):
+        self.session = session
+
+    def get_states(self) -> List[WorkflowState]:
+        return self.session.query(WorkflowState).all()
+
+    def get_transition_rows(self) -> List:
+        """All transitions in one query: rows (from_code, to_code, action, role)"""
+        source = aliased(WorkflowState)
+        target = aliased(WorkflowState)
+        return (self.session.query(source.code.label('from_code'),
+                                   target.code.label('to_code'),
+                                   WorkflowTransition.action_name.label('action'),
+                                   Role.name.label('role'))
+                .select_from(WorkflowTransition)
+                .join(source, source.id == WorkflowTransition.from_state_id)
+                .join(target, target.id == WorkflowTransition.to_state_id)
+                .join(Role, Role.id == WorkflowTransition.allowed_role_id)
+                .all())
+
+    def has_transitions(self) -> bool:
+        return self.session.query(WorkflowTransition.id).first() is not None
+
+    def seed(self, states: Iterable[dict], transitions: Iterable[tuple]) -> int:
+        """
+        Insert missing states and (from, action, to, role) transitions.
+        Transitions whose role does not exist are skipped. Returns the number
+        of transitions created.
+        """
+        try:
+            by_code = {s.code: s for s in self.get_states()}
+            for data in states:
+                if data['code'] not in by_code:
+                    state = WorkflowState(**data)
+                    self.session.add(state)
+                    by_code[data['code']] = state
+            self.session.flush()
+
+            roles = {r.name: r.id for r in self.session.query(Role.id, Role.name)}
+            existing = {(r.from_code, r.action, r.to_code, r.role) for r in self.get_transition_rows()}
+            created = 0
+            for from_code, action, to_code, role in transitions:
+                if role not in roles or (from_code, action, to_code, role) in existing:
+                    continue
+                self.session.add(WorkflowTransition(
+                    from_state_id=by_code[from_code].id,
+                    to_state_id=by_code[to_code].id,
+                    allowed_role_id=roles[role],
+                    action_name=action
+                ))
+                created += 1
+            self.session.commit()
+            return created
+        except Exception:
+            self.session.rollback()
+            raise
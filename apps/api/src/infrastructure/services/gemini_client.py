@@ -0,0 +1,292 @@
+import itertools
+import os
+import random
+import threading
+import time
+from utils import metrics
+from utils import request_context
+from utils.logging_config import get_logger
+
+# Prefer the new `google-genai` package
+try:
+    from google import genai
+    _NEW_GENAI = True
+except ImportError:
+    try:
+        import google.generativeai as genai
+        _NEW_GENAI = False
+    except ImportError:
+        genai = None
+        _NEW_GENAI = False
+
+logger = get_logger(__name__)
+
+
+def _config_accepts_http_options() -> bool:
+    """Per-call HTTP options (extra headers) exist in recent google-genai only"""
+    try:
+        return 'http_options' in genai.types.GenerateContentConfig.model_fields
+    except Exception:
+        return False
+
+
+_PER_CALL_HEADERS = _NEW_GENAI and _config_accepts_http_options()
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiBusyError(RuntimeError):
+    """Raised when no concurrency slot frees up before the queue timeout"""
+
+
+class GeminiTimeoutError(TimeoutError):
+    """Raised when the overall deadline of a call is exhausted"""
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client.
+
+    One SDK client is kept per process so the underlying HTTP connection pool
+    is reused, concurrent calls are bounded by a semaphore, and every call gets
+    an overall deadline with exponential backoff on 429/5xx. Time spent waiting
+    for a slot (queue) and time spent in the model are tracked separately.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: int = 4, timeout: float = 60.0,
+                 max_retries: int = 3, queue_timeout: float = 30.0,
+                 backoff_base: float = 1.0, backoff_max: float = 20.0):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0,
+            'queue_ms_total': 0.0, 'queue_ms_max': 0.0,
+            'model_ms_total': 0.0, 'model_ms_max': 0.0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # SDK access
+    # ------------------------------------------------------------------ #
+    def _sdk(self):
+        """Lazily build the SDK client once; the legacy package is configured globally"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    if genai is None:
+                        raise RuntimeError('No generative AI client installed (install google-genai)')
+                    if _NEW_GENAI:
+                        # google-genai expects the HTTP timeout in milliseconds
+                        self._client = genai.Client(
+                            api_key=self.api_key,
+                            http_options={'timeout': int(self.timeout * 1000)}
+                        )
+                    else:
+                        genai.configure(api_key=self.api_key)
+                        self._client = genai
+        return self._client
+
+    def _invoke(self, model: str, contents, config: dict, timeout: float, stream: bool = False):
+        client = self._sdk()
+        if _NEW_GENAI:
+            method = client.models.generate_content_stream if stream else client.models.generate_content
+            if _PER_CALL_HEADERS and (config is None or isinstance(config, dict)):
+                # Per-attempt timeout (bounded by the overall deadline) and the request id headers
+                http_options = {'timeout': int(timeout * 1000)}
+                headers = request_context.outgoing_headers()
+                if headers:
+                    http_options['headers'] = headers
+                config = dict(config or {}, http_options=http_options)
+            response = method(model=model, contents=contents, config=config or None)
+            return _open_stream(response) if stream else response
+        model_obj = client.GenerativeModel(model)
+        response = model_obj.generate_content(
+            contents,
+            generation_config=config or None,
+            request_options={'timeout': timeout},
+            stream=stream
+        )
+        return _open_stream(response) if stream else response
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def generate_content(self, model: str, contents, config: dict = None, deadline: float = None):
+        """Call the model with bounded concurrency, retries and an overall deadline (seconds)"""
+        return self._call(model, contents, config, deadline, stream=False)
+
+    def generate_content_stream(self, model: str, contents, config: dict = None, deadline: float = None):
+        """Open a streaming call; retries cover the request up to the first chunk.
+        The concurrency slot is held until the returned iterator is exhausted or closed."""
+        return self._call(model, contents, config, deadline, stream=True)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            data = dict(self._stats)
+            in_flight = self._in_flight
+        calls = data['calls'] or 1
+        data['queue_ms_avg'] = round(data['queue_ms_total'] / calls, 2)
+        data['model_ms_avg'] = round(data['model_ms_total'] / calls, 2)
+        data['in_flight'] = in_flight
+        data['max_concurrency'] = self.max_concurrency
+        return data
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+    def _call(self, model, contents, config, deadline, stream):
+        deadline = deadline or self.timeout * (self.max_retries + 1)
+        started = time.monotonic()
+        expires_at = started + deadline
+
+        if not self._slots.acquire(timeout=min(self.queue_timeout, deadline)):
+            self._bump(rejected=1)
+            raise GeminiBusyError('AI đang quá tải, vui lòng thử lại sau')
+        queue_ms = (time.monotonic() - started) * 1000
+        self._bump(in_flight=1)
+
+        released = False
+        try:
+            attempt = 0
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise GeminiTimeoutError(f'AI call exceeded deadline of {deadline}s')
+                call_started = time.monotonic()
+                try:
+                    response = self._invoke(model, contents, config, min(self.timeout, remaining), stream)
+                except Exception as e:
+                    if attempt >= self.max_retries or not self._retryable(e):
+                        self._record(queue_ms, (time.monotonic() - call_started) * 1000, error=True)
+                        raise
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                    if time.monotonic() + delay >= expires_at:
+                        self._record(queue_ms, (time.monotonic() - call_started) * 1000, error=True)
+                        raise
+                    attempt += 1
+                    self._bump(retries=1)
+                    logger.warning('Gemini call failed (%s), retry %d/%d in %.2fs',
+                                   e, attempt, self.max_retries, delay)
+                    time.sleep(delay)
+                    continue
+
+                if stream:
+                    released = True
+                    return self._release_after(response, queue_ms, call_started)
+                model_ms = (time.monotonic() - call_started) * 1000
+                self._record(queue_ms, model_ms)
+                logger.info('Gemini call model=%s queue_ms=%.1f model_ms=%.1f retries=%d',
+                            model, queue_ms, model_ms, attempt)
+                return response
+        finally:
+            if not released:
+                self._bump(in_flight=-1)
+                self._slots.release()
+
+    def _release_after(self, chunks, queue_ms, call_started):
+        """Wrap a stream so the slot is freed and model time recorded when it ends"""
+        error = False
+        try:
+            for chunk in chunks:
+                yield chunk
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(queue_ms, (time.monotonic() - call_started) * 1000, error=error)
+            self._bump(in_flight=-1)
+            self._slots.release()
+
+    @staticmethod
+    def _retryable(exc: Exception) -> bool:
+        for attr in ('code', 'status_code'):
+            code = getattr(exc, attr, None)
+            if callable(code):
+                try:
+                    code = code()
+                except Exception:
+                    code = None
+            code = getattr(code, 'value', code)
+            if isinstance(code, int) and code in RETRYABLE_STATUS:
+                return True
+        if isinstance(exc, (TimeoutError, ConnectionError)):
+            return True
+        name = type(exc).__name__
+        return name in ('ResourceExhausted', 'ServiceUnavailable', 'InternalServerError',
+                        'DeadlineExceeded', 'ServerError', 'ReadTimeout', 'ConnectTimeout',
+                        'TimeoutException', 'ConnectError')
+
+    def _bump(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                if key == 'in_flight':
+                    self._in_flight += delta
+                else:
+                    self._stats[key] += delta
+
+    def _record(self, queue_ms: float, model_ms: float, error: bool = False):
+        metrics.observe_external('gemini', 'generate_content', model_ms / 1000, error)
+        with self._stats_lock:
+            s = self._stats
+            s['calls'] += 1
+            s['errors'] += 1 if error else 0
+            s['queue_ms_total'] += queue_ms
+            s['model_ms_total'] += model_ms
+            s['queue_ms_max'] = max(s['queue_ms_max'], queue_ms)
+            s['model_ms_max'] = max(s['model_ms_max'], model_ms)
+
+
+def _open_stream(chunks):
+    """
+    SDK streams are lazy: the request is only sent on the first iteration, so
+    fetch the first chunk here (inside the retry loop) and chain the rest.
+    """
+    chunks = iter(chunks)
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return iter(())
+    return itertools.chain((first,), chunks)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    return genai is not None
+
+
+def get_gemini_client(api_key: str) -> GeminiClient:
+    """Return the process-wide client for an API key, creating it on first use"""
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = GeminiClient(
+                    api_key,
+                    max_concurrency=int(os.getenv('AI_MAX_CONCURRENCY', 4)),
+                    timeout=float(os.getenv('AI_TIMEOUT_SECONDS', 60)),
+                    max_retries=int(os.getenv('AI_MAX_RETRIES', 3)),
+                    queue_timeout=float(os.getenv('AI_QUEUE_TIMEOUT_SECONDS', 30)),
+                )
+                _clients[api_key] = client
+    return client
+
+
+def all_stats() -> dict:
+    """Metrics of every client in this process (keys are masked)"""
+    with _clients_lock:
+        clients = list(_clients.items())
+    return {f'...{key[-4:]}' if key else 'default': c.stats() for key, c in clients}
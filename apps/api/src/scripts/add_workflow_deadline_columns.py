@@ -0,0 +1,63 @@
+"""
+Migration script: Add deadline timer columns to syllabus_current_workflows
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, create_engine
+from sqlalchemy.orm import sessionmaker
+from config import Config
+
+def add_columns():
+    engine = create_engine(Config.DATABASE_URI, echo=False)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    
+    try:
+        print("🔄 Adding deadline timer columns to syllabus_current_workflows...")
+        
+        result = session.execute(text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'syllabus_current_workflows'
+        """))
+        existing_columns = [row[0] for row in result]
+        
+        columns_to_add = [
+            ("deadline_token", "VARCHAR(32)"),
+            ("reminded_at", "DATETIME")
+        ]
+        
+        for col_name, col_type in columns_to_add:
+            if col_name not in existing_columns:
+                print(f"➕ Adding column: {col_name}")
+                session.execute(text(f"ALTER TABLE syllabus_current_workflows ADD {col_name} {col_type}"))
+            else:
+                print(f"✅ Column {col_name} already exists")
+        
+        if "reminded_at" not in existing_columns:
+            # Rows overdue before the upgrade were already notified by the daily scan
+            session.execute(text(
+                "UPDATE syllabus_current_workflows SET reminded_at = due_date "
+                "WHERE reminded_at IS NULL AND due_date < CURRENT_TIMESTAMP"
+            ))
+            session.execute(text(
+                "CREATE INDEX ix_current_workflows_reminder_due "
+                "ON syllabus_current_workflows (reminded_at, due_date)"
+            ))
+        
+        session.commit()
+        print("🎉 Migration completed successfully!")
+        
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error during migration: {e}")
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    add_columns()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils.caching import cache
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class AiResultCacheService:
+    """
+    Two-tier cache for AI results keyed by model name + prompt fingerprint.
+    Tier 1 is Flask-Caching (Redis in production), tier 2 the ai_result_cache table
+    so results survive restarts and are shared between API workers and Celery.
+    A TTL of 0 means the entry never expires (used for immutable inputs such as snapshots).
+    """
+    KEY_PREFIX = 'ai_result'
+
+    def __init__(self, repository=None, ttls: Dict[str, int] = None, enabled: bool = None):
+        self.repository = repository
+        self.ttls = ttls if ttls is not None else Config.AI_CACHE_TTLS
+        self.enabled = Config.AI_CACHE_ENABLED if enabled is None else enabled
+
+    @staticmethod
+    def make_key(model_name: str, operation: str, prompt: str) -> str:
+        fingerprint = f"{model_name}\n{operation}\n{prompt}".encode('utf-8')
+        return hashlib.sha256(fingerprint).hexdigest()
+
+    def ttl_for(self, operation: str, immutable: bool = False) -> int:
+        if immutable:
+            return 0
+        return int(self.ttls.get(operation, self.ttls.get('DEFAULT', 86400)))
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        try:
+            hit = cache.get(f"{self.KEY_PREFIX}:{key}")
+            if hit is not None:
+                return hit
+        except Exception as e:
+            logger.debug(f"AI cache tier-1 lookup skipped: {e}")
+
+        if not self.repository:
+            return None
+        try:
+            row = self.repository.get_valid(key)
+        except Exception as e:
+            logger.warning(f"AI cache lookup failed: {e}")
+            return None
+        if not row:
+            return None
+
+        result = json.loads(row.result)
+        # Backfill tier 1 for the remaining lifetime of the row
+        remaining = 0
+        if row.expires_at:
+            remaining = max(int((row.expires_at - datetime.now()).total_seconds()), 1)
+        self._set_hot(key, result, remaining)
+        return result
+
+    def set(self, key: str, operation: str, model_name: str, result: Any, immutable: bool = False):
+        if not self.enabled:
+            return
+        ttl = self.ttl_for(operation, immutable)
+        self._set_hot(key, result, ttl)
+
+        if not self.repository:
+            return
+        expires_at = datetime.now() + timedelta(seconds=ttl) if ttl else None
+        try:
+            self.repository.upsert(key, operation, model_name,
+                                   json.dumps(result, ensure_ascii=False), expires_at)
+        except Exception as e:
+            logger.warning(f"AI cache store failed: {e}")
+
+    def purge_expired(self) -> int:
+        if not self.repository:
+            return 0
+        return self.repository.delete_expired()
+
+    def _set_hot(self, key: str, result: Any, ttl: int):
+        try:
+            cache.set(f"{self.KEY_PREFIX}:{key}", result, timeout=ttl)
+        except Exception as e:
+            logger.debug(f"AI cache tier-1 store skipped: {e}")
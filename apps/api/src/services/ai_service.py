@@ -2,42 +2,127 @@ import os
 import json
 import re
 from datetime import datetime
+from services.syllabus_diff_service import SyllabusDiffService
+from services.syllabus_precheck_service import SyllabusPrecheckService
+from infrastructure.services.gemini_client import get_gemini_client, is_available
 
 # SEC-004: Prompt Injection Mitigation
+# Common injection attempts, compiled once into a single alternation so each
+# sanitize call is one regex pass instead of one per pattern
+_INJECTION_PATTERN = re.compile(
+    "|".join([
+        r"ignore\s+previous\s+(?:instructions|prompts)",
+        r"forget\s+all\s+previous",
+        r"system\s*:",
+        r"###\s*instruction",
+        r"\[INST\]",
+        r"[\w\s]*you\s+are\s+now\s+a"
+    ]),
+    re.IGNORECASE
+)
+
 def sanitize_prompt_input(text):
     """Basic sanitizer for AI prompts"""
     if not isinstance(text, str):
         return text
-    # Pattern to detect common injection attempts
-    patterns = [
-        r"(?i)ignore\s+previous\s+(instructions|prompts)",
-        r"(?i)forget\s+all\s+previous",
-        r"(?i)system\s*:",
-        r"(?i)###\s*instruction",
-        r"(?i)\[INST\]",
-        r"(?i)[\w\s]*you\s+are\s+now\s+a"
-    ]
-    for pattern in patterns:
-        text = re.sub(pattern, "[INJECTION_ATTEMPT_FILTERED]", text)
-    return text
-
-# Prefer the new `google-genai` package
-try:
-    from google import genai
-    _NEW_GENAI = True
-except ImportError:
-    try:
-        import google.generativeai as genai
-        _NEW_GENAI = False
-    except ImportError:
-        genai = None
-        _NEW_GENAI = False
+    return _INJECTION_PATTERN.sub("[INJECTION_ATTEMPT_FILTERED]", text)
+
+
+
+class _JsonSectionStream:
+    """
+    Incremental parser for a streamed top-level JSON object.
+    feed() returns the (key, value) members completed by the new text, so each
+    section of the generated syllabus can be forwarded as soon as it closes.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.depth = 0
+        self.started = False
+        self.finished = False
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+
+    def feed(self, text: str):
+        self.buffer += text
+        members = []
+        while self.pos < len(self.buffer) and not self.finished:
+            ch = self.buffer[self.pos]
+            if not self.started:
+                # skip markdown fences or any preamble before the object
+                if ch == '{':
+                    self.started = True
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self._emit(self.buffer[self.member_start:self.pos], members)
+                    self.finished = True
+            elif ch == ',' and self.depth == 1:
+                self._emit(self.buffer[self.member_start:self.pos], members)
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return members
+
+    @staticmethod
+    def _emit(fragment: str, members: list):
+        fragment = fragment.strip()
+        if not fragment:
+            return
+        try:
+            members.extend(json.loads('{' + fragment + '}').items())
+        except ValueError:
+            pass
 
 
 class AiService:
-    def __init__(self, api_key: str = None, audit_repository=None):
+    # Upper bounds for the change set embedded in the comparison prompt
+    COMPARE_MAX_CHANGES = 150
+    COMPARE_MAX_VALUE_CHARS = 300
+
+    def __init__(self, api_key: str = None, audit_repository=None, diff_service=None, cache_service=None,
+                 precheck_service=None):
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
         self.audit_repository = audit_repository
+        self.diff_service = diff_service or SyllabusDiffService()
+        self.cache_service = cache_service
+        self.precheck_service = precheck_service or SyllabusPrecheckService()
+
+    def _model_name(self):
+        model_name = os.getenv('AI_MODEL', 'gemini-3-flash-preview')
+        if model_name.startswith('models/'):
+            model_name = model_name.replace('models/', '')
+        return model_name
+
+    def _generate(self, model_name: str, prompt: str, config: dict = None):
+        """Single entry point to the model: shared client, bounded concurrency, deadline and retries"""
+        return get_gemini_client(self.api_key).generate_content(model_name, prompt, config=config)
+
+    def _cache_lookup(self, operation: str, model_name: str, prompt: str, use_cache: bool = True):
+        """Return (cache_key, cached_result); the key is None when caching is bypassed"""
+        if not use_cache or not self.cache_service:
+            return None, None
+        key = self.cache_service.make_key(model_name, operation, prompt)
+        return key, self.cache_service.get(key)
+
+    def _cache_store(self, key, operation: str, model_name: str, result, immutable: bool = False):
+        if key and self.cache_service and isinstance(result, dict) and 'error' not in result:
+            self.cache_service.set(key, operation, model_name, result, immutable=immutable)
 
     def _validate_response_schema(self, data, required_keys):
         """SEC-005: Basic schema validation for AI responses"""
@@ -52,17 +137,68 @@ class AiService:
             except Exception as e:
                 print(f'Failed to log AI usage: {e}')
 
-    def compare_syllabuses(self, base_data: dict, target_data: dict):
-        """Analyze changes between two syllabus versions using AI"""
+    def _usage_tokens(self, response, prompt: str, text: str):
+        """Token counts from the SDK usage metadata, falling back to a word-count estimate"""
+        usage = getattr(response, 'usage_metadata', None)
+        in_tok = getattr(usage, 'prompt_token_count', None) if usage else None
+        out_tok = getattr(usage, 'candidates_token_count', None) if usage else None
+        return (in_tok if in_tok is not None else len(prompt.split()),
+                out_tok if out_tok is not None else len((text or '').split()))
+
+    def _compact_value(self, value):
+        if value is None:
+            return None
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        limit = self.COMPARE_MAX_VALUE_CHARS
+        return text if len(text) <= limit else text[:limit] + '...'
+
+    def _build_change_set(self, base_data: dict, target_data: dict):
+        """Minimal context + computed changes instead of both full documents"""
+        changes = self.diff_service.diff(base_data or {}, target_data or {})
+        context = {
+            key: (target_data or {}).get(key, (base_data or {}).get(key))
+            for key in ('subjectCode', 'subjectNameVi', 'credits')
+        }
+        context['baseVersion'] = (base_data or {}).get('version')
+        context['targetVersion'] = (target_data or {}).get('version')
+
+        compact = [{
+            'path': c['path'],
+            'type': c['type'],
+            'old': self._compact_value(c['old_value']),
+            'new': self._compact_value(c['new_value'])
+        } for c in changes[:self.COMPARE_MAX_CHANGES]]
+        return context, compact, len(changes)
+
+    def compare_syllabuses(self, base_data: dict, target_data: dict, syllabus_id: int = None,
+                           use_cache: bool = True, immutable: bool = False):
+        """Analyze changes between two syllabus versions using AI.
+        immutable=True (both sides are snapshots) caches the result without expiry."""
         if not self.api_key:
             return {"error": "Chưa cấu hình GEMINI_API_KEY"}
 
+        context, changes, total_changes = self._build_change_set(base_data, target_data)
+        if not total_changes:
+            return {
+                "summary": "Không có thay đổi nào giữa hai phiên bản.",
+                "detailed_analysis": [],
+                "impact_assessment": "Không có tác động.",
+                "is_significant_change": False
+            }
+        if syllabus_id is None:
+            syllabus_id = (target_data or {}).get('id')
+
+        omitted = total_changes - len(changes)
+        omitted_note = f"(Còn {omitted} thay đổi nhỏ khác không được liệt kê.)" if omitted > 0 else ""
+
         prompt = f"""
         Bạn là một chuyên gia khảo thí và kiểm định chất lượng giáo dục. 
         Hãy phân tích sự thay đổi giữa hai phiên bản đề cương học phần dưới đây.
         
-        Phiên bản 1 (Cũ): {sanitize_prompt_input(json.dumps(base_data, ensure_ascii=False))}
-        Phiên bản 2 (Mới): {sanitize_prompt_input(json.dumps(target_data, ensure_ascii=False))}
+        Thông tin học phần: {sanitize_prompt_input(json.dumps(context, ensure_ascii=False))}
+        Danh sách thay đổi (path = vị trí trong đề cương, type = Added/Removed/Modified, old/new = giá trị cũ/mới):
+        {sanitize_prompt_input(json.dumps(changes, ensure_ascii=False))}
+        {omitted_note}
         
         Hãy cung cấp báo cáo so sánh chi tiết bằng tiếng Việt, tập trung vào:
         1. Các thay đổi về cấu trúc (Số tín chỉ, phân bổ thời gian).
@@ -81,25 +217,17 @@ class AiService:
         }}
         """
 
+        model_name = self._model_name()
+        cache_key, cached = self._cache_lookup('COMPARE_DIFF', model_name, prompt, use_cache)
+        if cached is not None:
+            return cached
+
         try:
-            model_name = os.getenv('AI_MODEL', 'gemini-3-flash-preview')
-            if model_name.startswith('models/'):
-                model_name = model_name.replace('models/', '')
-
-            if _NEW_GENAI:
-                client = genai.Client(api_key=self.api_key)
-                # Config with JSON mode if supported
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config={"response_mime_type": "application/json"}
-                )
-                text = response.text
-            else:
-                genai.configure(api_key=self.api_key)
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(prompt)
-                text = response.text
+            response = self._generate(model_name, prompt, {"response_mime_type": "application/json"})
+            text = response.text
+
+            in_tok, out_tok = self._usage_tokens(response, prompt, text)
+            self._log_usage(syllabus_id, 'COMPARE_DIFF', in_tok, out_tok)
 
             # Parse JSON from response
             try:
@@ -115,6 +243,7 @@ class AiService:
                 required = ["summary", "detailed_analysis", "impact_assessment", "is_significant_change"]
                 if not self._validate_response_schema(result, required):
                     return {"summary": text, "error": "AI response missing required schema fields"}
+                self._cache_store(cache_key, 'COMPARE_DIFF', model_name, result, immutable=immutable)
                 return result
             except Exception as pe:
                 print(f"JSON Parse Error in AI Compare: {pe}")
@@ -124,8 +253,32 @@ class AiService:
             print(f"AI Compare Error: {e}")
             return {"error": f"Lỗi AI: {str(e)}"}
 
-    def analyze_clo_plo_alignment(self, clos_data: list, plos_data: list, mappings_data: list):
+    def _precheck_alignment_result(self, findings: list):
+        """Alignment report built from blocking pre-check findings (same schema as the AI answer)"""
+        errors = [f for f in findings if f['severity'] == SyllabusPrecheckService.ERROR]
+        return {
+            "overall_score": 0,
+            "analysis": "Đề cương chưa đủ điều kiện để phân tích mức độ đóng góp CLO - PLO: "
+                        + " ".join(f['message'] for f in errors),
+            "strengths": [],
+            "weaknesses": [f['message'] for f in findings if f['severity'] != SyllabusPrecheckService.INFO],
+            "suggestions": [{"clo": f['target'], "suggestion": f['message']}
+                            for f in findings if f['code'].startswith('CLO_') and f['target']],
+            "is_valid": False,
+            "precheck": findings,
+            # not a model score: aggregations (alignment batch) count it as skipped
+            "source": "precheck",
+            "skipped": True
+        }
+
+    def analyze_clo_plo_alignment(self, clos_data: list, plos_data: list, mappings_data: list,
+                                  use_cache: bool = True):
         """Phân tích mức độ đóng góp của CLO vào PLO giúp kiểm định chất lượng"""
+        # Missing CLOs/PLOs/mappings make the verdict predictable: answer locally
+        findings = self.precheck_service.check_alignment(clos_data, plos_data, mappings_data)
+        if self.precheck_service.has_errors(findings):
+            return self._precheck_alignment_result(findings)
+
         if not self.api_key:
             return {"error": "Chưa cấu hình GEMINI_API_KEY"}
 
@@ -158,24 +311,14 @@ class AiService:
         }}
         """
 
+        model_name = self._model_name()
+        cache_key, cached = self._cache_lookup('ALIGNMENT', model_name, prompt, use_cache)
+        if cached is not None:
+            return cached
+
         try:
-            model_name = os.getenv('AI_MODEL', 'gemini-3-flash-preview')
-            if model_name.startswith('models/'):
-                model_name = model_name.replace('models/', '')
-
-            if _NEW_GENAI:
-                client = genai.Client(api_key=self.api_key)
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config={"response_mime_type": "application/json"}
-                )
-                text = response.text
-            else:
-                genai.configure(api_key=self.api_key)
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(prompt)
-                text = response.text
+            response = self._generate(model_name, prompt, {"response_mime_type": "application/json"})
+            text = response.text
 
             try:
                 if text.startswith("```json"):
@@ -186,19 +329,14 @@ class AiService:
                 required = ["overall_score", "analysis", "suggestions", "is_valid"]
                 if not self._validate_response_schema(result, required):
                     return {"analysis": text, "error": "AI response missing required schema fields"}
+                self._cache_store(cache_key, 'ALIGNMENT', model_name, result)
                 return result
             except:
                 return {"analysis": text, "error": "AI returned non-JSON response"}
         except Exception as e:
             return {"error": f"Lỗi AI: {str(e)}"}
 
-    def generate(self, subject_name: str, syllabus_id: int = None):
-        if not self.api_key:
-            return {"error": "Chưa cấu hình GEMINI_API_KEY"}
-
-        if genai is None:
-            return {"error": "No generative AI client installed (install google-genai)"}
-
+    def _generate_prompt(self, subject_name: str) -> str:
         # Complete Template matching frontend SyllabusData interface
         json_template = {
             "subject_name_vi": sanitize_prompt_input(subject_name),
@@ -352,92 +490,87 @@ TEMPLATE JSON CHUẨN (PHẢI ĐIỀN HẾT TẤT CẢ CÁC TRƯỜNG NÀY):
 🚨🚨🚨 CẢNH BÁO CUỐI CÙNG: Output cuối cùng PHẢI là JSON hoàn chỉnh với TẤT CẢ các trường được điền, KHÔNG có "...", KHÔNG bỏ trống bất kỳ trường nào!
         """
 
+        return prompt
+
+    @staticmethod
+    def _clean_json_text(text: str) -> str:
+        """Strip markdown code fences around a JSON answer"""
+        clean_text = text or ""
+        if "```json" in clean_text:
+            clean_text = clean_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in clean_text:
+            clean_text = clean_text.split("```")[1].split("```")[0].strip()
+        return clean_text.strip()
+
+    def _write_generate_log(self, subject_name: str, prompt: str, resp_text: str, clean_text: str):
+        """Log to file for debugging"""
         try:
-            model_name = os.getenv('AI_MODEL', 'gemini-3-flash-preview')
-            if model_name.startswith('models/'):
-                model_name = model_name.replace('models/', '')
+            log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
+            os.makedirs(log_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            log_file = os.path.join(log_dir, f"ai_response_{timestamp}.txt")
             
-            max_tokens = int(os.getenv('AI_MAX_TOKENS', 16384))
-            temperature = float(os.getenv('AI_TEMPERATURE', 1.0))
-
-            if _NEW_GENAI:
-                # Initialize client
-                client = genai.Client(api_key=self.api_key)
+            with open(log_file, 'w', encoding='utf-8') as f:
+                f.write("=" * 80 + "\n")
+                f.write(f"TIMESTAMP: {datetime.now().isoformat()}\n")
+                f.write(f"SUBJECT NAME: {subject_name}\n")
+                f.write("=" * 80 + "\n\n")
                 
-                # In some versions of google-genai, the method is client.models.generate_content
-                # and for others it might be slightly different. 
-                # According to latest docs, it's client.models.generate_content(model='...', contents='...')
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config={
-                        "response_mime_type": "application/json",
-                        "max_output_tokens": max_tokens,
-                        "temperature": temperature
-                    }
-                )
-                resp_text = response.text
-            else:
-
-                # Legacy package behavior
-                genai.configure(api_key=self.api_key)
-                model = genai.GenerativeModel(model_name)
-                generation_config = {
-                    "max_output_tokens": max_tokens,
-                    "temperature": temperature,
-                    "response_mime_type": "application/json"
-                }
-                response = model.generate_content(prompt, generation_config=generation_config)
-                resp_text = getattr(response, "text", "")
+                f.write("PROMPT:\n")
+                f.write("-" * 80 + "\n")
+                f.write(prompt + "\n")
+                f.write("-" * 80 + "\n\n")
+                
+                f.write("RAW RESPONSE:\n")
+                f.write("-" * 80 + "\n")
+                f.write(resp_text + "\n")
+                f.write("-" * 80 + "\n\n")
+                
+                f.write("CLEANED JSON:\n")
+                f.write("-" * 80 + "\n")
+                f.write(clean_text + "\n")
+                f.write("-" * 80 + "\n")
+                
+            print(f"[AI LOG] Response saved to: {log_file}")
+        except Exception as log_err:
+            print(f"[AI LOG ERROR] Failed to write log: {log_err}")
+
+    def _generation_config(self) -> dict:
+        return {
+            "response_mime_type": "application/json",
+            "max_output_tokens": int(os.getenv('AI_MAX_TOKENS', 16384)),
+            "temperature": float(os.getenv('AI_TEMPERATURE', 1.0))
+        }
+
+    def generate(self, subject_name: str, syllabus_id: int = None, use_cache: bool = True):
+        if not self.api_key:
+            return {"error": "Chưa cấu hình GEMINI_API_KEY"}
+
+        if not is_available():
+            return {"error": "No generative AI client installed (install google-genai)"}
+
+        prompt = self._generate_prompt(subject_name)
+        model_name = self._model_name()
+        cache_key, cached = self._cache_lookup('GENERATE', model_name, prompt, use_cache)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self._generate(model_name, prompt, self._generation_config())
+            resp_text = getattr(response, "text", "") or ""
 
             # Clean markdown formatting if present
-            clean_text = resp_text
-            if "```json" in clean_text:
-                clean_text = clean_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in clean_text:
-                clean_text = clean_text.split("```")[1].split("```")[0].strip()
-            clean_text = clean_text.strip()
-            
-            # Log to file for debugging
-            try:
-                log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
-                os.makedirs(log_dir, exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                log_file = os.path.join(log_dir, f"ai_response_{timestamp}.txt")
-                
-                with open(log_file, 'w', encoding='utf-8') as f:
-                    f.write("=" * 80 + "\n")
-                    f.write(f"TIMESTAMP: {datetime.now().isoformat()}\n")
-                    f.write(f"SUBJECT NAME: {subject_name}\n")
-                    f.write("=" * 80 + "\n\n")
-                    
-                    f.write("PROMPT:\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(prompt + "\n")
-                    f.write("-" * 80 + "\n\n")
-                    
-                    f.write("RAW RESPONSE:\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(resp_text + "\n")
-                    f.write("-" * 80 + "\n\n")
-                    
-                    f.write("CLEANED JSON:\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(clean_text + "\n")
-                    f.write("-" * 80 + "\n")
-                    
-                print(f"[AI LOG] Response saved to: {log_file}")
-            except Exception as log_err:
-                print(f"[AI LOG ERROR] Failed to write log: {log_err}")
+            clean_text = self._clean_json_text(resp_text)
+            self._write_generate_log(subject_name, prompt, resp_text, clean_text)
             
-            # Simple token estimation
-            input_tokens = len(prompt.split())
-            output_tokens = len(clean_text.split())
+            input_tokens, output_tokens = self._usage_tokens(response, prompt, clean_text)
 
             # Log usage if syllabus_id provided
             self._log_usage(syllabus_id, 'GENERATE', input_tokens, output_tokens)
 
-            return json.loads(clean_text)
+            result = json.loads(clean_text)
+            self._cache_store(cache_key, 'GENERATE', model_name, result)
+            return result
         except Exception as e:
             print(f"AI Generate Error: {e}")
             # Attempt to log error usage
@@ -446,8 +579,65 @@ TEMPLATE JSON CHUẨN (PHẢI ĐIỀN HẾT TẤT CẢ CÁC TRƯỜNG NÀY):
             except: pass
             return {"error": str(e)}
 
-    def summarize_syllabus(self, syllabus_data: dict, syllabus_id: int = None):
+    def generate_stream(self, subject_name: str, syllabus_id: int = None, use_cache: bool = True):
+        """
+        Streaming variant of generate(). Yields (event, payload) tuples:
+        ('section', {'key': ..., 'value': ...}) as soon as each top-level field of
+        the JSON syllabus is complete, then ('done', full_result) or ('error', message).
+        """
+        if not self.api_key:
+            yield 'error', "Chưa cấu hình GEMINI_API_KEY"
+            return
+        if not is_available():
+            yield 'error', "No generative AI client installed (install google-genai)"
+            return
+
+        prompt = self._generate_prompt(subject_name)
+        model_name = self._model_name()
+        cache_key, cached = self._cache_lookup('GENERATE', model_name, prompt, use_cache)
+        if cached is not None:
+            for key, value in cached.items():
+                yield 'section', {'key': key, 'value': value}
+            yield 'done', cached
+            return
+
+        parser = _JsonSectionStream()
+        parts = []
+        last_chunk = None
+        try:
+            stream = get_gemini_client(self.api_key).generate_content_stream(
+                model_name, prompt, config=self._generation_config())
+            for chunk in stream:
+                last_chunk = chunk
+                text = getattr(chunk, "text", "") or ""
+                if not text:
+                    continue
+                parts.append(text)
+                for key, value in parser.feed(text):
+                    yield 'section', {'key': key, 'value': value}
+
+            resp_text = "".join(parts)
+            clean_text = self._clean_json_text(resp_text)
+            self._write_generate_log(subject_name, prompt, resp_text, clean_text)
+            # usage metadata is reported on the last chunk
+            self._log_usage(syllabus_id, 'GENERATE', *self._usage_tokens(last_chunk, prompt, clean_text))
+
+            result = json.loads(clean_text)
+            self._cache_store(cache_key, 'GENERATE', model_name, result)
+            yield 'done', result
+        except Exception as e:
+            print(f"AI Generate Stream Error: {e}")
+            try:
+                self._log_usage(syllabus_id, 'ERROR', 0, 0)
+            except: pass
+            yield 'error', str(e)
+
+    def summarize_syllabus(self, syllabus_data: dict, syllabus_id: int = None, use_cache: bool = True):
         """Summarize an existing syllabus using AI"""
+        findings = self.precheck_service.check_summary_input(syllabus_data)
+        if self.precheck_service.has_errors(findings):
+            return {"error": findings[0]['message'], "precheck": findings}
+
         if not self.api_key:
             return {"error": "Chưa cấu hình GEMINI_API_KEY"}
 
@@ -467,30 +657,23 @@ CLOs: {json.dumps([c.get('description') for c in syllabus_data.get('clos', [])],
 YÊU CẦU: Trả về kết quả là chuỗi văn bản thuần túy, có xuống dòng hợp lý, KHÔNG CÓ định dạng Markdown (như bold, heading) hay JSON.
 """
 
+        model_name = self._model_name()
+        cache_key, cached = self._cache_lookup('SUMMARIZE', model_name, prompt, use_cache)
+        if cached is not None:
+            return cached
+
         try:
-            model_name = os.getenv('AI_MODEL', 'gemini-3-flash-preview')
-            if model_name.startswith('models/'):
-                model_name = model_name.replace('models/', '')
-
-            if _NEW_GENAI:
-                client = genai.Client(api_key=self.api_key)
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt
-                )
-                resp_text = response.text
-            else:
-                genai.configure(api_key=self.api_key)
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(prompt)
-                resp_text = getattr(response, "text", "")
+            response = self._generate(model_name, prompt)
+            resp_text = getattr(response, "text", "") or ""
 
             # Log usage
             try:
-                self._log_usage(syllabus_id, 'SUMMARIZE', len(prompt.split()), len(resp_text.split()))
+                self._log_usage(syllabus_id, 'SUMMARIZE', *self._usage_tokens(response, prompt, resp_text))
             except: pass
 
-            return {"summary": resp_text.strip()}
+            result = {"summary": resp_text.strip()}
+            self._cache_store(cache_key, 'SUMMARIZE', model_name, result)
+            return result
         except Exception as e:
             print(f"AI Summarize Error: {e}")
             return {"error": str(e)}
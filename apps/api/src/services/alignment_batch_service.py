@@ -0,0 +1,229 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class AlignmentBatchService:
+    """
+    Program-wide CLO-PLO alignment analysis.
+
+    A job fans out one Celery task per syllabus (group) and aggregates the
+    results into a program report in the chord callback. Every per-syllabus
+    result is stored in the AI result cache, so resuming an interrupted job
+    re-dispatches the whole set but only syllabuses without a cached analysis
+    reach the model. Each dispatch is stamped with the job's attempt number;
+    tasks of an older dispatch still in flight no longer touch the job.
+    """
+
+    def __init__(self, repository, syllabus_repository, program_repository,
+                 program_outcome_repository, ai_service):
+        self.repository = repository
+        self.syllabus_repository = syllabus_repository
+        self.program_repository = program_repository
+        self.program_outcome_repository = program_outcome_repository
+        self.ai_service = ai_service
+
+    @staticmethod
+    def alignment_input(syllabus, plos: Optional[List] = None):
+        """(clos, plos, mappings) payload expected by AiService.analyze_clo_plo_alignment"""
+        clos = [{'code': c.code, 'description': c.description} for c in (syllabus.clos or [])]
+
+        if plos is None:
+            program = syllabus.program
+            plos = list(program.outcomes or []) if program and hasattr(program, 'outcomes') else []
+        plos_data = [{'code': p.code, 'description': p.description} for p in plos]
+
+        mappings = []
+        for c in (syllabus.clos or []):
+            for m in (getattr(c, 'plo_mappings', None) or []):
+                mappings.append({
+                    'clo': c.code,
+                    'plo': m.program_plo.code if m.program_plo else 'N/A',
+                    'level': m.level
+                })
+        return clos, plos_data, mappings
+
+    # ------------------------------------------------------------------ #
+    # Job lifecycle
+    # ------------------------------------------------------------------ #
+    def start(self, program_id: int, user_id: int = None, use_cache: bool = True,
+              statuses: List[str] = None):
+        if not self.program_repository.get_by_id(program_id):
+            raise ValueError('Chương trình đào tạo không tồn tại')
+
+        # Only one job per program at a time; a second request resumes the running one
+        unfinished = self.repository.get_unfinished(program_id)
+        if unfinished:
+            return unfinished
+
+        syllabus_ids = self.syllabus_repository.get_latest_ids_by_program(program_id, statuses)
+        if not syllabus_ids:
+            raise ValueError('Chương trình đào tạo chưa có đề cương nào để phân tích')
+
+        job = self.repository.create({
+            'program_id': program_id,
+            'status': 'PENDING',
+            'syllabus_ids': json.dumps(syllabus_ids),
+            'total': len(syllabus_ids),
+            'created_by': user_id
+        })
+        return self._dispatch(job, use_cache)
+
+    def resume(self, job_id: int):
+        """Re-dispatch an interrupted job; finished analyses are served from the AI cache"""
+        job = self.repository.get_by_id(job_id)
+        if not job:
+            return None
+        if job.status == 'COMPLETED':
+            raise ValueError('Tác vụ đã hoàn thành')
+        return self._dispatch(job, use_cache=True)
+
+    def _dispatch(self, job, use_cache: bool):
+        from celery import chord
+        from tasks import (analyze_syllabus_alignment_task, finalize_alignment_batch_task,
+                           fail_alignment_batch_task)
+
+        syllabus_ids = json.loads(job.syllabus_ids)
+        attempt = (job.attempts or 0) + 1
+        self.repository.update(job.id, {
+            'status': 'RUNNING',
+            'analyzed': 0,
+            'failed': 0,
+            'attempts': attempt,
+            'report': None,
+            'finished_at': None
+        })
+        header = [analyze_syllabus_alignment_task.s(job.id, sid, use_cache, attempt) for sid in syllabus_ids]
+        callback = finalize_alignment_batch_task.s(job.id, attempt).on_error(
+            fail_alignment_batch_task.s(job_id=job.id, attempt=attempt))
+        result = chord(header)(callback)
+        logger.info(f"Alignment batch job {job.id} dispatched: {len(syllabus_ids)} syllabuses")
+        return self.repository.update(job.id, {'task_id': result.id})
+
+    def get_job(self, job_id: int):
+        return self.repository.get_by_id(job_id)
+
+    def list_jobs(self, program_id: int):
+        return self.repository.get_by_program(program_id)
+
+    # ------------------------------------------------------------------ #
+    # Worker side
+    # ------------------------------------------------------------------ #
+    def _is_stale(self, job_id: int, attempt: Optional[int]) -> bool:
+        """True when the task belongs to an older dispatch of the job (attempt None: not stamped)"""
+        if attempt is None:
+            return False
+        job = self.repository.get_by_id(job_id)
+        return job is None or job.attempts != attempt
+
+    def analyze_one(self, job_id: int, syllabus_id: int, use_cache: bool = True,
+                    attempt: int = None) -> Dict[str, Any]:
+        """Analyze one syllabus of a job; returns a compact result for aggregation"""
+        if self._is_stale(job_id, attempt):
+            return {'syllabus_id': syllabus_id, 'error': 'Superseded by a newer dispatch'}
+
+        syllabus = self.syllabus_repository.get_details(syllabus_id)
+        if not syllabus:
+            self.repository.increment(job_id, failed=1, attempt=attempt)
+            return {'syllabus_id': syllabus_id, 'error': 'Syllabus not found'}
+
+        plos = self.program_outcome_repository.get_by_program_id(syllabus.program_id)
+        clos, plos_data, mappings = self.alignment_input(syllabus, plos)
+        subject = syllabus.subject
+        item = {
+            'syllabus_id': syllabus_id,
+            'subject_code': subject.code if subject else None,
+            'subject_name': subject.name_vi if subject else None,
+            'mapped_plos': sorted({m['plo'] for m in mappings if m['plo'] != 'N/A'})
+        }
+        if not clos:
+            self.repository.increment(job_id, failed=1, attempt=attempt)
+            item['error'] = 'Đề cương chưa có CLO'
+            return item
+
+        result = self.ai_service.analyze_clo_plo_alignment(clos, plos_data, mappings, use_cache=use_cache)
+        if 'error' in result:
+            self.repository.increment(job_id, failed=1, attempt=attempt)
+            item['error'] = result['error']
+            return item
+        if result.get('skipped') or result.get('source') == 'precheck':
+            # answered by the local pre-check: no model score to average
+            self.repository.increment(job_id, failed=1, attempt=attempt)
+            item.update({'skipped': True, 'weaknesses': result.get('weaknesses', [])})
+            return item
+
+        self.repository.increment(job_id, analyzed=1, attempt=attempt)
+        item.update({
+            'overall_score': result.get('overall_score'),
+            'is_valid': result.get('is_valid'),
+            'weaknesses': result.get('weaknesses', []),
+            'flagged_plos': sorted({s['plo'] for s in result.get('suggestions', [])
+                                    if isinstance(s, dict) and s.get('plo')})
+        })
+        return item
+
+    def finalize(self, job_id: int, results: List[Dict[str, Any]], attempt: int = None) -> Dict[str, Any]:
+        job = self.repository.get_by_id(job_id)
+        if not job or (attempt is not None and job.attempts != attempt):
+            return {}
+        report = self._aggregate(job.program_id, results or [])
+        self.repository.update(job_id, {
+            'status': 'COMPLETED' if report['analyzed'] or report['skipped'] else 'FAILED',
+            'analyzed': report['analyzed'],
+            'failed': len(report['failures']) + len(report['skipped']),
+            'report': json.dumps(report, ensure_ascii=False),
+            'finished_at': datetime.now()
+        })
+        return report
+
+    def mark_failed(self, job_id: int, attempt: int = None, error: str = None):
+        """Chord error callback: a header task or the callback itself failed"""
+        job = self.repository.get_by_id(job_id)
+        if not job or job.status != 'RUNNING' or (attempt is not None and job.attempts != attempt):
+            return
+        logger.error(f"Alignment batch job {job_id} failed: {error}")
+        self.repository.update(job_id, {
+            'status': 'FAILED',
+            'report': json.dumps({'error': error}, ensure_ascii=False) if error else None,
+            'finished_at': datetime.now()
+        })
+
+    def _aggregate(self, program_id: int, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ok = [r for r in results if not r.get('error') and not r.get('skipped')]
+        scores = [float(r['overall_score']) for r in ok if isinstance(r.get('overall_score'), (int, float))]
+
+        program_plos = [p.code for p in self.program_outcome_repository.get_by_program_id(program_id)]
+        mapped_count = {code: 0 for code in program_plos}
+        flagged_count = {code: 0 for code in program_plos}
+        for r in results:
+            for code in r.get('mapped_plos', []):
+                mapped_count[code] = mapped_count.get(code, 0) + 1
+            for code in r.get('flagged_plos', []):
+                flagged_count[code] = flagged_count.get(code, 0) + 1
+
+        return {
+            'program_id': program_id,
+            'total': len(results),
+            'analyzed': len(ok),
+            'average_score': round(sum(scores) / len(scores), 2) if scores else None,
+            'min_score': min(scores) if scores else None,
+            'max_score': max(scores) if scores else None,
+            'valid_count': sum(1 for r in ok if r.get('is_valid')),
+            'plo_coverage': [{
+                'plo': code,
+                'syllabus_count': mapped_count.get(code, 0),
+                'flagged_count': flagged_count.get(code, 0)
+            } for code in program_plos],
+            'uncovered_plos': [code for code in program_plos if not mapped_count.get(code)],
+            # weakest syllabuses first so reviewers start where accreditation risk is highest
+            'syllabuses': sorted(ok, key=lambda r: (r.get('overall_score') is None, r.get('overall_score') or 0)),
+            'failures': [{'syllabus_id': r['syllabus_id'], 'subject_code': r.get('subject_code'),
+                          'error': r['error']} for r in results if r.get('error')],
+            # blocked by the pre-check (missing CLOs/PLOs/mappings), not scored
+            'skipped': [{'syllabus_id': r['syllabus_id'], 'subject_code': r.get('subject_code'),
+                         'reasons': r.get('weaknesses', [])} for r in results if r.get('skipped')]
+        }
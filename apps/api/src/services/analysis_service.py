@@ -1,41 +1,58 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 from infrastructure.repositories.syllabus_repository import SyllabusRepository
 from infrastructure.repositories.subject_relationship_repository import SubjectRelationshipRepository
 from domain.constants import WorkflowStatus
 
 class AnalysisService:
     def __init__(self, syllabus_repository: SyllabusRepository, 
-                 rel_repository: SubjectRelationshipRepository):
+                 rel_repository: SubjectRelationshipRepository,
+                 graph_service=None):
         self.syllabus_repo = syllabus_repository
         self.rel_repo = rel_repository
+        self.graph_service = graph_service
 
-    def get_impact_analysis(self, syllabus_id: int) -> Dict:
+    def get_impact_analysis(self, syllabus_id: int, max_depth: Optional[int] = None,
+                            types: Optional[Set[str]] = None) -> Dict:
         """
         Analyze what other syllabuses are impacted if this syllabus changes.
         Principal/Strategic view.
+        Walks the whole successor closure on the cached curriculum graph and
+        resolves the active syllabus of every impacted subject in one query.
         """
         syllabus = self.syllabus_repo.get_by_id(syllabus_id)
         if not syllabus:
             return None
             
         subject_id = syllabus.subject_id
+        graph = self.graph_service.get_graph()
         
-        # 1. Find direct successors (Subjects that have THIS subject as a prerequisite)
-        successors = self.rel_repo.get_successors(subject_id)
-        
+        # 1. Transitive successors (subjects depending on THIS subject), nearest first
+        levels = graph.successor_levels(subject_id, types=types, max_depth=max_depth)
+
+        # 2. Active/published syllabus per impacted subject, set-based
+        active = self.syllabus_repo.get_latest_by_subjects(
+            [sid for sid, _, _ in levels], statuses=WorkflowStatus.PUBLIC_STATUSES)
+
+        def label(sid, attr):
+            node = graph.subjects.get(sid)
+            return getattr(node, attr) if node else "N/A"
+
         impacted_subjects = []
-        for rel in successors:
-            # For each successor subject, find its active/published syllabus
-            active_syllabus = self.syllabus_repo.get_active_by_subject(rel.subject_id)
+        for sid, depth, edge in levels:
+            active_syllabus = active.get(sid)
             impacted_subjects.append({
-                "subject_id": rel.subject_id,
-                "subject_code": rel.subject.code if rel.subject else "N/A",
-                "subject_name": rel.subject.name_vi if rel.subject else "N/A",
-                "type": rel.type,
+                "subject_id": sid,
+                "subject_code": label(sid, "code"),
+                "subject_name": label(sid, "name_vi"),
+                "type": edge.type,
+                "depth": depth,
+                "via_subject_id": edge.related_subject_id,
+                "via_subject_code": label(edge.related_subject_id, "code"),
                 "syllabus_status": active_syllabus.status if active_syllabus else "No Active Syllabus",
                 "syllabus_id": active_syllabus.id if active_syllabus else None
             })
-            
+
+        direct_count = sum(1 for d in impacted_subjects if d["depth"] == 1)
         return {
             "root_syllabus": {
                 "id": syllabus.id,
@@ -43,6 +60,8 @@ class AnalysisService:
                 "version": syllabus.version
             },
             "impacted_count": len(impacted_subjects),
+            "direct_count": direct_count,
+            "max_depth": max((d["depth"] for d in impacted_subjects), default=0),
             "impact_level": "High" if len(impacted_subjects) > 3 else "Medium" if len(impacted_subjects) > 0 else "Low",
             "details": impacted_subjects
         }
@@ -2,10 +2,13 @@ from typing import List
 from infrastructure.repositories.clo_plo_mapping_repository import CloPloMappingRepository
 
 class CloPloMappingService:
-    def __init__(self, repository: CloPloMappingRepository, syllabus_clo_repository=None, program_outcome_repository=None):
+    def __init__(self, repository: CloPloMappingRepository, syllabus_clo_repository=None, program_outcome_repository=None,
+                 suggestion_service=None, coverage_service=None):
         self.repository = repository
         self.syllabus_clo_repository = syllabus_clo_repository
         self.program_outcome_repository = program_outcome_repository
+        self.suggestion_service = suggestion_service
+        self.coverage_service = coverage_service
 
     def get_by_clo(self, clo_id: int) -> List:
         return self.repository.get_by_syllabus_clo(clo_id)
@@ -14,12 +17,46 @@ class CloPloMappingService:
         clo_id = data.get('syllabus_clo_id')
         plo_id = data.get('program_plo_id')
         
-        if not self.syllabus_clo_repository.get_by_id(clo_id):
+        clo = self.syllabus_clo_repository.get_by_id(clo_id)
+        if not clo:
             raise ValueError('Invalid syllabus_clo_id')
         if not self.program_outcome_repository.get_by_id(plo_id):
             raise ValueError('Invalid program_plo_id')
             
-        return self.repository.create(data)
+        item = self.repository.create(data)
+        self._invalidate_coverage(clo)
+        return item
 
     def delete_mapping(self, id: int) -> bool:
-        return self.repository.delete(id)
\ No newline at end of file
+        item = self.repository.get_by_id(id)
+        clo = item.syllabus_clo if item else None
+        ok = self.repository.delete(id)
+        if ok:
+            self._invalidate_coverage(clo)
+        return ok
+
+    def _invalidate_coverage(self, clo):
+        if self.coverage_service and clo is not None and clo.syllabus:
+            self.coverage_service.invalidate(clo.syllabus.program_id)
+
+    def get_program_coverage(self, program_id: int, use_cache: bool = True, statuses=None,
+                             include_drafts: bool = False):
+        """Dense CLO x PLO matrix of the program with per-PLO aggregates (approved/published syllabuses by default)"""
+        if include_drafts:
+            statuses = None
+        elif not statuses:
+            statuses = self.coverage_service.DEFAULT_STATUSES
+        return self.coverage_service.get_program_coverage(program_id, use_cache=use_cache, statuses=statuses)
+
+    def suggest_for_clo(self, clo_id: int, top_k: int = None):
+        """Local embedding suggestions for a saved CLO"""
+        return self.suggestion_service.suggest_for_clo(clo_id, top_k)
+
+    def suggest_for_syllabus(self, syllabus_id: int, top_k: int = None):
+        return self.suggestion_service.suggest_for_syllabus(syllabus_id, top_k)
+
+    def suggest_for_texts(self, program_id: int, texts: List[str], top_k: int = None):
+        """Suggestions for CLO drafts that are not saved yet (syllabus editor)"""
+        if not program_id:
+            raise ValueError('program_id is required')
+        return self.suggestion_service.suggest(program_id, texts, top_k)
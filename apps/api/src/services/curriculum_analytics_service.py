@@ -0,0 +1,177 @@
+import threading
+from typing import Any, Dict, List, Set, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Edge types that impose an order between subjects (the prerequisite is taken earlier)
+ORDERING_TYPES = {'PREREQUISITE'}
+# Edge types meaning "taken together"; reported but they do not create layers
+CONCURRENT_TYPES = {'COREQUISITE', 'CO_REQUISITE', 'PARALLEL'}
+
+
+class CurriculumAnalyticsService:
+    """
+    Program-level analytics over the cached curriculum graph: prerequisite
+    cycles, topological semester layers, longest prerequisite chains and
+    orphan subjects. Results are memoized per (graph version, program subject
+    set), so they are recomputed only after relationships or the program's
+    subjects change.
+    """
+    MAX_CHAINS = 5
+
+    def __init__(self, graph_service, syllabus_repository):
+        self.graph_service = graph_service
+        self.syllabus_repository = syllabus_repository
+        self._memo: Dict[Tuple, Dict[str, Any]] = {}
+        self._memo_version = None
+        self._lock = threading.Lock()
+
+    def get_program_analytics(self, program_id: int) -> Dict[str, Any]:
+        graph = self.graph_service.get_graph()
+        subjects = {row.id: row for row in self.syllabus_repository.get_program_subjects(program_id)}
+        key = (program_id, tuple(sorted(subjects)))
+
+        with self._lock:
+            if self._memo_version != graph.version:
+                self._memo = {}
+                self._memo_version = graph.version
+            cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._analyze(graph, subjects)
+        result.update({'program_id': program_id, 'graph_version': graph.version})
+        with self._lock:
+            if self._memo_version == graph.version:
+                self._memo[key] = result
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Algorithms (induced subgraph of the program's subjects)
+    # ------------------------------------------------------------------ #
+    def _analyze(self, graph, subjects: Dict[int, Any]) -> Dict[str, Any]:
+        nodes = set(subjects)
+        prereqs: Dict[int, Set[int]] = {n: set() for n in nodes}   # node -> its prerequisites
+        dependants: Dict[int, Set[int]] = {n: set() for n in nodes}
+        connected: Set[int] = set()
+        concurrent = []
+        for edge in graph.edges.values():
+            a, b = edge.subject_id, edge.related_subject_id
+            if a not in nodes or b not in nodes:
+                continue
+            connected.update((a, b))
+            if edge.type in ORDERING_TYPES:
+                prereqs[a].add(b)
+                dependants[b].add(a)
+            elif edge.type in CONCURRENT_TYPES:
+                concurrent.append((a, b))
+
+        def code(n):
+            return subjects[n].code
+
+        cycles = self._cycles(nodes, prereqs)
+        layer_of = self._layers(nodes, prereqs, dependants)
+        layers = {}
+        for n, layer in layer_of.items():
+            layers.setdefault(layer, []).append(n)
+        chains = self._longest_chains(layer_of, prereqs, dependants)
+
+        return {
+            'subject_count': len(nodes),
+            'edge_count': sum(len(p) for p in prereqs.values()),
+            'has_cycles': bool(cycles),
+            'cycles': [[code(n) for n in cycle] for cycle in cycles],
+            'layers': [{
+                'semester': layer,
+                'subjects': sorted(({'id': n, 'code': code(n), 'name': subjects[n].name_vi,
+                                     'credits': subjects[n].credits} for n in members),
+                                   key=lambda s: s['code'])
+            } for layer, members in sorted(layers.items())],
+            # subjects in or behind a cycle cannot be placed in a semester
+            'unlayered': sorted(code(n) for n in nodes - set(layer_of)),
+            'longest_chain_length': len(chains[0]) if chains else 0,
+            'longest_chains': [[code(n) for n in chain] for chain in chains],
+            'orphans': sorted(code(n) for n in nodes - connected),
+            'concurrent_pairs': [[code(a), code(b)] for a, b in concurrent],
+        }
+
+    @staticmethod
+    def _cycles(nodes: Set[int], prereqs: Dict[int, Set[int]]) -> List[List[int]]:
+        """Strongly connected components with more than one node (or a self loop); iterative Tarjan"""
+        index_of, low, on_stack = {}, {}, set()
+        stack, cycles = [], []
+        counter = 0
+        for root in sorted(nodes):
+            if root in index_of:
+                continue
+            work = [(root, iter(sorted(prereqs[root])))]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(prereqs[child]))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index_of[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in prereqs[node]:
+                        cycles.append(sorted(component))
+        return cycles
+
+    @staticmethod
+    def _layers(nodes: Set[int], prereqs: Dict[int, Set[int]], dependants: Dict[int, Set[int]]) -> Dict[int, int]:
+        """Kahn's algorithm; semester = 1 + latest prerequisite semester"""
+        remaining = {n: len(prereqs[n]) for n in nodes}
+        layer_of = {n: 1 for n in nodes if remaining[n] == 0}
+        queue = list(layer_of)
+        while queue:
+            node = queue.pop()
+            for dep in dependants[node]:
+                layer_of[dep] = max(layer_of.get(dep, 1), layer_of[node] + 1)
+                remaining[dep] -= 1
+                if remaining[dep] == 0:
+                    queue.append(dep)
+        # nodes reached but still waiting on a cyclic prerequisite are not placed
+        return {n: layer for n, layer in layer_of.items() if remaining[n] == 0}
+
+    def _longest_chains(self, layer_of: Dict[int, int], prereqs: Dict[int, Set[int]],
+                        dependants: Dict[int, Set[int]]) -> List[List[int]]:
+        """Longest prerequisite chains (critical paths), one per deepest final subject"""
+        # on a DAG the layer is exactly the longest path length ending at the node;
+        # only final subjects (no dependants) end a chain, so prefixes are not repeated
+        ends = [n for n, layer in layer_of.items() if layer > 1 and not dependants[n]]
+        ends = sorted(ends, key=lambda n: (-layer_of[n], n))[:self.MAX_CHAINS]
+        chains = []
+        for end in ends:
+            chain = [end]
+            node = end
+            while layer_of[node] > 1:
+                node = min((p for p in prereqs[node] if layer_of.get(p) == layer_of[node] - 1))
+                chain.append(node)
+            chains.append(list(reversed(chain)))
+        return chains
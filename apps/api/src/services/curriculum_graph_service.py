@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set
+
+from utils.caching import cache
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# subject_id depends on related_subject_id (PREREQUISITE, COREQUISITE, PARALLEL...)
+Edge = namedtuple('Edge', ['id', 'subject_id', 'related_subject_id', 'type'])
+SubjectNode = namedtuple('SubjectNode', ['id', 'code', 'name_vi'])
+
+
+class CurriculumGraph:
+    """
+    Immutable in-memory snapshot of subject_relationships with forward
+    (subject -> its prerequisites) and reverse (subject -> dependants)
+    adjacency. Traversals are iterative and use sets, so transitive queries
+    cost O(V + E) of the reachable part of the graph and no SQL.
+    """
+
+    def __init__(self, edges: Iterable[Edge], subjects: Dict[int, SubjectNode], version: str):
+        self.version = version
+        self.subjects = subjects
+        self.edges: Dict[int, Edge] = {}
+        self.forward: Dict[int, List[Edge]] = {}
+        self.reverse: Dict[int, List[Edge]] = {}
+        for edge in edges:
+            self.edges[edge.id] = edge
+            self.forward.setdefault(edge.subject_id, []).append(edge)
+            self.reverse.setdefault(edge.related_subject_id, []).append(edge)
+
+    def _walk(self, start: int, adjacency: Dict[int, List[Edge]], forward: bool,
+              types: Optional[Set[str]] = None) -> List[Edge]:
+        """Edges reachable from start in DFS order, each edge once; cycles are safe"""
+        visited = {start}
+        seen_edges = set()
+        result = []
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for edge in adjacency.get(node, ()):
+                if types and edge.type not in types:
+                    continue
+                if edge.id not in seen_edges:
+                    seen_edges.add(edge.id)
+                    result.append(edge)
+                nxt = edge.related_subject_id if forward else edge.subject_id
+                if nxt not in visited:
+                    visited.add(nxt)
+                    stack.append(nxt)
+        return result
+
+    def prerequisite_edges(self, subject_id: int, types: Optional[Set[str]] = None) -> List[Edge]:
+        return self._walk(subject_id, self.forward, True, types)
+
+    def successor_edges(self, subject_id: int, types: Optional[Set[str]] = None) -> List[Edge]:
+        return self._walk(subject_id, self.reverse, False, types)
+
+    def transitive_prerequisites(self, subject_id: int, types: Optional[Set[str]] = None) -> Set[int]:
+        return {e.related_subject_id for e in self.prerequisite_edges(subject_id, types)} - {subject_id}
+
+    def transitive_successors(self, subject_id: int, types: Optional[Set[str]] = None) -> Set[int]:
+        return {e.subject_id for e in self.successor_edges(subject_id, types)} - {subject_id}
+
+    def successor_levels(self, subject_id: int, types: Optional[Set[str]] = None,
+                         max_depth: Optional[int] = None) -> List[tuple]:
+        """
+        BFS over dependants: (subject_id, depth, edge) for every subject in the
+        successor closure, where depth is the shortest hop count and edge the
+        relationship through which it was first reached.
+        """
+        depth_of = {subject_id: 0}
+        result = []
+        frontier = [subject_id]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for edge in self.reverse.get(node, ()):
+                    if types and edge.type not in types:
+                        continue
+                    if edge.subject_id not in depth_of:
+                        depth_of[edge.subject_id] = depth
+                        result.append((edge.subject_id, depth, edge))
+                        next_frontier.append(edge.subject_id)
+            frontier = next_frontier
+        return result
+
+    def direct_prerequisites(self, subject_id: int) -> List[Edge]:
+        return list(self.forward.get(subject_id, ()))
+
+    def direct_successors(self, subject_id: int) -> List[Edge]:
+        return list(self.reverse.get(subject_id, ()))
+
+
+class CurriculumGraphService:
+    """
+    Process-wide cache of the curriculum graph. The graph is rebuilt from a
+    single query after add/remove of a relationship (local version bump) and
+    when another process bumped the shared version stored in Flask-Caching,
+    which is polled at most every VERSION_CHECK_INTERVAL seconds.
+    """
+    VERSION_KEY = 'curriculum_graph:version'
+    VERSION_CHECK_INTERVAL = 5.0
+    # Subject codes/names are denormalized into the graph; refresh them periodically
+    MAX_AGE = 300.0
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._graph: Optional[CurriculumGraph] = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_graph(self) -> CurriculumGraph:
+        graph = self._graph
+        now = time.monotonic()
+        if graph is not None and now - self._built_at < self.MAX_AGE:
+            if now - self._checked_at < self.VERSION_CHECK_INTERVAL:
+                return graph
+            self._checked_at = now
+            shared = self._shared_version()
+            if shared is None or shared == graph.version:
+                return graph
+
+        with self._lock:
+            if self._graph is not graph and self._graph is not None:
+                return self._graph
+            return self._rebuild()
+
+    def invalidate(self):
+        """Call after relationship changes; other processes see the new shared version"""
+        version = uuid.uuid4().hex
+        try:
+            cache.set(self.VERSION_KEY, version, timeout=0)
+        except Exception as e:
+            logger.debug(f"Curriculum graph version not shared: {e}")
+        with self._lock:
+            self._graph = None
+
+    def _shared_version(self) -> Optional[str]:
+        try:
+            return cache.get(self.VERSION_KEY)
+        except Exception:
+            # Cache not initialized (e.g. plain app.py runtime): local invalidation only
+            return None
+
+    def _rebuild(self) -> CurriculumGraph:
+        started = time.monotonic()
+        version = self._shared_version() or uuid.uuid4().hex
+        edges, subjects = [], {}
+        for row in self.repository.get_edge_list():
+            edges.append(Edge(row.id, row.subject_id, row.related_subject_id, row.type))
+            subjects[row.subject_id] = SubjectNode(row.subject_id, row.subject_code, row.subject_name)
+            subjects[row.related_subject_id] = SubjectNode(row.related_subject_id, row.related_code, row.related_name)
+        graph = CurriculumGraph(edges, subjects, version)
+        self._graph = graph
+        self._built_at = self._checked_at = time.monotonic()
+        logger.info(f"Curriculum graph loaded: {len(edges)} edges in {(self._built_at - started) * 1000:.1f}ms")
+        return graph
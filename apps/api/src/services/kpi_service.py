@@ -0,0 +1,192 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from domain.constants import WorkflowStatus
+from utils.caching import cache
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_PREFIX = 'status:'
+REVIEW_COUNT = 'review_count'
+REVIEW_SECONDS = 'review_seconds'
+RECONCILE_QUEUED_KEY = 'kpi:reconcile_queued'
+# Chỉ tính là đang chờ duyệt nếu thuộc 3 trạng thái này
+PENDING_STATUSES = (WorkflowStatus.PENDING_REVIEW, WorkflowStatus.PENDING_APPROVAL, WorkflowStatus.APPROVED)
+
+
+def _status_key(status: Optional[str]) -> str:
+    return STATUS_PREFIX + ((status or '').upper() or 'NONE')
+
+
+class KpiService:
+    """
+    KPI rollup maintained incrementally from workflow events.
+
+    Syllabus counts per status and the first submit/approve timestamps of
+    every syllabus are updated when the event happens (create, delete,
+    submit, evaluate), so the dashboard reads a handful of counter rows
+    instead of scanning syllabuses and workflow_logs. Recording never fails
+    the workflow action; the periodic reconcile() rebuilds the rollup from
+    the source tables and repairs any drift.
+
+    Callers take lock() (shared application lock) at the start of the
+    transaction that changes syllabuses and record with commit=False, so the
+    rollup delta commits atomically with the change; reconcile() holds the
+    lock exclusively while it reads and replaces. Taking the lock before any
+    syllabus row lock keeps the lock order the same as reconcile's.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    # ------------------------------------------------------------------ #
+    # Read
+    # ------------------------------------------------------------------ #
+    def get_kpis(self) -> Dict[str, Any]:
+        counters = self.repository.get_counters()
+        if not counters:
+            # first read after deployment: live status counts, the rollup is built in the background
+            counters = {_status_key(status): count for status, count in self.repository.count_by_status().items()}
+            self._queue_reconcile()
+
+        by_status = {name[len(STATUS_PREFIX):]: value for name, value in counters.items()
+                     if name.startswith(STATUS_PREFIX) and value}
+        total = sum(by_status.values())
+        pending = sum(by_status.get(s, 0) for s in PENDING_STATUSES)
+        completed_count = by_status.get(WorkflowStatus.PUBLISHED, 0)
+        review_count = counters.get(REVIEW_COUNT, 0)
+        avg_hours = counters.get(REVIEW_SECONDS, 0) / review_count / 3600 if review_count else 0
+
+        return {
+            "total_syllabuses": total,
+            "pending_count": pending,
+            "completed_count": completed_count,
+            "avg_review_time_hours": round(avg_hours, 1),
+            "compliance_rate": round((total - pending) / total * 100, 1) if total > 0 else 0,
+            "status_counts": by_status
+        }
+
+    # ------------------------------------------------------------------ #
+    # Events
+    # ------------------------------------------------------------------ #
+    def lock(self) -> bool:
+        """Shared rollup lock for the caller's transaction; False if it could not be taken"""
+        try:
+            self.repository.lock_rollup(exclusive=False)
+            return True
+        except Exception as e:
+            logger.warning(f"KPI rollup lock not taken: {e}")
+            return False
+
+    def record_created(self, status: Optional[str], commit: bool = True):
+        self._apply(lambda: self.repository.increment({_status_key(status): 1}, commit=False), commit)
+
+    def record_deleted(self, syllabus_id: int, status: Optional[str], commit: bool = True):
+        def apply():
+            deltas = {_status_key(status): -1}
+            timing = self.repository.delete_timing(syllabus_id)
+            if timing and timing.review_seconds is not None:
+                deltas[REVIEW_COUNT] = -1
+                deltas[REVIEW_SECONDS] = -timing.review_seconds
+            self.repository.increment(deltas, commit=False)
+        self._apply(apply, commit)
+
+    def record_transition(self, syllabus_id: int, action: str, from_status: Optional[str],
+                          to_status: Optional[str], at: datetime = None, commit: bool = True):
+        def apply():
+            when = at or datetime.now()
+            deltas = {}
+            if (from_status or '').upper() != (to_status or '').upper():
+                deltas[_status_key(from_status)] = -1
+                deltas[_status_key(to_status)] = 1
+            if action == 'SUBMIT':
+                self.repository.record_submit(syllabus_id, when)
+            elif action == 'APPROVE':
+                seconds = self.repository.record_approve(syllabus_id, when)
+                if seconds is not None:
+                    deltas[REVIEW_COUNT] = 1
+                    deltas[REVIEW_SECONDS] = seconds
+            self.repository.increment(deltas, commit=False)
+        self._apply(apply, commit)
+
+    def _apply(self, fn, commit: bool = True):
+        """
+        commit=False: stage in the caller's transaction (which holds lock()) inside a
+        savepoint, so a rollup failure never fails the syllabus change itself.
+        commit=True: own transaction, for callers whose change is already committed.
+        """
+        session = self.repository.session
+        if not commit:
+            try:
+                with session.begin_nested():
+                    fn()
+            except Exception as e:
+                # Savepoint rolled back; reconciliation repairs the rollup
+                logger.warning(f"KPI rollup not updated: {e}")
+            return
+        try:
+            self.repository.lock_rollup(exclusive=False)
+            fn()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"KPI rollup not updated: {e}")
+
+    # ------------------------------------------------------------------ #
+    # Reconciliation
+    # ------------------------------------------------------------------ #
+    def _queue_reconcile(self):
+        try:
+            # one queued rebuild per 5 minutes, however many dashboards are open
+            if not cache.add(RECONCILE_QUEUED_KEY, True, timeout=300):
+                return
+        except Exception:
+            pass
+        try:
+            from tasks import reconcile_kpi_rollup_task
+            reconcile_kpi_rollup_task.delay()
+        except Exception as e:
+            logger.warning(f"KPI reconcile not queued: {e}")
+
+    def reconcile(self) -> Dict[str, int]:
+        """Rebuild counters and review timings from syllabuses and workflow_logs"""
+        started = datetime.now()
+        try:
+            # Held until the commit below: increments wait instead of being overwritten
+            self.repository.lock_rollup(exclusive=True)
+        except Exception:
+            self.repository.session.rollback()
+            raise
+        counters = {_status_key(status): count for status, count in self.repository.count_by_status().items()}
+
+        timings = []
+        review_count = review_seconds = 0
+        for row in self.repository.scan_review_timings():
+            item = {'syllabus_id': row.syllabus_id, 'submitted_at': row.submitted_at,
+                    'approved_at': None, 'review_seconds': None}
+            if row.approved_at and row.submitted_at and row.approved_at > row.submitted_at:
+                seconds = int((row.approved_at - row.submitted_at).total_seconds())
+                item.update(approved_at=row.approved_at, review_seconds=seconds)
+                review_count += 1
+                review_seconds += seconds
+            timings.append(item)
+        counters[REVIEW_COUNT] = review_count
+        counters[REVIEW_SECONDS] = review_seconds
+
+        previous = self.repository.get_counters()
+        drift = {name: value - previous.get(name, 0) for name, value in counters.items()
+                 if value != previous.get(name, 0)}
+        try:
+            self.repository.replace_timings(timings, commit=False)
+            self.repository.replace_counters(counters, commit=False)
+            self.repository.session.commit()
+        except Exception:
+            self.repository.session.rollback()
+            raise
+
+        if previous and drift:
+            logger.warning(f"KPI rollup drift corrected: {drift}")
+        logger.info(f"KPI rollup reconciled: {len(timings)} review timings in "
+                    f"{(datetime.now() - started).total_seconds():.1f}s")
+        return counters
@@ -0,0 +1,207 @@
+import json
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from domain.constants import WorkflowStatus
+from services.kpi_service import PENDING_STATUSES
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds (hours) of the duration histogram buckets; one overflow bucket follows
+HISTOGRAM_EDGES = (1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 240, 336, 504, 720)
+PERCENTILES = (50, 90, 95)
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linear interpolation between closest ranks"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _histogram(values: List[float]) -> List[int]:
+    buckets = [0] * (len(HISTOGRAM_EDGES) + 1)
+    for v in values:
+        i = 0
+        while i < len(HISTOGRAM_EDGES) and v > HISTOGRAM_EDGES[i]:
+            i += 1
+        buckets[i] += 1
+    return buckets
+
+
+def _histogram_percentile(buckets: List[int], q: float) -> Optional[float]:
+    """Percentile estimate from merged bucket counts, interpolated inside the bucket"""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = total * q / 100.0
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            lower = HISTOGRAM_EDGES[i - 1] if i > 0 else 0
+            if i >= len(HISTOGRAM_EDGES):
+                return float(lower)  # overflow bucket has no upper bound
+            return lower + (HISTOGRAM_EDGES[i] - lower) * (rank - seen) / count
+        seen += count
+    return float(HISTOGRAM_EDGES[-1])
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+class KpiTrendService:
+    """
+    Daily KPI time series: one row per day x faculty x status written by a
+    beat job, holding the end-of-day backlog and the day's transitions with
+    precomputed duration percentiles and a small histogram. Trend endpoints
+    read date ranges from this table only; range percentiles are merged from
+    the histograms instead of re-reading workflow_logs.
+    """
+    MAX_RANGE_DAYS = 366
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    # ------------------------------------------------------------------ #
+    # Daily job
+    # ------------------------------------------------------------------ #
+    def snapshot_day(self, day: date = None) -> int:
+        """Write the rows of one (finished) day; defaults to yesterday"""
+        today = date.today()
+        day = day or today - timedelta(days=1)
+        start = datetime.combine(day, time.min)
+        end = start + timedelta(days=1)
+
+        # The live status table is the end-of-day state only for the day that just ended
+        if day >= today - timedelta(days=1):
+            backlog = self.repository.current_backlog()
+        else:
+            backlog = self.repository.backlog_as_of(end)
+
+        rows: Dict[tuple, Dict[str, Any]] = {}
+
+        def row(faculty_id, status):
+            key = (faculty_id, (status or 'NONE').upper())
+            if key not in rows:
+                rows[key] = {'day': day, 'faculty_id': faculty_id, 'status': key[1],
+                             'syllabus_count': 0, 'entered_count': 0, 'durations': []}
+            return rows[key]
+
+        for r in backlog:
+            row(r.faculty_id, r.status)['syllabus_count'] += int(r.count)
+        for r in self.repository.transitions_between(start, end):
+            item = row(r.faculty_id, r.status)
+            item['entered_count'] += 1
+            if r.submitted_at and r.created_at >= r.submitted_at:
+                item['durations'].append((r.created_at - r.submitted_at).total_seconds() / 3600)
+
+        records = []
+        for item in rows.values():
+            durations = sorted(item.pop('durations'))
+            item.update({
+                'duration_avg_hours': sum(durations) / len(durations) if durations else None,
+                'duration_p50_hours': _percentile(durations, 50),
+                'duration_p90_hours': _percentile(durations, 90),
+                'duration_p95_hours': _percentile(durations, 95),
+                'duration_histogram': json.dumps(_histogram(durations)) if durations else None,
+            })
+            records.append(item)
+
+        self.repository.replace_day(day, records)
+        logger.info(f"KPI daily snapshot for {day}: {len(records)} rows")
+        return len(records)
+
+    # ------------------------------------------------------------------ #
+    # Trends
+    # ------------------------------------------------------------------ #
+    def _range(self, start: Optional[date], end: Optional[date]):
+        end = end or (self.repository.get_latest_day() or date.today() - timedelta(days=1))
+        start = start or end - timedelta(days=29)
+        if start > end:
+            raise ValueError('Ngày bắt đầu phải trước ngày kết thúc')
+        if (end - start).days >= self.MAX_RANGE_DAYS:
+            raise ValueError(f'Khoảng thời gian tối đa là {self.MAX_RANGE_DAYS} ngày')
+        return start, end
+
+    def get_backlog_trend(self, start: date = None, end: date = None, faculty_id: int = None,
+                          statuses: List[str] = None) -> Dict[str, Any]:
+        """End-of-day syllabus counts per day (pending statuses by default)"""
+        start, end = self._range(start, end)
+        statuses = [s.upper() for s in statuses] if statuses else list(PENDING_STATUSES)
+
+        series: Dict[date, Dict[str, Any]] = {}
+        for r in self.repository.get_range(start, end, faculty_id, statuses):
+            point = series.setdefault(r.day, {'day': r.day.isoformat(), 'total': 0,
+                                              'by_status': {s: 0 for s in statuses}, 'entered': 0})
+            point['total'] += r.syllabus_count or 0
+            point['by_status'][r.status] = point['by_status'].get(r.status, 0) + (r.syllabus_count or 0)
+            point['entered'] += r.entered_count or 0
+
+        points = [series[d] for d in sorted(series)]
+        return {
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'faculty_id': faculty_id,
+            'statuses': statuses,
+            'series': points,
+            'change': points[-1]['total'] - points[0]['total'] if points else 0,
+        }
+
+    def get_review_time_trend(self, start: date = None, end: date = None, faculty_id: int = None,
+                              status: str = None) -> Dict[str, Any]:
+        """
+        Hours from first submission to reaching `status` (PUBLISHED by default),
+        per faculty: daily precomputed percentiles and range percentiles merged
+        from the daily histograms.
+        """
+        start, end = self._range(start, end)
+        status = (status or WorkflowStatus.PUBLISHED).upper()
+        names = self.repository.get_faculty_names()
+
+        faculties: Dict[Optional[int], Dict[str, Any]] = {}
+        for r in self.repository.get_range(start, end, faculty_id, [status]):
+            if not r.entered_count:
+                continue
+            entry = faculties.setdefault(r.faculty_id, {
+                'faculty_id': r.faculty_id, 'faculty_name': names.get(r.faculty_id),
+                'series': [], 'buckets': [0] * (len(HISTOGRAM_EDGES) + 1), 'count': 0, 'hours': 0.0
+            })
+            entry['series'].append({
+                'day': r.day.isoformat(),
+                'count': r.entered_count,
+                'avg_hours': _round(r.duration_avg_hours),
+                'p50_hours': _round(r.duration_p50_hours),
+                'p90_hours': _round(r.duration_p90_hours),
+                'p95_hours': _round(r.duration_p95_hours),
+            })
+            if r.duration_histogram:
+                buckets = json.loads(r.duration_histogram)
+                entry['buckets'] = [a + b for a, b in zip(entry['buckets'], buckets)]
+                measured = sum(buckets)
+                entry['count'] += measured
+                entry['hours'] += (r.duration_avg_hours or 0) * measured
+
+        result = []
+        for entry in faculties.values():
+            buckets = entry.pop('buckets')
+            count, hours = entry.pop('count'), entry.pop('hours')
+            entry['summary'] = dict(
+                count=count,
+                avg_hours=_round(hours / count) if count else None,
+                **{f'p{q}_hours': _round(_histogram_percentile(buckets, q)) for q in PERCENTILES}
+            )
+            result.append(entry)
+        result.sort(key=lambda e: (e['faculty_name'] is None, e['faculty_name'] or ''))
+
+        return {
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'status': status,
+            'histogram_edges_hours': list(HISTOGRAM_EDGES),
+            'faculties': result,
+        }
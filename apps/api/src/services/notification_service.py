@@ -50,6 +50,35 @@ class NotificationService:
         
         return notif
 
+    def send_bulk(self, user_ids: List[int], title: str, message: str, link: str = None, type: str = 'SYSTEM',
+                  event_name: str = 'new_notification', send_email: bool = True, chunk_size: int = 500) -> int:
+        """Same notification to many users: one insert/commit per chunk instead of one per user"""
+        user_ids = list(dict.fromkeys(user_ids))
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            notifs = self.repository.create_many([{
+                'user_id': uid,
+                'title': title,
+                'message': message,
+                'link': link,
+                'type': type,
+                'is_read': False
+            } for uid in chunk])
+            for notif in notifs:
+                notify_user(notif['user_id'], event_name, {
+                    'id': notif['id'],
+                    'title': title,
+                    'message': message,
+                    'link': link,
+                    'type': type,
+                    'is_read': False,
+                    'created_at': notif['created_at'].isoformat()
+                })
+            if send_email and self.email_service and self.user_repository:
+                for user in self.user_repository.get_by_ids(chunk):
+                    self.email_service.notify_user(user, title, message)
+        return len(user_ids)
+
     def notify_roles(self, roles: List[str], title: str, message: str, link: str = None, type: str = 'SYSTEM', event_name: str = 'new_notification'):
         """Send notification to all users belonging to specific roles"""
         if not self.user_repository:
@@ -0,0 +1,112 @@
+import json
+import os
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class OutboxService:
+    """
+    Transactional outbox dispatcher.
+
+    Events are inserted by the code that changes state, in the same
+    transaction. dispatch_pending() claims due events one by one with a lease,
+    runs every consumer registered for the event type and records which
+    consumers succeeded, so a retry (exponential backoff, then FAILED) only
+    re-runs the ones that failed.
+    """
+    LEASE_SECONDS = 300
+    MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 6))
+    BACKOFF_BASE_SECONDS = 30
+    BACKOFF_MAX_SECONDS = 3600
+    RETENTION_DAYS = int(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+
+    def __init__(self, repository, handlers=None):
+        self.repository = repository
+        self.handlers = handlers
+
+    def _consumers(self, event_type: str) -> List[Tuple[str, Callable]]:
+        registry: Dict[str, List[Tuple[str, Callable]]] = self.handlers.consumers() if self.handlers else {}
+        return registry.get(event_type, [])
+
+    @staticmethod
+    def kick():
+        """Ask a worker to dispatch now; the periodic sweep covers a missing broker"""
+        try:
+            from tasks import dispatch_outbox_task
+            dispatch_outbox_task.delay()
+        except Exception as e:
+            logger.debug(f"Outbox dispatch not queued, sweep will pick it up: {e}")
+
+    # ------------------------------------------------------------------ #
+    # Dispatch
+    # ------------------------------------------------------------------ #
+    def dispatch_pending(self, limit: int = 100) -> int:
+        dispatched = 0
+        for event_id in self.repository.get_due_ids(limit):
+            event = self.repository.claim(event_id, self.LEASE_SECONDS)
+            if event is None:
+                continue  # taken by another worker
+            if self._dispatch(event):
+                dispatched += 1
+        return dispatched
+
+    def _dispatch(self, event) -> bool:
+        payload = json.loads(event.payload)
+        handled = json.loads(event.handled) if event.handled else []
+        errors = []
+        for name, consumer in self._consumers(event.event_type):
+            if name in handled:
+                continue
+            try:
+                consumer(payload)
+                handled.append(name)
+            except Exception as e:
+                self.repository.session.rollback()
+                errors.append(f"{name}: {e}")
+                logger.warning(f"Outbox event {event.id} ({event.event_type}) consumer {name} failed: {e}")
+                logger.debug(traceback.format_exc())
+
+        if not errors:
+            self.repository.mark_dispatched(event.id)
+            return True
+
+        self.repository.save_progress(event.id, handled)
+        retry_at = None
+        if event.attempts < self.MAX_ATTEMPTS:
+            delay = min(self.BACKOFF_BASE_SECONDS * 2 ** (event.attempts - 1), self.BACKOFF_MAX_SECONDS)
+            retry_at = datetime.now() + timedelta(seconds=delay)
+        else:
+            logger.error(f"Outbox event {event.id} ({event.event_type}) gave up after {event.attempts} attempts")
+        self.repository.mark_failed(event.id, ' | '.join(errors), retry_at)
+        return False
+
+    # ------------------------------------------------------------------ #
+    # Admin
+    # ------------------------------------------------------------------ #
+    def list_events(self, status: str = None, limit: int = 50):
+        return [{
+            'id': e.id,
+            'event_type': e.event_type,
+            'aggregate_type': e.aggregate_type,
+            'aggregate_id': e.aggregate_id,
+            'status': e.status,
+            'attempts': e.attempts,
+            'handled': json.loads(e.handled) if e.handled else [],
+            'last_error': e.last_error,
+            'created_at': e.created_at.isoformat() if e.created_at else None,
+            'dispatched_at': e.dispatched_at.isoformat() if e.dispatched_at else None,
+        } for e in self.repository.list(status, limit)]
+
+    def retry(self, event_id: int) -> bool:
+        ok = self.repository.requeue(event_id)
+        if ok:
+            self.kick()
+        return ok
+
+    def purge(self) -> int:
+        return self.repository.purge_dispatched(datetime.now() - timedelta(days=self.RETENTION_DAYS))
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.logging_config import get_logger
+
+try:
+    import numpy as np
+except ImportError:  # shipped with sentence-transformers; suggestions are disabled without it
+    np = None
+
+logger = get_logger(__name__)
+
+
+class PloSuggestionService:
+    """
+    Instant CLO -> PLO mapping suggestions from local sentence embeddings.
+
+    PLO descriptions of a program are embedded once and kept as a normalized
+    matrix per process; a fingerprint of the PLO rows detects edits so the
+    matrix is rebuilt only when the program outcomes change. Scoring a batch
+    of CLOs is a single matrix product, no LLM round trip.
+    """
+    DEFAULT_TOP_K = 3
+
+    def __init__(self, search_service, program_outcome_repository, syllabus_clo_repository=None,
+                 syllabus_repository=None):
+        self.search_service = search_service
+        self.program_outcome_repository = program_outcome_repository
+        self.syllabus_clo_repository = syllabus_clo_repository
+        self.syllabus_repository = syllabus_repository
+        self._matrices: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # PLO matrix cache
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _fingerprint(plos) -> str:
+        raw = '\n'.join(f"{p.id}\t{p.code}\t{p.description or ''}" for p in plos)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _plo_matrix(self, program_id: int) -> Optional[Dict[str, Any]]:
+        plos = [p for p in self.program_outcome_repository.get_by_program_id(program_id) if p.description]
+        if not plos:
+            return None
+        fingerprint = self._fingerprint(plos)
+        entry = self._matrices.get(program_id)
+        if entry and entry['fingerprint'] == fingerprint:
+            return entry
+
+        with self._lock:
+            entry = self._matrices.get(program_id)
+            if entry and entry['fingerprint'] == fingerprint:
+                return entry
+            matrix = self.search_service.embed(f"{p.code}: {p.description}" for p in plos)
+            if matrix is None:
+                return None
+            entry = {
+                'fingerprint': fingerprint,
+                'plos': [{'id': p.id, 'code': p.code, 'description': p.description} for p in plos],
+                'matrix': np.asarray(matrix, dtype=np.float32)
+            }
+            self._matrices[program_id] = entry
+            logger.info(f"PLO embedding matrix built for program {program_id} ({len(plos)} PLOs)")
+            return entry
+
+    # ------------------------------------------------------------------ #
+    # Suggestions
+    # ------------------------------------------------------------------ #
+    def suggest(self, program_id: int, clo_texts: List[str], top_k: int = None,
+                min_score: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Top-k PLOs (with cosine score) for each CLO text, in input order"""
+        if np is None:
+            raise RuntimeError('numpy is not installed')
+        if not clo_texts:
+            return []
+        entry = self._plo_matrix(program_id)
+        if entry is None:
+            return [[] for _ in clo_texts]
+        clo_matrix = self.search_service.embed(clo_texts)
+        if clo_matrix is None:
+            raise RuntimeError('Embedding model is not available')
+
+        scores = np.asarray(clo_matrix, dtype=np.float32) @ entry['matrix'].T
+        k = max(1, min(top_k or self.DEFAULT_TOP_K, scores.shape[1]))
+        # argpartition keeps the top-k selection linear in the number of PLOs
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = sorted(candidates, key=lambda c: -scores[row, c])
+            results.append([
+                dict(entry['plos'][c], score=round(float(scores[row, c]), 4))
+                for c in ranked if scores[row, c] >= min_score
+            ])
+        return results
+
+    def suggest_for_clo(self, clo_id: int, top_k: int = None) -> Optional[Dict[str, Any]]:
+        clo = self.syllabus_clo_repository.get_by_id(clo_id)
+        if not clo:
+            return None
+        if not clo.description or not clo.syllabus:
+            # nothing to embed (same rule as suggest_for_syllabus)
+            return {'clo_id': clo.id, 'code': clo.code, 'suggestions': []}
+        suggestions = self.suggest(clo.syllabus.program_id, [clo.description], top_k)
+        return {'clo_id': clo.id, 'code': clo.code, 'suggestions': suggestions[0]}
+
+    def suggest_for_syllabus(self, syllabus_id: int, top_k: int = None) -> Optional[List[Dict[str, Any]]]:
+        syllabus = self.syllabus_repository.get_by_id(syllabus_id)
+        if not syllabus:
+            return None
+        clos = [c for c in self.syllabus_clo_repository.get_by_syllabus_id(syllabus_id) if c.description]
+        suggestions = self.suggest(syllabus.program_id, [c.description for c in clos], top_k)
+        return [{'clo_id': c.id, 'code': c.code, 'suggestions': s} for c, s in zip(clos, suggestions)]
@@ -0,0 +1,199 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from domain.constants import WorkflowStatus
+from utils.caching import cache
+from utils.logging_config import get_logger
+
+try:
+    import numpy as np
+except ImportError:  # shipped with sentence-transformers; the coverage matrix is disabled without it
+    np = None
+
+logger = get_logger(__name__)
+
+# Contribution levels in increasing order; the matrix stores 1..4, 0 = not mapped
+LEVELS = ('I', 'R', 'M', 'A')
+_LEVEL_CODE = {level: i + 1 for i, level in enumerate(LEVELS)}
+MASTERED = _LEVEL_CODE['M']
+
+
+class ProgramCoverageService:
+    """
+    Program CLO x PLO coverage matrix.
+
+    The mappings of the latest syllabus of every subject (approved/published
+    by default, so a new draft does not replace the published version) come
+    from a single query and are pivoted into a dense int8 matrix (CLO rows, PLO columns);
+    per-PLO and per-subject aggregates are NumPy reductions over that matrix.
+    Results are cached per program under a version token that is bumped
+    whenever mappings of the program change.
+    """
+    CACHE_TIMEOUT = 600
+    VERSION_KEY = 'program_coverage:version:{}'
+    RESULT_KEY = 'program_coverage:{}:{}:{}'
+    DEFAULT_STATUSES = WorkflowStatus.PUBLIC_STATUSES
+
+    def __init__(self, repository, program_outcome_repository):
+        self.repository = repository
+        self.program_outcome_repository = program_outcome_repository
+        # (program_id, status scope) -> (version, built_at, result); used when Flask-Caching is not initialized
+        self._local: Dict[tuple, tuple] = {}
+        self._local_versions: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # Cache
+    # ------------------------------------------------------------------ #
+    def _version(self, program_id: int) -> str:
+        try:
+            shared = cache.get(self.VERSION_KEY.format(program_id))
+            if shared:
+                return shared
+        except Exception:
+            pass
+        return self._local_versions.get(program_id, '0')
+
+    def invalidate(self, program_id: Optional[int]):
+        """Call after CLOs, CLO-PLO mappings or syllabuses of the program changed"""
+        if not program_id:
+            return
+        version = uuid.uuid4().hex
+        try:
+            cache.set(self.VERSION_KEY.format(program_id), version, timeout=0)
+        except Exception as e:
+            logger.debug(f"Coverage version not shared: {e}")
+        with self._lock:
+            self._local_versions[program_id] = version
+            for key in [k for k in self._local if k[0] == program_id]:
+                self._local.pop(key, None)
+
+    def get_program_coverage(self, program_id: int, use_cache: bool = True,
+                             statuses: Optional[Sequence[str]] = DEFAULT_STATUSES) -> Dict[str, Any]:
+        """statuses: syllabus statuses eligible as a subject's latest version; None = any (drafts included)"""
+        if np is None:
+            raise RuntimeError('numpy is not installed')
+
+        statuses = sorted({s.upper() for s in statuses}) if statuses else None
+        scope = ','.join(statuses) if statuses else 'all'
+        version = self._version(program_id)
+        result_key = self.RESULT_KEY.format(program_id, scope, version)
+        if use_cache:
+            local = self._local.get((program_id, scope))
+            if local and local[0] == version and time.monotonic() - local[1] < self.CACHE_TIMEOUT:
+                return local[2]
+            try:
+                cached = cache.get(result_key)
+                if cached is not None:
+                    return cached
+            except Exception:
+                pass
+
+        started = time.monotonic()
+        result = self._build(program_id, statuses)
+        result['version'] = version
+        result['statuses'] = statuses
+        logger.info(f"Coverage matrix for program {program_id}: {len(result['clos'])} CLOs x "
+                    f"{len(result['plos'])} PLOs in {(time.monotonic() - started) * 1000:.1f}ms")
+
+        with self._lock:
+            self._local[(program_id, scope)] = (version, time.monotonic(), result)
+        try:
+            cache.set(result_key, result, timeout=self.CACHE_TIMEOUT)
+        except Exception:
+            pass
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Matrix
+    # ------------------------------------------------------------------ #
+    def _build(self, program_id: int, statuses: Optional[List[str]] = None) -> Dict[str, Any]:
+        plos = sorted(self.program_outcome_repository.get_by_program_id(program_id), key=lambda p: (p.code or ''))
+        rows = self.repository.get_program_matrix_rows(program_id, statuses)
+
+        plo_col = {p.id: j for j, p in enumerate(plos)}
+        clos: List[Dict[str, Any]] = []
+        clo_row: Dict[int, int] = {}
+        subjects: List[Dict[str, Any]] = []
+        subject_start: List[int] = []
+        cells_i, cells_j, cells_v = [], [], []
+        for r in rows:
+            if r.clo_id not in clo_row:
+                if not subjects or subjects[-1]['syllabus_id'] != r.syllabus_id:
+                    subjects.append({'syllabus_id': r.syllabus_id, 'subject_id': r.subject_id,
+                                     'code': r.subject_code, 'name': r.subject_name})
+                    subject_start.append(len(clos))
+                clo_row[r.clo_id] = len(clos)
+                clos.append({'id': r.clo_id, 'code': r.clo_code, 'syllabus_id': r.syllabus_id,
+                             'subject_code': r.subject_code})
+            code = _LEVEL_CODE.get((r.level or '').upper())
+            if r.plo_id in plo_col and code:
+                cells_i.append(clo_row[r.clo_id])
+                cells_j.append(plo_col[r.plo_id])
+                cells_v.append(code)
+
+        matrix = np.zeros((len(clos), len(plos)), dtype=np.int8)
+        if cells_v:
+            # maximum.at keeps the strongest level if a pair appears twice
+            np.maximum.at(matrix, (np.asarray(cells_i), np.asarray(cells_j)), np.asarray(cells_v, dtype=np.int8))
+        # subject x PLO: strongest level among the subject's CLOs (rows are grouped by syllabus)
+        if len(clos):
+            subject_matrix = np.maximum.reduceat(matrix, np.asarray(subject_start), axis=0)
+        else:
+            subject_matrix = np.zeros((0, len(plos)), dtype=np.int8)
+
+        return {
+            'program_id': program_id,
+            'levels': list(LEVELS),
+            'plos': [{'id': p.id, 'code': p.code, 'description': p.description} for p in plos],
+            'subjects': [dict(s, levels=self._letters(subject_matrix[k])) for k, s in enumerate(subjects)],
+            'clos': [dict(c, levels=self._letters(matrix[k])) for k, c in enumerate(clos)],
+            'plo_coverage': self._plo_aggregates(plos, matrix, subject_matrix),
+            'summary': self._summary(plos, matrix, subject_matrix),
+        }
+
+    @staticmethod
+    def _letters(row) -> List[Optional[str]]:
+        return [LEVELS[v - 1] if v else None for v in row.tolist()]
+
+    @staticmethod
+    def _plo_aggregates(plos, matrix, subject_matrix) -> List[Dict[str, Any]]:
+        subject_total = subject_matrix.shape[0]
+        clo_count = np.count_nonzero(matrix, axis=0)
+        subject_count = np.count_nonzero(subject_matrix, axis=0)
+        # (PLO, level) counts of subjects at each level: one broadcast comparison
+        level_counts = (subject_matrix[:, :, None] == np.arange(1, len(LEVELS) + 1)).sum(axis=0)
+        max_level = subject_matrix.max(axis=0) if subject_total else np.zeros(len(plos), dtype=np.int8)
+        ratio = subject_count / subject_total if subject_total else np.zeros(len(plos))
+
+        return [{
+            'plo_id': p.id,
+            'plo': p.code,
+            'clo_count': int(clo_count[j]),
+            'subject_count': int(subject_count[j]),
+            'coverage_ratio': round(float(ratio[j]), 4),
+            'level_counts': {level: int(level_counts[j, k]) for k, level in enumerate(LEVELS)},
+            'max_level': LEVELS[int(max_level[j]) - 1] if max_level[j] else None,
+            'covered': bool(subject_count[j]),
+            # reached M or A somewhere in the program
+            'mastered': bool(max_level[j] >= MASTERED),
+        } for j, p in enumerate(plos)]
+
+    @staticmethod
+    def _summary(plos, matrix, subject_matrix) -> Dict[str, Any]:
+        covered = np.count_nonzero(subject_matrix, axis=0) > 0 if len(plos) else np.zeros(0, dtype=bool)
+        mastered = (subject_matrix.max(axis=0) >= MASTERED) if subject_matrix.size else np.zeros(len(plos), dtype=bool)
+        unmapped = ~matrix.any(axis=1) if matrix.size else np.ones(matrix.shape[0], dtype=bool)
+        return {
+            'subject_count': int(subject_matrix.shape[0]),
+            'clo_count': int(matrix.shape[0]),
+            'plo_count': len(plos),
+            'mapping_count': int(np.count_nonzero(matrix)),
+            'density': round(float(np.count_nonzero(matrix) / matrix.size), 4) if matrix.size else 0.0,
+            'covered_plo_count': int(covered.sum()),
+            'uncovered_plos': [p.code for j, p in enumerate(plos) if not covered[j]],
+            'not_mastered_plos': [p.code for j, p in enumerate(plos) if covered[j] and not mastered[j]],
+            'unmapped_clo_count': int(unmapped.sum()),
+        }
@@ -1,6 +1,9 @@
 from elasticsearch import Elasticsearch
 import os
 import logging
+import threading
+from utils import metrics
+from utils import request_context
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,37 @@ class SearchService:
         self._model = None
         self.es = None
         self._init_done = False
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+
+    def _load_model(self):
+        """Load the SentenceTransformer once; independent of the Elasticsearch connection."""
+        if self._model_loaded:
+            return
+        with self._model_lock:
+            if self._model_loaded:
+                return
+            try:
+                from sentence_transformers import SentenceTransformer
+                logger.info("Loading SentenceTransformer model (this may take a while on first run)...")
+                self._model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+                logger.info("SentenceTransformer model loaded successfully.")
+            except ImportError:
+                logger.warning("sentence-transformers not installed. Semantic search will be disabled.")
+            except Exception as e:
+                logger.error(f"Error loading SentenceTransformer: {e}")
+            self._model_loaded = True
+
+    def embed(self, texts):
+        """
+        L2-normalized embeddings (numpy array, one row per text) so a dot product
+        is the cosine similarity. Returns None when the model is unavailable.
+        Does not touch Elasticsearch.
+        """
+        self._load_model()
+        if self._model is None:
+            return None
+        return self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
 
     def _lazy_init(self):
         """Initialize heavy dependencies only when needed."""
@@ -21,15 +55,7 @@ class SearchService:
             return
             
         # 1. Load AI Model
-        try:
-            from sentence_transformers import SentenceTransformer
-            logger.info("Loading SentenceTransformer model (this may take a while on first run)...")
-            self._model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-            logger.info("SentenceTransformer model loaded successfully.")
-        except ImportError:
-            logger.warning("sentence-transformers not installed. Semantic search will be disabled.")
-        except Exception as e:
-            logger.error(f"Error loading SentenceTransformer: {e}")
+        self._load_model()
 
         # 2. Connect to ES
         try:
@@ -52,6 +78,11 @@ class SearchService:
             self._lazy_init()
         return self._model
 
+    def _client(self):
+        """ES client tagged with the current request id (X-Opaque-Id shows up in ES slow logs/tasks)"""
+        request_id = request_context.get_request_id()
+        return self.es.options(opaque_id=request_id) if request_id else self.es
+
     def _ensure_index_exists(self):
         """Ensure the 'syllabuses' index exists with the correct mapping for vector search."""
         if not self.es:
@@ -99,7 +130,8 @@ class SearchService:
                     embedding = self.model.encode(text_to_embed).tolist()
                     content_dict["content_vector"] = embedding
 
-            res = self.es.index(index="syllabuses", id=syllabus_id, document=content_dict)
+            with metrics.timed('elasticsearch', 'index'):
+                res = self._client().index(index="syllabuses", id=syllabus_id, document=content_dict)
             return res['result'] in ['created', 'updated']
         except Exception as e:
             logger.error(f"Indexing error for syllabus {syllabus_id}: {e}")
@@ -184,7 +216,8 @@ class SearchService:
                 }
             }
 
-            res = self.es.search(index="syllabuses", body=body)
+            with metrics.timed('elasticsearch', 'search'):
+                res = self._client().search(index="syllabuses", body=body)
             hits = res['hits']['hits']
             return [
                 {
@@ -205,7 +238,8 @@ class SearchService:
         if not self.es:
             return False
         try:
-            self.es.delete(index="syllabuses", id=syllabus_id)
+            with metrics.timed('elasticsearch', 'delete'):
+                self._client().delete(index="syllabuses", id=syllabus_id)
             return True
         except Exception as e:
             logger.error(f"Delete index error: {e}")
@@ -2,53 +2,24 @@ from typing import List
 from infrastructure.repositories.subject_relationship_repository import SubjectRelationshipRepository
 
 class SubjectRelationshipService:
-    def __init__(self, repository: SubjectRelationshipRepository, subject_repository=None):
+    def __init__(self, repository: SubjectRelationshipRepository, subject_repository=None, graph_service=None):
         self.repository = repository
         self.subject_repository = subject_repository
+        self.graph_service = graph_service
 
     def get_relationships(self, subject_id: int) -> List:
         return self.repository.get_by_subject(subject_id)
 
     def get_tree(self, subject_id: int):
         """
-        Get recursive pre-reqs and successors for a subject tree view.
-        Uses a visited set to avoid infinite loops in cyclical dependencies.
+        Transitive pre-reqs and successors for a subject tree view, answered
+        from the cached in-memory curriculum graph (cycle safe).
         """
-        prerequisites = []
-        successors = []
-        
-        # Helper for recursive search
-        def find_prereqs(sid, visited):
-            if sid in visited:
-                return
-            visited.add(sid)
-            
-            rels = self.repository.get_by_subject(sid)
-            for r in rels:
-                if r not in prerequisites:
-                    prerequisites.append(r)
-                if r.related_subject_id:
-                    find_prereqs(r.related_subject_id, visited)
-
-        def find_successors(sid, visited):
-            if sid in visited:
-                return
-            visited.add(sid)
-            
-            rels = self.repository.get_successors(sid)
-            for r in rels:
-                if r not in successors:
-                    successors.append(r)
-                if r.subject_id:
-                    find_successors(r.subject_id, visited)
-
-        find_prereqs(subject_id, set())
-        # Reset visited for successors search
-        find_successors(subject_id, set())
-        
+        graph = self.graph_service.get_graph()
         return {
-            "prerequisites": prerequisites,
-            "successors": successors
+            "prerequisites": graph.prerequisite_edges(subject_id),
+            "successors": graph.successor_edges(subject_id),
+            "subjects": graph.subjects
         }
 
     def add_relationship(self, data: dict):
@@ -63,7 +34,12 @@ class SubjectRelationshipService:
         if not self.subject_repository.get_by_id(related_id):
             raise ValueError('Invalid related_subject_id')
             
-        return self.repository.create(data)
+        item = self.repository.create(data)
+        self.graph_service.invalidate()
+        return item
 
     def remove_relationship(self, id: int) -> bool:
-        return self.repository.delete(id)
\ No newline at end of file
+        ok = self.repository.delete(id)
+        if ok:
+            self.graph_service.invalidate()
+        return ok
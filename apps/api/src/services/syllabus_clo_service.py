@@ -2,9 +2,10 @@ from typing import List, Optional
 from infrastructure.repositories.syllabus_clo_repository import SyllabusCloRepository
 
 class SyllabusCloService:
-    def __init__(self, repository: SyllabusCloRepository, syllabus_repository=None):
+    def __init__(self, repository: SyllabusCloRepository, syllabus_repository=None, coverage_service=None):
         self.repository = repository
         self.syllabus_repository = syllabus_repository
+        self.coverage_service = coverage_service
 
     def list_clos(self) -> List:
         return self.repository.get_all()
@@ -17,12 +18,27 @@ class SyllabusCloService:
 
     def create_clo(self, data: dict):
         syllabus_id = data.get('syllabus_id')
-        if not syllabus_id or not self.syllabus_repository.get_by_id(syllabus_id):
+        syllabus = self.syllabus_repository.get_by_id(syllabus_id) if syllabus_id else None
+        if not syllabus:
             raise ValueError('Invalid syllabus_id')
-        return self.repository.create(data)
+        clo = self.repository.create(data)
+        self._invalidate_coverage(syllabus.program_id)
+        return clo
 
     def update_clo(self, id: int, data: dict):
-        return self.repository.update(id, data)
+        clo = self.repository.update(id, data)
+        if clo is not None and clo.syllabus:
+            self._invalidate_coverage(clo.syllabus.program_id)
+        return clo
 
     def delete_clo(self, id: int) -> bool:
-        return self.repository.delete(id)
\ No newline at end of file
+        existing = self.repository.get_by_id(id)
+        program_id = existing.syllabus.program_id if existing is not None and existing.syllabus else None
+        success = self.repository.delete(id)
+        if success:
+            self._invalidate_coverage(program_id)
+        return success
+
+    def _invalidate_coverage(self, program_id: Optional[int]):
+        if self.coverage_service and program_id:
+            self.coverage_service.invalidate(program_id)
@@ -0,0 +1,220 @@
+from typing import Any, Dict, List, Optional, Tuple
+from api.schemas.base_schema import snake_to_camel
+
+
+class SyllabusDiffService:
+    """
+    Deterministic structural diff over serialized syllabus trees
+    (output of SyllabusSchema or stored SyllabusSnapshot.snapshot_data).
+
+    Lists are matched by business keys (CLO code, week, scheme/component name...)
+    instead of position, so re-ordering does not show up as a change and
+    database ids (which differ between syllabuses/versions) are ignored.
+    """
+
+    # Candidate match keys per collection name; the first key present on the items wins
+    COLLECTION_KEYS = {
+        'clos': ('code', 'syllabusCloCode'),
+        'teachingPlans': ('week',),
+        'assessmentSchemes': ('name',),
+        'components': ('name',),
+        'rubrics': ('criteria',),
+        'materials': ('title',),
+        'ploMappings': ('programPloCode',),
+        'objectives': (),
+    }
+
+    # Surrogate keys only: parent pointers differ between versions, programPloId is shown as programPloCode.
+    # Business foreign keys (subjectId, lecturerId, programId, ...) are real changes and stay in the diff.
+    IGNORED_FIELDS = {'id', 'createdAt', 'updatedAt', 'dueDate', 'assignedTo',
+                      'syllabusId', 'schemeId', 'componentId', 'assessmentComponentId',
+                      'syllabusCloId', 'programPloId'}
+
+    SECTION_LABELS = {
+        'general': 'Thông tin chung',
+        'clos': 'Chuẩn đầu ra (CLO)',
+        'teachingPlans': 'Kế hoạch giảng dạy',
+        'assessmentSchemes': 'Đánh giá',
+        'materials': 'Tài liệu học tập',
+        'objectives': 'Mục tiêu học phần',
+        'timeAllocation': 'Phân bổ thời gian',
+    }
+
+    # Changes in these sections/fields are considered significant for reviewers
+    SIGNIFICANT_FIELDS = {'credits', 'weight', 'timeAllocation'}
+    SIGNIFICANT_SECTIONS = {'clos', 'assessmentSchemes'}
+
+    def compare(self, base: Optional[dict], target: Optional[dict]) -> Dict[str, Any]:
+        """Diff two serialized syllabuses and build a report compatible with the AI report shape"""
+        changes = self.diff(base or {}, target or {})
+        stats = self._stats(changes)
+        return {
+            'summary': self._summary(stats),
+            'detailed_analysis': self._detailed_analysis(changes),
+            'impact_assessment': '',
+            'is_significant_change': any(self._is_significant(c) for c in changes),
+            'stats': stats,
+            'changes': changes,
+        }
+
+    def diff(self, base: dict, target: dict) -> List[Dict[str, Any]]:
+        changes: List[Dict[str, Any]] = []
+        self._diff_value(self._normalize(base), self._normalize(target), '', None, changes)
+        return changes
+
+    # ------------------------------------------------------------------ #
+    # Tree walking
+    # ------------------------------------------------------------------ #
+    def _diff_value(self, old, new, path: str, collection: Optional[str], changes: list):
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in sorted(set(old) | set(new)):
+                if self._ignored(key):
+                    continue
+                child = f'{path}.{key}' if path else key
+                if key not in old:
+                    self._record(changes, child, 'Added', None, new[key])
+                elif key not in new:
+                    self._record(changes, child, 'Removed', old[key], None)
+                else:
+                    self._diff_value(old[key], new[key], child, key, changes)
+        elif isinstance(old, list) and isinstance(new, list):
+            self._diff_list(old, new, path, collection, changes)
+        elif self._scalar(old) != self._scalar(new):
+            if old in (None, '', [], {}):
+                self._record(changes, path, 'Added', old, new)
+            elif new in (None, '', [], {}):
+                self._record(changes, path, 'Removed', old, new)
+            else:
+                self._record(changes, path, 'Modified', old, new)
+
+    def _diff_list(self, old: list, new: list, path: str, collection: Optional[str], changes: list):
+        old_keyed = self._key_items(old, collection)
+        new_keyed = self._key_items(new, collection)
+        new_index = dict(new_keyed)
+        old_index = dict(old_keyed)
+
+        for key, item in old_keyed:
+            child = f'{path}[{self._label(key)}]'
+            if key not in new_index:
+                self._record(changes, child, 'Removed', item, None)
+            else:
+                self._diff_value(item, new_index[key], child, collection, changes)
+        for key, item in new_keyed:
+            if key not in old_index:
+                self._record(changes, f'{path}[{self._label(key)}]', 'Added', None, item)
+
+    def _key_items(self, items: list, collection: Optional[str]) -> List[Tuple[tuple, Any]]:
+        """Assign each list item a stable key: (business key, occurrence) or its scalar value/position"""
+        key_field = self._key_field(items, collection)
+        seen: Dict[Any, int] = {}
+        keyed = []
+        for pos, item in enumerate(items):
+            if key_field and isinstance(item, dict):
+                base_key = self._scalar(item.get(key_field))
+            elif not isinstance(item, (dict, list)):
+                base_key = self._scalar(item)
+            else:
+                base_key = pos
+            occurrence = seen.get(base_key, 0)
+            seen[base_key] = occurrence + 1
+            keyed.append(((base_key, occurrence), item))
+        return keyed
+
+    def _key_field(self, items: list, collection: Optional[str]) -> Optional[str]:
+        dicts = [i for i in items if isinstance(i, dict)]
+        if not dicts:
+            return None
+        for candidate in self.COLLECTION_KEYS.get(collection, ()):
+            if any(candidate in d for d in dicts):
+                return candidate
+        return None
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def _normalize(self, data):
+        """Accept snake_case or camelCase payloads (older snapshots / AI payloads)"""
+        if isinstance(data, dict):
+            return {snake_to_camel(k): self._normalize(v) for k, v in data.items()}
+        if isinstance(data, list):
+            return [self._normalize(x) for x in data]
+        return data
+
+    def _ignored(self, key: str) -> bool:
+        return key in self.IGNORED_FIELDS
+
+    @staticmethod
+    def _scalar(value):
+        if isinstance(value, str):
+            value = value.strip()
+            return value
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            # 40 and 40.0 are the same weight
+            return float(value)
+        return value
+
+    @staticmethod
+    def _label(key: tuple) -> str:
+        value, occurrence = key
+        return f'{value}#{occurrence + 1}' if occurrence else str(value)
+
+    @staticmethod
+    def _record(changes: list, path: str, change_type: str, old, new):
+        section = path.split('.', 1)[0].split('[', 1)[0] if path else 'general'
+        changes.append({
+            'path': path,
+            'section': section,
+            'type': change_type,
+            'old_value': old,
+            'new_value': new,
+        })
+
+    def _section_of(self, change: dict) -> str:
+        section = change['section']
+        return section if section in self.SECTION_LABELS else 'general'
+
+    def _is_significant(self, change: dict) -> bool:
+        field = change['path'].rsplit('.', 1)[-1]
+        if field in self.SIGNIFICANT_FIELDS or change['section'] in self.SIGNIFICANT_FIELDS:
+            return True
+        return change['section'] in self.SIGNIFICANT_SECTIONS and change['type'] in ('Added', 'Removed')
+
+    def _stats(self, changes: list) -> Dict[str, Any]:
+        by_type = {'Added': 0, 'Removed': 0, 'Modified': 0}
+        by_section: Dict[str, int] = {}
+        for c in changes:
+            by_type[c['type']] += 1
+            section = self._section_of(c)
+            by_section[section] = by_section.get(section, 0) + 1
+        return {'total': len(changes), 'by_type': by_type, 'by_section': by_section}
+
+    def _summary(self, stats: dict) -> str:
+        if not stats['total']:
+            return 'Không có thay đổi nào giữa hai phiên bản.'
+        parts = [f"{self.SECTION_LABELS[s]}: {n}" for s, n in sorted(stats['by_section'].items())]
+        t = stats['by_type']
+        return (f"{stats['total']} thay đổi (thêm {t['Added']}, xóa {t['Removed']}, sửa {t['Modified']}). "
+                + '; '.join(parts) + '.')
+
+    def _detailed_analysis(self, changes: list) -> List[Dict[str, str]]:
+        return [{
+            'category': self.SECTION_LABELS[self._section_of(c)],
+            'change_type': c['type'],
+            'description': self._describe(c),
+        } for c in changes]
+
+    @staticmethod
+    def _short(value, limit: int = 120) -> str:
+        if isinstance(value, dict):
+            value = value.get('code') or value.get('name') or value.get('title') or value.get('topic') or value
+        text = str(value)
+        return text if len(text) <= limit else text[:limit] + '...'
+
+    def _describe(self, change: dict) -> str:
+        if change['type'] == 'Added':
+            return f"{change['path']}: thêm {self._short(change['new_value'])}"
+        if change['type'] == 'Removed':
+            return f"{change['path']}: xóa {self._short(change['old_value'])}"
+        return f"{change['path']}: {self._short(change['old_value'])} → {self._short(change['new_value'])}"
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, List, Tuple
+
+from domain.constants import WorkflowStatus
+from domain.events import SyllabusEvent
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SyllabusEventHandlers:
+    """
+    Consumers of syllabus workflow events, run by the outbox worker after the
+    transition is committed: snapshot, search index, cache invalidation and
+    notifications. Each consumer takes the event payload and must be safe to
+    run again after a partial failure.
+    """
+
+    def __init__(self, syllabus_repository, syllabus_service=None, snapshot_service=None,
+                 notification_service=None, student_subscription_repository=None, coverage_service=None):
+        self.syllabus_repository = syllabus_repository
+        self.syllabus_service = syllabus_service
+        self.snapshot_service = snapshot_service
+        self.notification_service = notification_service
+        self.student_subscription_repository = student_subscription_repository
+        self.coverage_service = coverage_service
+
+    def consumers(self) -> Dict[str, List[Tuple[str, Callable]]]:
+        common = [('search_index', self.index), ('cache', self.invalidate_caches)]
+        return {
+            SyllabusEvent.SUBMITTED: common + [('notify_reviewers', self.notify_reviewers)],
+            SyllabusEvent.APPROVED: [('snapshot', self.snapshot)] + common + [('notify_lecturer', self.notify_lecturer)],
+            SyllabusEvent.PUBLISHED: [('snapshot', self.snapshot)] + common + [
+                ('notify_lecturer', self.notify_lecturer), ('notify_subscribers', self.notify_subscribers)],
+            SyllabusEvent.RETURNED: common + [('notify_lecturer', self.notify_lecturer)],
+            SyllabusEvent.REJECTED: common + [('notify_lecturer', self.notify_lecturer)],
+        }
+
+    # ------------------------------------------------------------------ #
+    # Consumers
+    # ------------------------------------------------------------------ #
+    def snapshot(self, event: dict):
+        """Immutable snapshot once the syllabus reaches a public status"""
+        if not self.snapshot_service or event['to_status'] not in WorkflowStatus.PUBLIC_STATUSES:
+            return
+        s = self.syllabus_repository.get_details(event['syllabus_id'])
+        if not s:
+            return
+        # Di chuyển import vào đây để tránh Circular Import
+        from api.schemas.syllabus_schema import SyllabusSchema
+        self.snapshot_service.create_snapshot(
+            syllabus_id=s.id,
+            version=s.version or "1.0",
+            data=SyllabusSchema().dump(s),
+            created_by=event.get('actor_id')
+        )
+        logger.info(f"Snapshot created for syllabus {s.id} at status {event['to_status']}")
+
+    def index(self, event: dict):
+        if not self.syllabus_service:
+            return
+        s = self.syllabus_repository.get_details(event['syllabus_id'])
+        if s:
+            self.syllabus_service.reindex(s)
+
+    def invalidate_caches(self, event: dict):
+        # The program coverage matrix is the only shared cache built from syllabus data
+        if self.coverage_service:
+            self.coverage_service.invalidate(event.get('program_id'))
+
+    def notify_reviewers(self, event: dict):
+        if not self.notification_service:
+            return
+        self.notification_service.notify_roles(
+            roles=['Head of Dept', 'Academic Affairs', 'AA', 'Admin'],
+            title='Đề cương mới được gửi',
+            message=f'Giảng viên {event.get("lecturer_name") or "N/A"} vừa gửi duyệt môn {event.get("subject_code") or "N/A"}.',
+            link=f'/syllabus/{event["syllabus_id"]}',
+            event_name='syllabus_submitted'
+        )
+
+    def notify_lecturer(self, event: dict):
+        if not self.notification_service or not event.get('lecturer_id'):
+            return
+        action_text = 'duyệt' if event['action'] == 'APPROVE' else 'trả lại'
+        self.notification_service.send_notification(
+            user_id=event['lecturer_id'],
+            title=f'Đề cương được {action_text}',
+            message=f'Môn {event.get("subject_code") or "N/A"} đã được {action_text}. Trạng thái mới: {event["to_status"]}',
+            link=f'/syllabus/{event["syllabus_id"]}',
+            event_name='syllabus_evaluated'
+        )
+
+    def notify_subscribers(self, event: dict):
+        if not self.notification_service or not self.student_subscription_repository:
+            return
+        from infrastructure.models.student_subscription_model import StudentSubscription
+        rows = (self.student_subscription_repository.session.query(StudentSubscription.student_id)
+                .filter_by(subject_id=event['subject_id'])
+                .all())
+        count = self.notification_service.send_bulk(
+            [row.student_id for row in rows],
+            title='Cập nhật đề cương môn học',
+            message=f'Đề cương môn {event.get("subject_code") or "N/A"} đã được xuất bản phiên bản mới.',
+            link=f'/syllabus/{event["syllabus_id"]}',
+            event_name='syllabus_published',
+            send_email=True
+        )
+        logger.info(f"Syllabus {event['syllabus_id']} published: {count} subscribers notified")
@@ -0,0 +1,181 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Bloom's revised taxonomy action verbs (Vietnamese / English), level 1..6
+BLOOM_LEVELS = {
+    1: 'Nhớ (Remember)',
+    2: 'Hiểu (Understand)',
+    3: 'Vận dụng (Apply)',
+    4: 'Phân tích (Analyze)',
+    5: 'Đánh giá (Evaluate)',
+    6: 'Sáng tạo (Create)',
+}
+
+BLOOM_VERBS = {
+    1: ['nhớ', 'nhắc lại', 'liệt kê', 'nêu', 'định nghĩa', 'nhận biết', 'nhận diện', 'kể tên', 'ghi nhớ',
+        'xác định', 'define', 'list', 'recall', 'recognize', 'identify', 'name', 'state', 'memorize', 'label'],
+    2: ['hiểu', 'trình bày', 'giải thích', 'mô tả', 'phân loại', 'tóm tắt', 'diễn giải', 'thảo luận', 'minh họa',
+        'understand', 'explain', 'describe', 'summarize', 'classify', 'interpret', 'discuss', 'illustrate',
+        'paraphrase', 'outline'],
+    3: ['vận dụng', 'áp dụng', 'sử dụng', 'thực hiện', 'giải quyết', 'tính toán', 'triển khai', 'thực hành',
+        'lập trình', 'cài đặt', 'apply', 'use', 'implement', 'execute', 'solve', 'calculate', 'compute',
+        'demonstrate', 'operate', 'practice'],
+    4: ['phân tích', 'phân biệt', 'so sánh', 'đối chiếu', 'kiểm tra', 'chẩn đoán', 'phân rã', 'analyze', 'analyse',
+        'differentiate', 'distinguish', 'compare', 'contrast', 'examine', 'organize', 'deconstruct'],
+    5: ['đánh giá', 'thẩm định', 'phản biện', 'biện luận', 'lựa chọn', 'bảo vệ', 'nhận xét', 'phê bình',
+        'evaluate', 'assess', 'judge', 'critique', 'justify', 'defend', 'argue', 'select', 'appraise'],
+    6: ['thiết kế', 'sáng tạo', 'xây dựng', 'phát triển', 'đề xuất', 'tạo ra', 'lập kế hoạch', 'tổng hợp',
+        'hình thành', 'design', 'create', 'develop', 'construct', 'formulate', 'propose', 'plan', 'compose',
+        'produce', 'build', 'devise'],
+}
+
+_VERB_LEVEL = {verb: level for level, verbs in BLOOM_VERBS.items() for verb in verbs}
+# One precompiled alternation, longest verbs first so "ghi nhớ" is not read as "nhớ"
+_BLOOM_PATTERN = re.compile(
+    r'(?<!\w)(' + '|'.join(re.escape(v) for v in sorted(_VERB_LEVEL, key=len, reverse=True)) + r')(?!\w)',
+    re.IGNORECASE
+)
+# The action verb is expected near the start ("Trình bày được...", "Có khả năng phân tích...")
+_VERB_WINDOW = 60
+
+# PLO contribution levels that require at least this Bloom level from the CLO
+MAPPING_MIN_BLOOM = {'M': 3, 'A': 3}
+
+
+class SyllabusPrecheckService:
+    """
+    Local, rule-based checks run before AI calls: Bloom verbs of CLOs,
+    CLO/PLO coverage and assessment weights. Pure in-process work, so it
+    returns structured findings in milliseconds; blocking errors make the
+    AI result predictable and let AiService skip the model call.
+    """
+    ERROR = 'error'
+    WARNING = 'warning'
+    INFO = 'info'
+
+    # ------------------------------------------------------------------ #
+    # Bloom lexicon
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def bloom_level(text: str) -> Optional[Dict[str, Any]]:
+        """First Bloom action verb near the start of a CLO statement"""
+        if not text:
+            return None
+        match = _BLOOM_PATTERN.search(text[:_VERB_WINDOW])
+        if not match:
+            return None
+        verb = match.group(1).lower()
+        level = _VERB_LEVEL[verb]
+        return {'verb': verb, 'level': level, 'label': BLOOM_LEVELS[level]}
+
+    # ------------------------------------------------------------------ #
+    # Checks
+    # ------------------------------------------------------------------ #
+    def check_clos(self, clos: List[dict]) -> List[dict]:
+        findings = []
+        if not clos:
+            return [self._finding(self.ERROR, 'NO_CLOS', 'Đề cương chưa có chuẩn đầu ra học phần (CLO).')]
+
+        seen = set()
+        levels = []
+        for clo in clos:
+            code = clo.get('code')
+            if code in seen:
+                findings.append(self._finding(self.ERROR, 'DUPLICATE_CLO_CODE', f'Mã CLO {code} bị trùng.', code))
+            seen.add(code)
+
+            description = (clo.get('description') or '').strip()
+            if not description:
+                findings.append(self._finding(self.ERROR, 'CLO_EMPTY_DESCRIPTION', f'{code} chưa có nội dung.', code))
+                continue
+            bloom = self.bloom_level(description)
+            if not bloom:
+                findings.append(self._finding(
+                    self.WARNING, 'CLO_NO_BLOOM_VERB',
+                    f'{code} không bắt đầu bằng động từ hành động theo thang Bloom.', code))
+            else:
+                levels.append(bloom['level'])
+
+        if levels and max(levels) <= 2:
+            findings.append(self._finding(
+                self.WARNING, 'BLOOM_ALL_LOW',
+                'Tất cả CLO chỉ ở mức Nhớ/Hiểu; nên có CLO ở mức Vận dụng trở lên.'))
+        return findings
+
+    def check_alignment(self, clos: List[dict], plos: List[dict], mappings: List[dict]) -> List[dict]:
+        """Same payload as AiService.analyze_clo_plo_alignment"""
+        findings = self.check_clos(clos)
+        if not plos:
+            findings.append(self._finding(self.ERROR, 'NO_PLOS', 'Chương trình đào tạo chưa có chuẩn đầu ra (PLO).'))
+        if not mappings:
+            findings.append(self._finding(self.ERROR, 'NO_MAPPINGS', 'Chưa có ma trận liên kết CLO - PLO.'))
+            return findings
+
+        mapped_clos = {m.get('clo') for m in mappings}
+        for clo in clos or []:
+            if clo.get('code') not in mapped_clos:
+                findings.append(self._finding(
+                    self.WARNING, 'CLO_UNMAPPED', f"{clo.get('code')} chưa đóng góp vào PLO nào.", clo.get('code')))
+
+        mapped_plos = {m.get('plo') for m in mappings}
+        for plo in plos or []:
+            if plo.get('code') not in mapped_plos:
+                findings.append(self._finding(
+                    self.INFO, 'PLO_NOT_SUPPORTED', f"{plo.get('code')} không được học phần này hỗ trợ.", plo.get('code')))
+
+        clo_levels = {c.get('code'): self.bloom_level(c.get('description') or '') for c in clos or []}
+        for m in mappings:
+            required = MAPPING_MIN_BLOOM.get((m.get('level') or '').upper())
+            bloom = clo_levels.get(m.get('clo'))
+            if required and bloom and bloom['level'] < required:
+                findings.append(self._finding(
+                    self.WARNING, 'MAPPING_LEVEL_ABOVE_BLOOM',
+                    f"{m.get('clo')} ở mức {bloom['label']} nhưng được gán mức {m.get('level')} cho {m.get('plo')}.",
+                    m.get('clo')))
+        return findings
+
+    def check_weights(self, schemes: List[dict]) -> List[dict]:
+        """Each assessment scheme total weight must be 100%"""
+        findings = []
+        for scheme in schemes or []:
+            components = scheme.get('components', [])
+            total_weight = sum([float(c.get('weight') or 0) for c in components])
+            # Use a small epsilon for float comparison
+            if abs(total_weight - 100.0) > 0.1:
+                scheme_name = scheme.get('name', 'phương pháp đánh giá')
+                findings.append(self._finding(
+                    self.ERROR, 'WEIGHT_NOT_100',
+                    f'Tổng trọng số của {scheme_name} phải bằng 100% (hiện tại: {total_weight}%).', scheme_name))
+        return findings
+
+    def check_summary_input(self, syllabus_data: dict) -> List[dict]:
+        """A summary needs at least a description, objectives or CLOs to work from"""
+        data = syllabus_data or {}
+        description = (data.get('description') or '').strip()
+        objectives = data.get('objectives') or []
+        clos = [c for c in (data.get('clos') or []) if (c.get('description') or '').strip()]
+        if not description and not objectives and not clos:
+            return [self._finding(self.ERROR, 'NOTHING_TO_SUMMARIZE',
+                                  'Đề cương chưa có mô tả, mục tiêu hay CLO để tóm tắt.')]
+        findings = []
+        if not description:
+            findings.append(self._finding(self.WARNING, 'NO_DESCRIPTION', 'Đề cương chưa có mô tả học phần.'))
+        return findings
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def report(self, findings: List[dict], clos: List[dict] = None) -> Dict[str, Any]:
+        return {
+            'passed': not self.has_errors(findings),
+            'findings': findings,
+            'bloom': [dict(code=c.get('code'), **(self.bloom_level(c.get('description') or '') or {}))
+                      for c in (clos or [])]
+        }
+
+    def has_errors(self, findings: List[dict]) -> bool:
+        return any(f['severity'] == self.ERROR for f in findings)
+
+    @staticmethod
+    def _finding(severity: str, code: str, message: str, target: str = None) -> dict:
+        return {'severity': severity, 'code': code, 'message': message, 'target': target}
@@ -1,6 +1,6 @@
 from typing import List, Optional
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from infrastructure.models.syllabus_model import Syllabus
 from infrastructure.models.syllabus_clo_model import SyllabusClo
@@ -12,9 +12,9 @@ from infrastructure.models.assessment_component_model import AssessmentComponent
 from infrastructure.models.rubric_model import Rubric
 from infrastructure.models.program_outcome_model import ProgramOutcome
 from infrastructure.models.workflow_log_model import WorkflowLog
-from infrastructure.models.student_subscription_model import StudentSubscription
 
 from infrastructure.repositories.syllabus_repository import SyllabusRepository
+from services.syllabus_precheck_service import SyllabusPrecheckService
 from domain.constants import WorkflowStatus
 from utils.logging_config import get_logger
 
@@ -41,7 +41,12 @@ class SyllabusService:
                  program_outcome_repository=None,
                  search_service=None,
                  student_subscription_repository=None,
-                 system_setting_service=None):
+                 system_setting_service=None,
+                 precheck_service=None,
+                 coverage_service=None,
+                 kpi_service=None,
+                 workflow_engine=None,
+                 deadline_service=None):
         self.repository = repository
         self.subject_repository = subject_repository
         self.program_repository = program_repository
@@ -63,29 +68,48 @@ class SyllabusService:
         self.search_service = search_service
         self.student_subscription_repository = student_subscription_repository
         self.system_setting_service = system_setting_service
+        self.precheck_service = precheck_service or SyllabusPrecheckService()
+        self.coverage_service = coverage_service
+        self.kpi_service = kpi_service
+        self.workflow_engine = workflow_engine
+        self.deadline_service = deadline_service
+
+    @staticmethod
+    def _search_document(syllabus) -> dict:
+        return {
+            "subject_code": syllabus.subject.code if syllabus.subject else "",
+            "subject_name_vi": syllabus.subject.name_vi if syllabus.subject else "",
+            "description": syllabus.description or "",
+            "status": syllabus.status,
+            "version": syllabus.version,
+            "program_name": syllabus.program.name if syllabus.program else "",
+            "academic_year": syllabus.academic_year.code if syllabus.academic_year else "",
+            "content": syllabus.description or ""
+        }
 
     def _index_to_search(self, syllabus):
         """Helper to index a syllabus to Elasticsearch background/silent failure"""
         if not self.search_service:
             return
         try:
-            content = {
-                "subject_code": syllabus.subject.code if syllabus.subject else "",
-                "subject_name_vi": syllabus.subject.name_vi if syllabus.subject else "",
-                "description": syllabus.description or "",
-                "status": syllabus.status,
-                "version": syllabus.version,
-                "program_name": syllabus.program.name if syllabus.program else "",
-                "academic_year": syllabus.academic_year.code if syllabus.academic_year else "",
-                "content": syllabus.description or ""
-            }
-            self.search_service.index_syllabus(syllabus.id, content)
-            logger.info(f"Indexed syllabus {syllabus.id} to search")
+            self.search_service.index_syllabus(syllabus.id, self._search_document(syllabus))
+            logger.debug("Indexed syllabus %s to search", syllabus.id)
         except Exception as e:
             logger.warning(f"Failed to index syllabus {syllabus.id}: {e}")
 
+    def reindex(self, syllabus):
+        """Index for the outbox consumer: raises on failure so the event is retried with backoff"""
+        if not self.search_service or not self.search_service.es:
+            return
+        if not self.search_service.index_syllabus(syllabus.id, self._search_document(syllabus)):
+            raise RuntimeError(f"Indexing syllabus {syllabus.id} failed")
+
     def get_kpis(self):
         """KPI Dashboard optimized with SQL Aggregation (PERF-001 & PERF-002)"""
+        if self.kpi_service:
+            # Incremental rollup: reads a few counter rows instead of scanning workflow_logs
+            return self.kpi_service.get_kpis()
+
         from sqlalchemy import func, case, text
         from infrastructure.models.syllabus_model import Syllabus
         from infrastructure.models.workflow_log_model import WorkflowLog
@@ -140,10 +164,10 @@ class SyllabusService:
         }
 
     def list_syllabuses(self, filters: dict = None) -> List:
-        logger.info(f"Listing all syllabuses - filters: {filters}")
+        logger.debug("Listing all syllabuses - filters: %s", filters)
         try:
             result = self.repository.get_all(filters=filters)
-            logger.info(f"Retrieved {len(result)} syllabuses")
+            logger.debug("Retrieved %d syllabuses", len(result))
             return result
         except Exception as e:
             logger.error(f"Error listing syllabuses: {str(e)}", exc_info=True)
@@ -151,10 +175,10 @@ class SyllabusService:
 
     def list_public_syllabuses(self, filters: dict = None) -> List:
         """New method for public access - Yuri Refactor Point 2"""
-        logger.info(f"Listing public syllabuses - filters: {filters}")
+        logger.debug("Listing public syllabuses - filters: %s", filters)
         try:
             result = self.repository.get_public_syllabuses(filters=filters)
-            logger.info(f"Retrieved {len(result)} public syllabuses")
+            logger.debug("Retrieved %d public syllabuses", len(result))
             return result
         except Exception as e:
             logger.error(f"Error listing public syllabuses: {str(e)}", exc_info=True)
@@ -162,48 +186,21 @@ class SyllabusService:
 
     def list_syllabuses_paginated(self, page: int, page_size: int, filters: dict = None):
         """Get paginated list of syllabuses"""
-        logger.info(f"Listing syllabuses - page {page}, size {page_size}, filters: {filters}")
+        logger.debug("Listing syllabuses - page %s, size %s, filters: %s", page, page_size, filters)
         try:
             items, total = self.repository.get_all_paginated(page, page_size, filters=filters)
-            logger.info(f"Retrieved {len(items)} of {total} syllabuses")
+            logger.debug("Retrieved %d of %d syllabuses", len(items), total)
             return items, total
         except Exception as e:
             logger.error(f"Error listing paginated syllabuses: {str(e)}", exc_info=True)
             raise
 
     def check_workflow_deadlines(self):
-        """Check all active workflows for overdue deadlines and send notifications."""
-        if not self.current_workflow_repository or not self.notification_service:
-            logger.warning("Deadline checker: Missing repository or notification service")
+        """Catch-up for deadline timers that did not run; reminders are otherwise sent on time by the timers."""
+        if not self.deadline_service:
+            logger.warning("Deadline checker: Missing deadline service")
             return 0
-        
-        overdue_items = self.current_workflow_repository.get_overdue()
-        count = 0
-        for item in overdue_items:
-            # Notify stakeholders based on state
-            s = self.repository.get_by_id(item.syllabus_id)
-            if not s: continue
-            
-            roles_to_notify = []
-            if item.state == WorkflowStatus.PENDING_REVIEW:
-                roles_to_notify = ['Head of Dept', 'Admin']
-            elif item.state == WorkflowStatus.PENDING_APPROVAL:
-                roles_to_notify = ['Academic Affairs', 'AA', 'Admin']
-            elif item.state == WorkflowStatus.APPROVED:
-                roles_to_notify = ['Principal', 'Admin']
-            
-            if roles_to_notify:
-                self.notification_service.notify_roles(
-                    roles=roles_to_notify,
-                    title='CẢNH BÁO QUÁ HẠN DUYỆT',
-                    message=f'Đề cương môn {s.subject.code if s.subject else "N/A"} ({item.state}) đã quá hạn duyệt ({item.due_date.strftime("%d/%m/%Y")}).',
-                    link=f'/syllabus/{item.syllabus_id}',
-                    event_name='workflow_overdue'
-                )
-                count += 1
-                logger.info(f"Sent overdue notification for syllabus {item.syllabus_id}")
-        
-        return count
+        return self.deadline_service.sweep()
 
     def get_syllabus(self, id: int):
         return self.repository.get_by_id(id)
@@ -219,13 +216,9 @@ class SyllabusService:
         if not schemes_data:
             return
             
-        for scheme in schemes_data:
-            components = scheme.get('components', [])
-            total_weight = sum([float(c.get('weight', 0)) for c in components])
-            # Use a small epsilon for float comparison
-            if abs(total_weight - 100.0) > 0.1:
-                scheme_name = scheme.get('name', 'phương pháp đánh giá')
-                raise ValueError(f'Tổng trọng số của {scheme_name} phải bằng 100% (hiện tại: {total_weight}%).')
+        findings = self.precheck_service.check_weights(schemes_data)
+        if findings:
+            raise ValueError(findings[0]['message'])
 
     def create_syllabus(self, data: dict):
         import json
@@ -288,13 +281,16 @@ class SyllabusService:
         
         # Use transaction to ensure atomicity
         try:
+            if self.kpi_service:
+                # before any row lock: same lock order as the KPI reconcile
+                self.kpi_service.lock()
             # Create Header (don't commit yet to allow nested children)
             syllabus_data.setdefault('status', 'DRAFT')
             new_syllabus = Syllabus(**syllabus_data)
             self.repository.session.add(new_syllabus)
             self.repository.session.flush() # Get ID without committing
             sid = new_syllabus.id
-            logger.info(f"Created syllabus header with ID: {sid}")
+            logger.debug("Created syllabus header with ID: %s", sid)
 
             # 1. Save CLOs
             if self.syllabus_clo_repository:
@@ -429,9 +425,14 @@ class SyllabusService:
                                 for clo_id in final_clo_ids:
                                     self.assessment_clo_repository.add_mapping(new_comp.id, clo_id, commit=False)
             
+            if self.kpi_service:
+                self.kpi_service.record_created(new_syllabus.status, commit=False)
+
             # Commit all at once
             self.repository.session.commit()
-            logger.info(f"Successfully created syllabus {sid} with all children")
+            logger.info("Successfully created syllabus %s with all children", sid)
+            if self.coverage_service:
+                self.coverage_service.invalidate(new_syllabus.program_id)
             
             # Non-blocking index to search
             self._index_to_search(new_syllabus)
@@ -452,7 +453,7 @@ class SyllabusService:
         from infrastructure.models.syllabus_model import Syllabus
         from infrastructure.models.syllabus_clo_model import SyllabusClo
         
-        logger.info(f"Updating syllabus {id}. Data keys: {list(data.keys())}")
+        logger.debug("Updating syllabus %s. Data keys: %s", id, list(data.keys()))
         
         # Check current status before allowing update - use for_update to avoid race
         s = self.repository.get_by_id(id, for_update=True)
@@ -664,7 +665,9 @@ class SyllabusService:
 
             # Final Commit for everything
             self.repository.session.commit()
-            logger.info(f"Successfully updated syllabus {sid} with all children")
+            logger.info("Successfully updated syllabus %s with all children", sid)
+            if self.coverage_service:
+                self.coverage_service.invalidate(updated_syllabus.program_id)
             
             # Re-index
             self._index_to_search(updated_syllabus)
@@ -677,7 +680,20 @@ class SyllabusService:
             raise
 
     def delete_syllabus(self, id: int) -> bool:
-        success = self.repository.delete(id)
+        if self.kpi_service:
+            self.kpi_service.lock()
+        existing = self.repository.get_by_id(id)
+        status = existing.status if existing else None
+        try:
+            success = self.repository.delete(id, commit=False)
+            if success and self.kpi_service:
+                self.kpi_service.record_deleted(id, status, commit=False)
+            self.repository.session.commit()
+        except Exception:
+            self.repository.session.rollback()
+            raise
+        if success and self.coverage_service:
+            self.coverage_service.invalidate(existing.program_id)
         if success and self.search_service:
             try:
                 self.search_service.delete_index(id)
@@ -686,8 +702,18 @@ class SyllabusService:
         return success
 
     # Workflow methods
+    def _kpi_transition_hook(self, syllabus_id: int, action: str, to_status: str):
+        """before_commit for WorkflowEngine.apply: the rollup delta commits with the status change"""
+        if not self.kpi_service:
+            return None
+        return lambda from_status: self.kpi_service.record_transition(
+            syllabus_id, action, from_status, to_status, commit=False)
+
     def submit_syllabus(self, id: int, user_id: int, user_role: str = None):
         """Submit syllabus for evaluation with comprehensive validation."""
+        if self.kpi_service:
+            # before the row lock below: same lock order as the KPI reconcile
+            self.kpi_service.lock()
         # BL-001: Use for_update to prevent race condition during submission
         s = self.repository.get_details(id, for_update=True)
         if not s:
@@ -698,13 +724,11 @@ class SyllabusService:
             if s.lecturer_id != user_id:
                 raise ValueError("Bạn không có quyền gửi duyệt đề cương này (không phải owner).")
         
+        # The workflow graph decides which states can be submitted and by whom
         current_status = (s.status or '').upper()
-        if current_status not in WorkflowStatus.VALID_FOR_SUBMISSION:
-            raise ValueError(
-                f'Chỉ có thể gửi duyệt ở các trạng thái {WorkflowStatus.VALID_FOR_SUBMISSION}. '
-                f'Trạng thái hiện tại: {current_status}'
-            )
-        
+        roles = [user_role] if user_role else (self.user_repository.get_role_names(user_id) if self.user_repository else [])
+        transition = self.workflow_engine.authorize(current_status, 'SUBMIT', roles)
+
         # Comprehensive Content Validation
         errors = []
         if not s.description or len(s.description.strip()) < 50:
@@ -730,195 +754,45 @@ class SyllabusService:
         
         if errors:
             raise ValueError(" | ".join(errors))
-        
-        from_status = s.status
-        updated = self.repository.update(id, {'status': WorkflowStatus.PENDING_REVIEW})
-        if self.workflow_log_repository:
-            self.workflow_log_repository.create({
-                'syllabus_id': id,
-                'actor_id': user_id,
-                'action': 'SUBMIT',
-                'from_status': from_status,
-                'to_status': WorkflowStatus.PENDING_REVIEW,
-                'comment': 'Đã kiểm tra tính hợp lệ và gửi duyệt.'
-            })
-
-        # Track current workflow with deadline (e.g., 7 days for review)
-        if self.current_workflow_repository:
-            due_date = datetime.now() + timedelta(days=7)
-            self.current_workflow_repository.update_or_create(id, {
-                'state': WorkflowStatus.PENDING_REVIEW,
-                'assigned_user_id': None, # Can be assigned to specific HoD if needed
-                'due_date': due_date,
-                'last_action_at': datetime.now()
-            })
-        
-        # Notify HoD when a syllabus is submitted
-        if self.notification_service:
-            self.notification_service.notify_roles(
-                roles=['Head of Dept', 'Academic Affairs', 'AA', 'Admin'],
-                title='Đề cương mới được gửi',
-                message=f'Giảng viên {s.lecturer.full_name if s.lecturer else "N/A"} vừa gửi duyệt môn {s.subject.code if s.subject else "N/A"}.',
-                link=f'/syllabus/{id}',
-                event_name='syllabus_submitted'
-            )
-        
+
+        # Status, log, current workflow with deadline (e.g., 7 days for review) and KPI rollup in one transaction
+        updated = self.workflow_engine.apply(s, transition, user_id, 'Đã kiểm tra tính hợp lệ và gửi duyệt.', due_days=7,
+                                             before_commit=self._kpi_transition_hook(id, 'SUBMIT', transition.to_state))
+
+        # Reviewer notification, search index: SyllabusSubmitted consumers (outbox)
         return updated
 
     def evaluate_syllabus(self, id: int, user_id: int, action: str, comment: Optional[str] = None):
         """Duyệt đề cương đồng bộ 5 bước - Yuri Refactor"""
-        logger.info(f"Evaluate: Syllabus {id} by User {user_id}")
+        logger.info("Evaluate: Syllabus %s by User %s", id, user_id)
         
+        if self.kpi_service:
+            # before the row lock below: same lock order as the KPI reconcile
+            self.kpi_service.lock()
         # BL-002: Race Condition - Use with_for_update to lock the record
         # FIX: Use get_details with for_update=True
         s = self.repository.get_details(id, for_update=True)
         if not s:
             return None
         
-        # Get user role for workflow logic
-        user = self.user_repository.get_by_id(user_id) if hasattr(self, 'user_repository') else None
-        user_role_names = []
-        if user and hasattr(user, 'roles'):
-            user_role_names = [ur.role.name for ur in user.roles]
-        
-        action = action.upper()
-        if action not in ('APPROVE', 'REJECT', 'RETURN'):
-            raise ValueError(f'Invalid action: {action}. Must be APPROVE, REJECT or RETURN')
-        
-        current_status = (s.status or WorkflowStatus.DRAFT).upper()
-        if current_status not in WorkflowStatus.VALID_FOR_EVALUATION:
-             raise ValueError(
-                f'Can only evaluate syllabuses in {WorkflowStatus.VALID_FOR_EVALUATION}. Current status: {s.status}'
-            )
-        
-        from_status = s.status
-        new_status = from_status
-
-        if action == 'APPROVE':
-            # Bước 1: HOD duyệt (Pending Review -> Pending Approval)
-            if current_status == WorkflowStatus.PENDING_REVIEW:
-                if not any(r in user_role_names for r in ['Head of Dept', 'Admin']):
-                    raise ValueError("Chỉ Trưởng bộ môn mới có quyền duyệt ở bước này.")
-                new_status = WorkflowStatus.PENDING_APPROVAL
-            
-            # Bước 2: AA duyệt (Pending Approval -> Approved)
-            elif current_status == WorkflowStatus.PENDING_APPROVAL:
-                if not any(r in user_role_names for r in ['Academic Affairs', 'AA', 'Admin']):
-                    raise ValueError("Chỉ Phòng Đào tạo (AA) mới có quyền duyệt ở bước này.")
-                new_status = WorkflowStatus.APPROVED
-            
-            # Bước 3: Principal duyệt cuối (Approved -> Published)
-            elif current_status == WorkflowStatus.APPROVED:
-                if not any(r in user_role_names for r in ['Principal', 'Admin']):
-                    raise ValueError("Chỉ Hiệu trưởng mới có quyền phê duyệt xuất bản.")
-                new_status = WorkflowStatus.PUBLISHED
-            else:
-                # BL-003: Raise exception instead of silent fallback
-                raise ValueError(f"Quyền hạn của bạn không phù hợp để duyệt ở trạng thái {current_status}")
-        elif action == 'RETURN':
-            if not comment:
-                raise ValueError('Comment là bắt buộc khi trả về để sửa chữa.')
-            new_status = WorkflowStatus.RETURNED
-        else:  # REJECT
-            if not comment:
-                raise ValueError('Comment là bắt buộc khi từ chối vĩnh viễn.')
-            new_status = WorkflowStatus.REJECTED
-        
+        action = (action or '').upper()
+        # Table-driven transition: (state, action) lookup + role set check; unknown actions are rejected there
+        roles = self.user_repository.get_role_names(user_id) if self.user_repository else []
+        transition = self.workflow_engine.authorize(s.status or WorkflowStatus.DRAFT, action, roles, comment)
+        new_status = transition.to_state
+
         try:
-            # 1. Cập nhật trạng thái trong DB và Commit ngay
-            update_data = {'status': new_status}
-            if new_status == WorkflowStatus.PUBLISHED:
-                update_data['is_active'] = True
-                update_data['publish_date'] = datetime.now()
-            
-            updated = self.repository.update(id, update_data)
-            self.repository.session.commit()
-            logger.info(f"Sync: Syllabus {id} status updated to {new_status} and committed")
-            
-            # 2. Ghi log workflow
-            if self.workflow_log_repository:
-                self.workflow_log_repository.create({
-                    'syllabus_id': id,
-                    'actor_id': user_id,
-                    'action': action,
-                    'from_status': from_status,
-                    'to_status': new_status,
-                    'comment': comment
-                })
-
-            # 3. SYNC: Cập nhật Search Engine ngay lập tức với trạng thái mới
-            # Refetch to ensure we have the latest state (already committed)
-            s_final = self.repository.get_details(id)
-            self._index_to_search(s_final)
-
-            # 4. SYNC: Dọn dẹp bảng Current Workflow nếu đã hoàn tất hoặc bị trả về/từ chối
-            if self.current_workflow_repository:
-                if new_status in (WorkflowStatus.PUBLISHED, WorkflowStatus.RETURNED, WorkflowStatus.REJECTED):
-                    try:
-                        if hasattr(self.current_workflow_repository, 'delete'):
-                            self.current_workflow_repository.delete(id)
-                        elif hasattr(self.current_workflow_repository, 'delete_by_syllabus_id'):
-                            self.current_workflow_repository.delete_by_syllabus_id(id)
-                        logger.info(f"Sync: Workflow record for {id} cleaned up.")
-                    except Exception as e:
-                        logger.warning(f"Failed to clean up workflow for syllabus {id}: {e}")
-                else:
-                    # Update bước tiếp theo với deadline từ System Settings (mặc định 5 ngày)
-                    deadline_days = 5
-                    if self.system_setting_service:
-                        deadline_days = self.system_setting_service.get_setting('workflow_deadline_days', 5)
-                    
-                    due_date = datetime.now() + timedelta(days=deadline_days)
-                    self.current_workflow_repository.update_or_create(id, {
-                        'state': new_status,
-                        'assigned_user_id': None,
-                        'due_date': due_date,
-                        'last_action_at': datetime.now()
-                    })
-
-            # 5. Take Immutable Snapshot if approved/published
-            if action == 'APPROVE' and new_status in WorkflowStatus.PUBLIC_STATUSES:
-                 if self.snapshot_service:
-                     try:
-                         # Di chuyển import vào đây để tránh Circular Import
-                         from api.schemas.syllabus_schema import SyllabusSchema
-                         schema = SyllabusSchema()
-                         snapshot_dict = schema.dump(s_final)
-                         self.snapshot_service.create_snapshot(
-                             syllabus_id=id,
-                             version=s_final.version or "1.0",
-                             data=snapshot_dict,
-                             created_by=user_id
-                         )
-                         logger.info(f"Snapshot created for syllabus {id} at status {new_status}")
-                     except Exception as e:
-                         logger.error(f"Failed to create snapshot for syllabus {id}: {str(e)}")
-
-            # 6. Thông báo cho Giảng viên
-            if s.lecturer_id and self.notification_service:
-                action_text = 'duyệt' if action == 'APPROVE' else 'trả lại'
-                self.notification_service.send_notification(
-                    user_id=s.lecturer_id,
-                    title=f'Đề cương được {action_text}',
-                    message=f'Môn {s.subject.code if s.subject else "N/A"} đã được {action_text}. Trạng thái mới: {new_status}',
-                    link=f'/syllabus/{id}',
-                    event_name='syllabus_evaluated'
-                )
-            
-            # 7. Thông báo cho SV nếu đã Publish
-            if new_status == WorkflowStatus.PUBLISHED and self.student_subscription_repository and self.notification_service:
-                from infrastructure.models.student_subscription_model import StudentSubscription
-                subs = self.student_subscription_repository.session.query(StudentSubscription).filter_by(subject_id=s.subject_id).all()
-                for sub in subs:
-                    self.notification_service.send_notification(
-                        user_id=sub.student_id,
-                        title='Cập nhật đề cương môn học',
-                        message=f'Đề cương môn {s.subject.code if s.subject else "N/A"} đã được xuất bản phiên bản mới.',
-                        link=f'/syllabus/{id}',
-                        event_name='syllabus_published',
-                        send_email=True
-                    )
-            
+            # 1, 2, 4. Trạng thái, log workflow và Current Workflow trong cùng một transaction
+            # Deadline bước tiếp theo từ System Settings (mặc định 5 ngày)
+            deadline_days = 5
+            if self.system_setting_service:
+                deadline_days = self.system_setting_service.get_setting('workflow_deadline_days', 5)
+            updated = self.workflow_engine.apply(s, transition, user_id, comment, due_days=deadline_days,
+                                                 before_commit=self._kpi_transition_hook(id, action, new_status))
+            logger.debug("Sync: Syllabus %s status updated to %s and committed", id, new_status)
+
+            # 3, 5, 6, 7. Search index, snapshot, cache và thông báo (giảng viên, SV theo dõi)
+            # chạy trong outbox worker từ event ghi cùng transaction, không chặn request
             return updated
             
         except Exception as e:
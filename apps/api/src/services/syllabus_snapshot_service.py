@@ -1,11 +1,16 @@
 from infrastructure.repositories.syllabus_snapshot_repository import SyllabusSnapshotRepository
+from services.syllabus_diff_service import SyllabusDiffService
 from typing import Dict, Any, Optional
 
 class SyllabusSnapshotService:
-    def __init__(self, repository: SyllabusSnapshotRepository, ai_service=None, syllabus_repository=None):
+    AI_MODES = ('sync', 'async')
+
+    def __init__(self, repository: SyllabusSnapshotRepository, ai_service=None, syllabus_repository=None,
+                 diff_service=None):
         self.repository = repository
         self.ai_service = ai_service
         self.syllabus_repository = syllabus_repository
+        self.diff_service = diff_service or SyllabusDiffService()
 
     def create_snapshot(self, syllabus_id: int, version: str, data: Dict[str, Any], created_by: int = None):
         """
@@ -21,40 +26,65 @@ class SyllabusSnapshotService:
         return self.repository.create(snapshot_data)
 
     def get_syllabus_history(self, syllabus_id: int):
-        return self.repository.get_by_syllabus(syllabus_id)
+        """Lightweight version list; payloads are fetched per snapshot via get_snapshot_payload"""
+        return self.repository.get_history(syllabus_id)
 
     def get_snapshot(self, snapshot_id: int):
         return self.repository.get_by_id(snapshot_id)
 
-    def compare_snapshots(self, snapshot_id_1: int, snapshot_id_2: int):
-        """Compare two historical snapshots using AI"""
-        s1 = self.get_snapshot(snapshot_id_1)
-        s2 = self.get_snapshot(snapshot_id_2)
-        
-        if not s1 or not s2:
+    def get_snapshot_payload(self, snapshot_id: int):
+        return self.repository.get_payload(snapshot_id)
+
+    def compare_data(self, base_data: Dict[str, Any], target_data: Dict[str, Any], ai: Optional[str] = None,
+                     immutable: bool = False, use_cache: bool = True):
+        """
+        Structural diff of two serialized syllabuses (milliseconds, no external calls).
+        ai='sync' attaches the Gemini analysis inline, ai='async' queues it and
+        returns the Celery task id to poll via /ai/task-status/<id>.
+        immutable=True marks both inputs as snapshots so the AI result is cached for good.
+        """
+        report = self.diff_service.compare(base_data, target_data)
+        if ai not in self.AI_MODES or not report['stats']['total']:
+            return report
+
+        if ai == 'sync':
+            if self.ai_service:
+                report['ai_report'] = self.ai_service.compare_syllabuses(
+                    base_data, target_data, use_cache=use_cache, immutable=immutable)
+        else:
+            from tasks import compare_syllabuses_task
+            task = compare_syllabuses_task.delay(base_data, target_data, immutable=immutable, use_cache=use_cache)
+            report['ai_task_id'] = task.id
+        return report
+
+    def compare_snapshots(self, snapshot_id_1: int, snapshot_id_2: int, ai: Optional[str] = None,
+                          use_cache: bool = True):
+        """Compare two historical snapshots"""
+        base = self.get_snapshot_payload(snapshot_id_1)
+        target = self.get_snapshot_payload(snapshot_id_2)
+
+        if base is None or target is None:
             raise ValueError("Snapshot not found")
-            
-        if not self.ai_service:
-            return {"error": "AI Service not available"}
-            
-        return self.ai_service.compare_syllabuses(s1.snapshot_data, s2.snapshot_data)
 
-    def compare_with_current(self, snapshot_id: int, current_syllabus_id: int):
+        return self.compare_data(base, target, ai, immutable=True, use_cache=use_cache)
+
+    def compare_with_current(self, snapshot_id: int, current_syllabus_id: int, ai: Optional[str] = None,
+                             use_cache: bool = True):
         """Compare a historical snapshot with the current active syllabus"""
-        snapshot = self.get_snapshot(snapshot_id)
-        if not snapshot:
+        base = self.get_snapshot_payload(snapshot_id)
+        if base is None:
             raise ValueError("Snapshot not found")
-            
-        if not self.syllabus_repository or not self.ai_service:
-            return {"error": "Syllabus repository or AI service not available"}
-            
+
+        if not self.syllabus_repository:
+            return {"error": "Syllabus repository not available"}
+
         # We need a schema to dump the current syllabus to dict
         from api.schemas.syllabus_schema import SyllabusSchema
         current_syllabus = self.syllabus_repository.get_details(current_syllabus_id)
         if not current_syllabus:
             raise ValueError("Current syllabus not found")
-            
+
         schema = SyllabusSchema()
         current_data = schema.dump(current_syllabus)
-        
-        return self.ai_service.compare_syllabuses(snapshot.snapshot_data, current_data)
+
+        return self.compare_data(base, current_data, ai, use_cache=use_cache)
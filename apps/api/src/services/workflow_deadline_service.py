@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class WorkflowDeadlineService:
+    """
+    Per-workflow review deadline timers.
+
+    When a transition sets a due_date, schedule() queues a Celery task with a
+    countdown to that date carrying the row's deadline_token. A reschedule
+    issues a new token and leaving the review states deletes the row, so older
+    timers find nothing to claim; there is no revoke to get lost. fire() claims
+    the reminder with a conditional update, so redelivered or duplicate timers
+    notify once. The claim is released only when notifying raises (transient:
+    database, broker), so the next sweep tries again; a reminder that can never
+    be sent (no approver roles, syllabus gone) keeps its claim and is logged
+    once. sweep() is a catch-up for timers that never ran (broker
+    flush, worker down), reading only unreminded overdue rows by index.
+    """
+    SWEEP_LIMIT = 500
+
+    def __init__(self, repository, syllabus_repository=None, notification_service=None, workflow_engine=None):
+        self.repository = repository
+        self.syllabus_repository = syllabus_repository
+        self.notification_service = notification_service
+        self.workflow_engine = workflow_engine
+
+    @staticmethod
+    def schedule(syllabus_id: int, token: Optional[str], due_date: Optional[datetime]):
+        """Queue the timer; call after the due_date/token commit"""
+        if not token or not due_date:
+            return
+        try:
+            from tasks import workflow_deadline_task
+            countdown = max((due_date - datetime.now()).total_seconds(), 0)
+            workflow_deadline_task.apply_async(args=[syllabus_id, token], countdown=countdown)
+        except Exception as e:
+            logger.warning(f"Deadline timer for syllabus {syllabus_id} not queued, sweep will pick it up: {e}")
+
+    def fire(self, syllabus_id: int, token: Optional[str]) -> bool:
+        cw = self.repository.claim_reminder(syllabus_id, token)
+        if cw is None:
+            current = self.repository.get_by_syllabus_id(syllabus_id)
+            if (current and current.deadline_token == token and current.reminded_at is None
+                    and current.due_date and current.due_date > datetime.now()):
+                # Timer ran early (clock skew, countdown rounding): wait again
+                self.schedule(syllabus_id, token, current.due_date)
+            return False
+        try:
+            sent = self._notify(cw)
+        except Exception:
+            # A failed statement leaves the session unusable until rolled back
+            self.repository.session.rollback()
+            self.repository.release_reminder(syllabus_id, token)
+            raise
+        if not sent:
+            # Permanent (nobody to notify): not retried, or it would fill every sweep
+            logger.warning(f"Overdue reminder for syllabus {syllabus_id} ({cw.state}) has no recipients; skipped")
+        return sent
+
+    def sweep(self) -> int:
+        count = 0
+        for cw in self.repository.get_overdue(self.SWEEP_LIMIT):
+            try:
+                if self.fire(cw.syllabus_id, cw.deadline_token):
+                    count += 1
+            except Exception as e:
+                logger.error(f"Overdue reminder for syllabus {cw.syllabus_id} failed: {e}")
+        return count
+
+    def _reviewer_roles(self, state: str):
+        """Roles that can approve from this state, per the workflow graph"""
+        if not self.workflow_engine:
+            return []
+        transition = self.workflow_engine.get_graph().resolve(state, 'APPROVE')
+        return sorted(transition.roles) if transition and transition.roles else []
+
+    def _notify(self, cw) -> bool:
+        roles = self._reviewer_roles(cw.state)
+        if not roles or not self.notification_service:
+            return False
+        s = self.syllabus_repository.get_by_id(cw.syllabus_id) if self.syllabus_repository else None
+        if not s:
+            return False
+        self.notification_service.notify_roles(
+            roles=roles,
+            title='CẢNH BÁO QUÁ HẠN DUYỆT',
+            message=f'Đề cương môn {s.subject.code if s.subject else "N/A"} ({cw.state}) đã quá hạn duyệt ({cw.due_date.strftime("%d/%m/%Y")}).',
+            link=f'/syllabus/{cw.syllabus_id}',
+            event_name='workflow_overdue'
+        )
+        logger.info(f"Sent overdue notification for syllabus {cw.syllabus_id}")
+        return True
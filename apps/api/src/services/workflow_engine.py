@@ -0,0 +1,292 @@
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from domain.constants import WorkflowStatus
+from domain.events import SyllabusEvent
+from utils.caching import cache
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+State = namedtuple('State', ['id', 'code', 'name', 'is_final'])
+# roles=None: any authenticated user that reached the endpoint
+Transition = namedtuple('Transition', ['from_state', 'action', 'to_state', 'roles'])
+
+EVALUATOR_ROLES = ('Head of Dept', 'Academic Affairs', 'AA', 'Principal', 'Admin')
+
+# Built-in graph, used while workflow_transitions is empty and written by seed_defaults()
+DEFAULT_STATES = [
+    {'code': WorkflowStatus.DRAFT, 'name': 'Bản nháp', 'color': '#6b7280', 'is_final': False},
+    {'code': WorkflowStatus.PENDING_REVIEW, 'name': 'Chờ Trưởng bộ môn duyệt', 'color': '#f59e0b', 'is_final': False},
+    {'code': WorkflowStatus.PENDING_APPROVAL, 'name': 'Chờ Phòng Đào tạo duyệt', 'color': '#f59e0b', 'is_final': False},
+    {'code': WorkflowStatus.APPROVED, 'name': 'Chờ Hiệu trưởng phê duyệt', 'color': '#3b82f6', 'is_final': False},
+    {'code': WorkflowStatus.PUBLISHED, 'name': 'Đã xuất bản', 'color': '#10b981', 'is_final': True},
+    {'code': WorkflowStatus.RETURNED, 'name': 'Trả lại', 'color': '#ef4444', 'is_final': False},
+    {'code': WorkflowStatus.REJECTED, 'name': 'Từ chối', 'color': '#991b1b', 'is_final': True},
+]
+DEFAULT_TRANSITIONS = [
+    (WorkflowStatus.DRAFT, 'SUBMIT', WorkflowStatus.PENDING_REVIEW, ('Lecturer', 'Admin')),
+    (WorkflowStatus.RETURNED, 'SUBMIT', WorkflowStatus.PENDING_REVIEW, ('Lecturer', 'Admin')),
+    (WorkflowStatus.PENDING_REVIEW, 'APPROVE', WorkflowStatus.PENDING_APPROVAL, ('Head of Dept', 'Admin')),
+    (WorkflowStatus.PENDING_APPROVAL, 'APPROVE', WorkflowStatus.APPROVED, ('Academic Affairs', 'AA', 'Admin')),
+    (WorkflowStatus.APPROVED, 'APPROVE', WorkflowStatus.PUBLISHED, ('Principal', 'Admin')),
+] + [
+    (state, action, target, EVALUATOR_ROLES)
+    for state in WorkflowStatus.VALID_FOR_EVALUATION
+    for action, target in (('RETURN', WorkflowStatus.RETURNED), ('REJECT', WorkflowStatus.REJECTED))
+]
+
+# Actions that need a reviewer comment
+REQUIRES_COMMENT = {
+    'RETURN': 'Comment là bắt buộc khi trả về để sửa chữa.',
+    'REJECT': 'Comment là bắt buộc khi từ chối vĩnh viễn.',
+}
+
+
+class WorkflowGraph:
+    """
+    Immutable state/transition/role graph. Transitions are indexed by
+    (from_state, action) and carry a frozenset of role names, so resolving
+    and authorizing a transition are dictionary/set lookups.
+    """
+
+    def __init__(self, states: Dict[str, State], transitions: Iterable[Transition], version: str, source: str):
+        self.version = version
+        self.source = source
+        self.states = states
+        self._index: Dict[tuple, Transition] = {}
+        self._outgoing: Dict[str, List[Transition]] = {}
+        for t in transitions:
+            key = (t.from_state, t.action)
+            current = self._index.get(key)
+            if current is not None:
+                # several rows (one per role) describe the same edge
+                roles = None if current.roles is None or t.roles is None else current.roles | t.roles
+                t = current._replace(roles=roles)
+            else:
+                self._outgoing.setdefault(t.from_state, []).append(t)
+            self._index[key] = t
+        self._outgoing = {s: [self._index[(s, t.action)] for t in ts] for s, ts in self._outgoing.items()}
+
+    def resolve(self, from_state: str, action: str) -> Optional[Transition]:
+        return self._index.get(((from_state or '').upper(), (action or '').upper()))
+
+    @staticmethod
+    def allows(transition: Transition, roles: Iterable[str]) -> bool:
+        return transition.roles is None or not transition.roles.isdisjoint(roles)
+
+    def actions_for(self, state: str, roles: Optional[Iterable[str]] = None) -> List[str]:
+        """Actions available from a state (for the given roles, or all when roles is None)"""
+        outgoing = self._outgoing.get((state or '').upper(), ())
+        if roles is None:
+            return [t.action for t in outgoing]
+        roles = set(roles)
+        return [t.action for t in outgoing if self.allows(t, roles)]
+
+    def awaits_review(self, state: str) -> bool:
+        """States tracked in syllabus_current_workflows (someone has to approve)"""
+        return any(t.action == 'APPROVE' for t in self._outgoing.get(state, ()))
+
+    def to_dict(self) -> dict:
+        return {
+            'version': self.version,
+            'source': self.source,
+            'states': [s._asdict() for s in self.states.values()],
+            'transitions': [{'from': t.from_state, 'action': t.action, 'to': t.to_state,
+                             'roles': sorted(t.roles) if t.roles is not None else None}
+                            for t in self._index.values()],
+        }
+
+
+class WorkflowEngine:
+    """
+    Table-driven syllabus workflow.
+
+    The graph from workflow_states/workflow_transitions is loaded once per
+    process (built-in defaults while the tables are empty) and rebuilt after
+    invalidate() or when another process bumped the shared version in
+    Flask-Caching. apply() writes status, workflow log, current-workflow row
+    and the outbox event for the side effects in a single transaction, then
+    schedules the review deadline timer.
+    """
+    VERSION_KEY = 'workflow_graph:version'
+    VERSION_CHECK_INTERVAL = 5.0
+
+    def __init__(self, repository, workflow_log_repository=None, current_workflow_repository=None,
+                 outbox_repository=None):
+        self.repository = repository
+        self.workflow_log_repository = workflow_log_repository
+        self.current_workflow_repository = current_workflow_repository
+        self.outbox_repository = outbox_repository
+        self._graph: Optional[WorkflowGraph] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # Graph cache
+    # ------------------------------------------------------------------ #
+    def get_graph(self) -> WorkflowGraph:
+        graph = self._graph
+        if graph is not None:
+            now = time.monotonic()
+            if now - self._checked_at < self.VERSION_CHECK_INTERVAL:
+                return graph
+            self._checked_at = now
+            shared = self._shared_version()
+            if shared is None or shared == graph.version:
+                return graph
+
+        with self._lock:
+            if self._graph is not graph and self._graph is not None:
+                return self._graph
+            return self._rebuild()
+
+    def invalidate(self):
+        """Call after editing workflow states/transitions"""
+        try:
+            cache.set(self.VERSION_KEY, uuid.uuid4().hex, timeout=0)
+        except Exception as e:
+            logger.debug(f"Workflow graph version not shared: {e}")
+        with self._lock:
+            self._graph = None
+
+    def _shared_version(self) -> Optional[str]:
+        try:
+            return cache.get(self.VERSION_KEY)
+        except Exception:
+            return None
+
+    def _rebuild(self) -> WorkflowGraph:
+        version = self._shared_version() or uuid.uuid4().hex
+        rows = self.repository.get_transition_rows()
+        if rows:
+            states = {s.code: State(s.id, s.code, s.name, bool(s.is_final)) for s in self.repository.get_states()}
+            transitions = [Transition(r.from_code, (r.action or '').upper(), r.to_code, frozenset([r.role]))
+                           for r in rows]
+            source = 'database'
+        else:
+            states = {s['code']: State(None, s['code'], s['name'], s['is_final']) for s in DEFAULT_STATES}
+            transitions = [Transition(f, a, t, frozenset(roles)) for f, a, t, roles in DEFAULT_TRANSITIONS]
+            source = 'default'
+        graph = WorkflowGraph(states, transitions, version, source)
+        self._graph = graph
+        self._checked_at = time.monotonic()
+        logger.info(f"Workflow graph loaded from {source}: {len(states)} states, {len(rows or transitions)} transitions")
+        return graph
+
+    def seed_defaults(self) -> int:
+        created = self.repository.seed(DEFAULT_STATES, [
+            (f, a, t, role) for f, a, t, roles in DEFAULT_TRANSITIONS for role in roles
+        ])
+        self.invalidate()
+        return created
+
+    # ------------------------------------------------------------------ #
+    # Transitions
+    # ------------------------------------------------------------------ #
+    def authorize(self, from_state: str, action: str, roles: Iterable[str],
+                  comment: Optional[str] = None) -> Transition:
+        """Resolve and check a transition; raises ValueError with a user-facing message"""
+        graph = self.get_graph()
+        transition = graph.resolve(from_state, action)
+        if transition is None:
+            allowed = sorted(set(graph.actions_for(from_state)))
+            raise ValueError(f'Không thể thực hiện {action} ở trạng thái {from_state}. '
+                             f'Hành động hợp lệ: {", ".join(allowed) or "không có"}')
+        if not graph.allows(transition, set(roles or ())):
+            raise ValueError(f'Chỉ {", ".join(sorted(transition.roles))} mới có quyền thực hiện '
+                             f'{transition.action} ở trạng thái {transition.from_state}.')
+        if transition.action in REQUIRES_COMMENT and not (comment or '').strip():
+            raise ValueError(REQUIRES_COMMENT[transition.action])
+        return transition
+
+    def apply(self, syllabus, transition: Transition, actor_id: int, comment: Optional[str] = None,
+              due_days: Optional[int] = None, before_commit: Optional[Callable[[str], None]] = None):
+        """
+        Status, workflow log, current-workflow row and outbox event in one commit.
+        before_commit(from_status) stages more changes in the same transaction (KPI rollup).
+        """
+        session = self.repository.session
+        now = datetime.now()
+        from_status = syllabus.status
+        timer = None
+        try:
+            syllabus.status = transition.to_state
+            if transition.to_state == WorkflowStatus.PUBLISHED:
+                syllabus.is_active = True
+                syllabus.publish_date = now
+
+            if self.workflow_log_repository:
+                self.workflow_log_repository.create({
+                    'syllabus_id': syllabus.id,
+                    'actor_id': actor_id,
+                    'action': transition.action,
+                    'from_status': from_status,
+                    'to_status': transition.to_state,
+                    'comment': comment
+                }, commit=False)
+
+            if self.current_workflow_repository:
+                graph = self.get_graph()
+                if graph.awaits_review(transition.to_state):
+                    state = graph.states.get(transition.to_state)
+                    cw = self.current_workflow_repository.update_or_create(syllabus.id, {
+                        'state': transition.to_state,
+                        'current_state_id': state.id if state else None,
+                        'assigned_user_id': None,
+                        'due_date': now + timedelta(days=due_days) if due_days else None,
+                        'last_action_at': now
+                    }, commit=False)
+                    timer = (cw.deadline_token, cw.due_date)
+                else:
+                    self.current_workflow_repository.delete(syllabus.id, commit=False)
+
+            if self.outbox_repository:
+                self.outbox_repository.add(
+                    SyllabusEvent.for_transition(transition.action, transition.to_state),
+                    SyllabusEvent.AGGREGATE, syllabus.id,
+                    self._event_payload(syllabus, transition, from_status, actor_id, comment, now)
+                )
+
+            if before_commit:
+                before_commit(from_status)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        session.refresh(syllabus)
+        logger.info("Workflow: syllabus %s %s -%s-> %s", syllabus.id, from_status, transition.action, transition.to_state)
+        if timer:
+            # Replaces any earlier timer of this syllabus (new deadline_token)
+            from services.workflow_deadline_service import WorkflowDeadlineService
+            WorkflowDeadlineService.schedule(syllabus.id, *timer)
+        if self.outbox_repository:
+            from services.outbox_service import OutboxService
+            OutboxService.kick()
+        return syllabus
+
+    @staticmethod
+    def _event_payload(syllabus, transition: Transition, from_status: str, actor_id: int,
+                       comment: Optional[str], occurred_at: datetime) -> dict:
+        """Everything the consumers need to notify without reloading the syllabus"""
+        subject = syllabus.subject
+        lecturer = syllabus.lecturer
+        return {
+            'syllabus_id': syllabus.id,
+            'action': transition.action,
+            'from_status': from_status,
+            'to_status': transition.to_state,
+            'actor_id': actor_id,
+            'comment': comment,
+            'occurred_at': occurred_at.isoformat(),
+            'subject_id': syllabus.subject_id,
+            'subject_code': subject.code if subject else None,
+            'lecturer_id': syllabus.lecturer_id,
+            'lecturer_name': lecturer.full_name if lecturer else None,
+            'program_id': syllabus.program_id,
+            'version': syllabus.version,
+        }
@@ -1,13 +1,18 @@
 from celery import shared_task
+import os
 import time
 import logging
 from services.ai_service import AiService
 from dependency_container import Container
+from celery_utils import connect_request_id_signals
 
 logger = logging.getLogger(__name__)
 
+# Publishing from the API process (app.py does not go through celery_init_app)
+connect_request_id_signals()
+
 @shared_task(ignore_result=False)
-def analyze_clo_plo_task(clo_list, plo_list):
+def analyze_clo_plo_task(clo_list, plo_list, mapping_list=None):
     """
     Background task to analyze CLO-PLO mapping using Gemini AI.
     """
@@ -15,9 +20,49 @@ def analyze_clo_plo_task(clo_list, plo_list):
     ai_service = container.ai_service()
     
     # In a real scenario, this might take 10-20 seconds
-    result = ai_service.analyze_clo_plo_mapping(clo_list, plo_list)
+    result = ai_service.analyze_clo_plo_alignment(clo_list, plo_list, mapping_list or [])
     return result
 
+@shared_task(ignore_result=False, acks_late=True,
+             rate_limit=os.getenv('AI_BATCH_RATE_LIMIT', '20/m'))
+def analyze_syllabus_alignment_task(job_id, syllabus_id, use_cache=True, attempt=None):
+    """
+    One syllabus of a program-wide alignment batch (chord header).
+    Rate limited per worker; concurrent model calls are further bounded by the
+    shared Gemini client. acks_late lets the broker redeliver it if a worker dies.
+    """
+    container = Container()
+    batch_service = container.alignment_batch_service()
+
+    try:
+        return batch_service.analyze_one(job_id, syllabus_id, use_cache=use_cache, attempt=attempt)
+    except Exception as e:
+        # Never fail the chord header: the report lists failed syllabuses instead
+        logger.error(f"Alignment batch {job_id}: syllabus {syllabus_id} failed: {e}", exc_info=True)
+        return {'syllabus_id': syllabus_id, 'error': str(e)}
+
+@shared_task(ignore_result=False)
+def finalize_alignment_batch_task(results, job_id, attempt=None):
+    """
+    Chord callback aggregating per-syllabus alignment results into the program report.
+    """
+    container = Container()
+    batch_service = container.alignment_batch_service()
+
+    report = batch_service.finalize(job_id, results, attempt=attempt)
+    logger.info(f"Alignment batch {job_id} finished: {report.get('analyzed')}/{report.get('total')} analyzed")
+    return report
+
+@shared_task(ignore_result=True)
+def fail_alignment_batch_task(request, exc, traceback, job_id=None, attempt=None):
+    """
+    Chord error callback (Celery errback signature): marks the job FAILED instead of
+    leaving it RUNNING when a header task or the callback fails.
+    """
+    container = Container()
+    batch_service = container.alignment_batch_service()
+    batch_service.mark_failed(job_id, attempt, error=str(exc))
+
 @shared_task(ignore_result=False)
 def generate_syllabus_summary_task(content):
     """
@@ -30,25 +75,102 @@ def generate_syllabus_summary_task(content):
     return result
 
 @shared_task(ignore_result=False)
-def compare_syllabuses_task(content_old, content_new):
+def compare_syllabuses_task(content_old, content_new, immutable=False, use_cache=True):
     """
     Background task to compare two syllabus versions.
+    immutable=True when both sides are snapshots (result cached without expiry).
     """
     container = Container()
     ai_service = container.ai_service()
     
-    result = ai_service.compare_versions(content_old, content_new)
+    result = ai_service.compare_syllabuses(content_old, content_new, immutable=immutable, use_cache=use_cache)
     return result
 
+@shared_task(ignore_result=True)
+def purge_ai_cache_task():
+    """
+    Periodic task to delete expired rows from the AI result cache table.
+    """
+    container = Container()
+    cache_service = container.ai_result_cache_service()
+
+    count = cache_service.purge_expired()
+    logger.info(f"AI cache purge completed. {count} expired entries removed.")
+    return count
+
+@shared_task(ignore_result=True)
+def reconcile_kpi_rollup_task():
+    """
+    Periodic task to rebuild the KPI rollup from syllabuses and workflow_logs
+    and correct any drift of the incrementally maintained counters.
+    """
+    container = Container()
+    kpi_service = container.kpi_service()
+
+    counters = kpi_service.reconcile()
+    logger.info(f"KPI rollup reconciliation completed. {len(counters)} counters.")
+    return len(counters)
+
+@shared_task(ignore_result=True)
+def snapshot_kpi_daily_task(day=None):
+    """
+    Periodic task writing yesterday's KPI time-series rows (day x faculty x status).
+    `day` (ISO date) re-runs a specific day; rows of that day are replaced.
+    """
+    from datetime import date
+    container = Container()
+    trend_service = container.kpi_trend_service()
+
+    count = trend_service.snapshot_day(date.fromisoformat(day) if day else None)
+    logger.info(f"KPI daily snapshot completed. {count} rows written.")
+    return count
+
+@shared_task(ignore_result=True)
+def dispatch_outbox_task(limit=100):
+    """
+    Dispatch pending outbox events (snapshot, search index, cache, notifications).
+    Queued right after a workflow transition commits and swept periodically.
+    """
+    container = Container()
+    outbox_service = container.outbox_service()
+
+    count = outbox_service.dispatch_pending(limit)
+    if count:
+        logger.info(f"Outbox dispatch completed. {count} events dispatched.")
+    return count
+
+@shared_task(ignore_result=True)
+def purge_outbox_task():
+    """
+    Periodic task to delete dispatched outbox events past the retention period.
+    """
+    container = Container()
+    outbox_service = container.outbox_service()
+
+    count = outbox_service.purge()
+    logger.info(f"Outbox purge completed. {count} dispatched events removed.")
+    return count
+
+@shared_task(ignore_result=True)
+def workflow_deadline_task(syllabus_id, token):
+    """
+    Deadline timer of one workflow step, queued with a countdown to its due date.
+    No-op when the step was rescheduled or left since (token changed / row gone).
+    """
+    container = Container()
+    deadline_service = container.workflow_deadline_service()
+
+    return deadline_service.fire(syllabus_id, token)
+
 @shared_task(ignore_result=True)
 def check_deadlines_periodic_task():
     """
-    Periodic task to check for overdue syllabus deadlines and send notifications.
+    Periodic catch-up for deadline timers that never ran (e.g. lost with the broker).
     """
     container = Container()
-    syllabus_service = container.syllabus_service()
+    deadline_service = container.workflow_deadline_service()
     
-    logger.info("Starting periodic deadline check...")
-    count = syllabus_service.check_workflow_deadlines()
-    logger.info(f"Deadline check completed. {count} notifications sent.")
+    count = deadline_service.sweep()
+    if count:
+        logger.info(f"Deadline catch-up completed. {count} notifications sent.")
     return count
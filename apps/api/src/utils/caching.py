@@ -6,9 +6,20 @@ from functools import wraps
 from flask import request
 import hashlib
 import json
+from utils import metrics
+
+
+class InstrumentedCache(Cache):
+    """Cache that counts hits/misses for /metrics (None = miss)"""
+
+    def get(self, *args, **kwargs):
+        value = super().get(*args, **kwargs)
+        metrics.observe_cache(value is not None)
+        return value
+
 
 # Initialize cache (to be configured in create_app)
-cache = Cache()
+cache = InstrumentedCache()
 
 
 def cache_key_from_request():
@@ -1,13 +1,19 @@
 """
 Centralized logging configuration for the application
 """
+import atexit
+import copy
 import logging
 import logging.handlers
 import json
+import queue
+import random
 from datetime import datetime
 from pathlib import Path
 import os
 
+from utils.request_context import RequestContextFilter
+
 class JSONFormatter(logging.Formatter):
     """
     Custom JSON formatter for structured logging
@@ -23,32 +29,138 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno
         }
         
-        # Add exception info if present
+        # Add exception info if present (rendered by the queue handler)
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
         
         # Add extra fields if present
         if hasattr(record, 'user_id'):
             log_data["user_id"] = record.user_id
-        if hasattr(record, 'request_id'):
+        if getattr(record, 'request_id', None):
             log_data["request_id"] = record.request_id
         if hasattr(record, 'duration_ms'):
             log_data["duration_ms"] = record.duration_ms
         if hasattr(record, 'status_code'):
             log_data["status_code"] = record.status_code
+        for key in ('method', 'path', 'endpoint', 'db_query_count', 'db_time_ms', 'db_repeated',
+                    'phases', 'task', 'task_id'):
+            if hasattr(record, key):
+                log_data[key] = getattr(record, key)
             
         return json.dumps(log_data)
 
 
-def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: str = "logs"):
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records below WARNING for selected loggers,
+    e.g. {'smd-api.utils.socket_io': 0.1}. A rate applies to the logger and
+    its children (longest prefix wins); warnings and errors always pass.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._resolved = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            best = -1
+            for prefix, value in self.rates.items():
+                if (name == prefix or name.startswith(prefix + '.')) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+def parse_sampling(spec: str) -> dict:
+    """'smd-api.utils.socket_io=0.1,smd-api.api.request=0.5' -> {logger: rate}"""
+    rates = {}
+    for item in (spec or '').split(','):
+        name, _, value = item.partition('=')
+        try:
+            rates[name.strip()] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            continue
+    return {name: rate for name, rate in rates.items() if name}
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the listener thread without blocking the caller: the
+    message is merged and the traceback rendered here (the arguments may
+    change later), formatting and file I/O happen in the listener. When the
+    queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_EXC_FORMATTER = logging.Formatter()
+_listener = None
+
+
+def _restart_listener_in_child():
+    """The listener thread does not survive fork() (Celery prefork, gunicorn)"""
+    global _listener
+    if _listener is None:
+        return
+    fresh = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in logging.getLogger(_listener.app_name).handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = fresh
+    _listener.queue = fresh
+    _listener._thread = None
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: str = "logs",
+                  sampling: dict = None, queue_size: int = 10000):
     """
     Setup application logging with file rotation and structured format
     
+    Request threads only put records on a queue; a QueueListener thread
+    formats them and writes the console and rotating files.
+
     Args:
         app_name: Application name for logger
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_dir: Directory to store log files
+        sampling: {logger name: rate} for high-volume INFO/DEBUG loggers
+        queue_size: Records buffered before new ones are dropped
     """
+    global _listener
+
     # Create logs directory if it doesn't exist
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
@@ -58,17 +170,19 @@ def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: s
     logger.setLevel(getattr(logging, log_level.upper()))
     
     # Remove existing handlers to avoid duplicates
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
     logger.handlers.clear()
     
     # Console handler with simple format for development
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
     
     # File handler with JSON format for production
     file_handler = logging.handlers.RotatingFileHandler(
@@ -79,7 +193,6 @@ def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: s
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(JSONFormatter())
-    logger.addHandler(file_handler)
     
     # Separate error log file
     error_handler = logging.handlers.RotatingFileHandler(
@@ -90,7 +203,20 @@ def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: s
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(JSONFormatter())
-    logger.addHandler(error_handler)
+    
+    # Filters run in the calling thread: request context (contextvars) and sampling
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(RequestContextFilter())
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, console_handler, file_handler, error_handler,
+        respect_handler_level=True
+    )
+    _listener.app_name = app_name
+    _listener.start()
     
     # Don't propagate to root logger
     logger.propagate = False
@@ -98,6 +224,25 @@ def setup_logging(app_name: str = "smd-api", log_level: str = "INFO", log_dir: s
     return logger
 
 
+def attach_flask_logger(app, app_name: str = "smd-api"):
+    """Route app.logger (unhandled errors, request debug lines) through the same queue and request filter"""
+    root = logging.getLogger(app_name)
+    app.logger.handlers = list(root.handlers)
+    app.logger.setLevel(root.level)
+    app.logger.propagate = False
+
+
+def stop_logging():
+    """Flush queued records (called at exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
 def get_logger(name: str):
     """
     Get a logger instance with the application's root logger as parent
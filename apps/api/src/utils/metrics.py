@@ -0,0 +1,167 @@
+"""
+Prometheus metrics (optional dependency: prometheus_client).
+
+Request latency is recorded by the middleware, cache hits/misses by
+utils.caching, external call latencies by the Elasticsearch and Gemini
+clients. DB pool and Celery queue gauges are read at scrape time. Without
+prometheus_client every function here is a no-op.
+"""
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+    )
+    from prometheus_client.core import GaugeMetricFamily, REGISTRY
+except ImportError:  # pragma: no cover - optional dependency
+    REGISTRY = None
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+enabled = REGISTRY is not None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUEUE_DEPTH_TTL = 10.0  # seconds between broker reads
+
+if enabled:
+    HTTP_REQUEST_SECONDS = Histogram(
+        'smd_http_request_duration_seconds', 'HTTP request latency',
+        ['blueprint', 'endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS)
+    HTTP_REQUEST_DB_QUERIES = Histogram(
+        'smd_http_request_db_queries', 'SQL statements per HTTP request',
+        ['blueprint', 'endpoint'], buckets=(1, 2, 5, 10, 20, 50, 100, 250, 500))
+    DB_POOL_CHECKOUT_SECONDS = Histogram(
+        'smd_db_pool_checkout_wait_seconds', 'Time waiting for a pooled DB connection',
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+    CACHE_REQUESTS = Counter(
+        'smd_cache_requests_total', 'Flask-Caching lookups', ['result'])
+    EXTERNAL_CALL_SECONDS = Histogram(
+        'smd_external_call_duration_seconds', 'Latency of calls to external services',
+        ['service', 'operation', 'outcome'], buckets=LATENCY_BUCKETS + (60.0, 120.0))
+
+
+def observe_request(blueprint, endpoint, method, status, seconds, db_queries=None):
+    if not enabled:
+        return
+    HTTP_REQUEST_SECONDS.labels(blueprint or '-', endpoint or 'unmatched', method, str(status)).observe(seconds)
+    if db_queries is not None:
+        HTTP_REQUEST_DB_QUERIES.labels(blueprint or '-', endpoint or 'unmatched').observe(db_queries)
+
+
+def observe_cache(hit: bool):
+    if enabled:
+        CACHE_REQUESTS.labels('hit' if hit else 'miss').inc()
+
+
+def observe_external(service: str, operation: str, seconds: float, error: bool = False):
+    if enabled:
+        EXTERNAL_CALL_SECONDS.labels(service, operation, 'error' if error else 'ok').observe(seconds)
+
+
+@contextmanager
+def timed(service: str, operation: str):
+    """with timed('elasticsearch', 'search'): ..."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        observe_external(service, operation, time.perf_counter() - started, error)
+
+
+def instrument_pool(engine):
+    """Time connection checkouts (wait for a free pooled connection)"""
+    if not enabled or getattr(engine.pool, '_metrics_instrumented', False):
+        return
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return connect(*args, **kwargs)
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+
+class _ScrapeCollector:
+    """Gauges read when /metrics is scraped: DB pool usage and Celery queue depths"""
+
+    def __init__(self):
+        self._depths = {}
+        self._depths_at = 0.0
+        self._redis = None
+
+    def describe(self):
+        # Skip the collect() that register() would otherwise run at import time
+        return []
+
+    def collect(self):
+        yield from self._pool_metrics()
+        depths = self._queue_depths()
+        if depths:
+            family = GaugeMetricFamily('smd_celery_queue_depth', 'Messages waiting in a Celery queue', labels=['queue'])
+            for queue, depth in depths.items():
+                family.add_metric([queue], depth)
+            yield family
+
+    @staticmethod
+    def _pool_metrics():
+        try:
+            from infrastructure.databases.mssql import engine
+            pool = engine.pool
+            in_use, size, overflow = pool.checkedout(), pool.size(), pool.overflow()
+        except Exception:
+            return
+        yield GaugeMetricFamily('smd_db_pool_in_use', 'DB connections checked out', value=in_use)
+        yield GaugeMetricFamily('smd_db_pool_size', 'Configured DB pool size', value=size)
+        yield GaugeMetricFamily('smd_db_pool_overflow', 'DB connections beyond pool_size', value=max(overflow, 0))
+
+    def _queue_depths(self):
+        now = time.monotonic()
+        if now - self._depths_at < QUEUE_DEPTH_TTL:
+            return self._depths
+        self._depths_at = now
+        broker = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+        if urlparse(broker).scheme not in ('redis', 'rediss'):
+            return self._depths
+        try:
+            if self._redis is None:
+                import redis
+                self._redis = redis.Redis.from_url(broker, socket_timeout=0.5, socket_connect_timeout=0.5)
+            queues = [q.strip() for q in os.environ.get('CELERY_METRICS_QUEUES', 'celery').split(',') if q.strip()]
+            pipe = self._redis.pipeline()
+            for queue in queues:
+                pipe.llen(queue)
+            self._depths = dict(zip(queues, pipe.execute()))
+        except Exception as e:
+            logger.debug(f"Celery queue depth unavailable: {e}")
+            self._depths = {}
+        return self._depths
+
+
+_scrape_collector = _ScrapeCollector()
+if enabled:
+    REGISTRY.register(_scrape_collector)
+
+
+def render():
+    """(body, content_type) of the exposition; multi-process aware (PROMETHEUS_MULTIPROC_DIR)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_scrape_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -23,19 +23,19 @@ def monitor_performance(func):
         func_name = f"{func.__module__}.{func.__name__}"
         
         try:
-            logger.debug(f"Starting {func_name}")
+            logger.debug("Starting %s", func_name)
             result = func(*args, **kwargs)
             
             duration_ms = (time.time() - start_time) * 1000
             logger.info(
-                f"Completed {func_name}",
+                "Completed %s", func_name,
                 extra={"duration_ms": duration_ms, "status": "success"}
             )
             
             # Warn if execution takes too long
             if duration_ms > 1000:  # > 1 second
                 logger.warning(
-                    f"Slow execution detected: {func_name} took {duration_ms:.2f}ms"
+                    "Slow execution detected: %s took %.2fms", func_name, duration_ms
                 )
             
             return result
@@ -43,7 +43,7 @@ def monitor_performance(func):
         except Exception as e:
             duration_ms = (time.time() - start_time) * 1000
             logger.error(
-                f"Failed {func_name}: {str(e)}",
+                "Failed %s: %s", func_name, e,
                 extra={"duration_ms": duration_ms, "status": "error"},
                 exc_info=True
             )
@@ -71,8 +71,8 @@ def log_api_request(func):
         # Get user_id from Flask g context if available
         user_id = getattr(g, 'user_id', None)
         
-        logger.info(
-            f"API Request: {endpoint}",
+        logger.debug(
+            "API Request: %s", endpoint,
             extra={
                 "method": request.method,
                 "path": request.path,
@@ -91,7 +91,7 @@ def log_api_request(func):
                 status_code = result[1]
             
             logger.info(
-                f"API Response: {endpoint}",
+                "API Response: %s", endpoint,
                 extra={
                     "duration_ms": duration_ms,
                     "status_code": status_code,
@@ -104,7 +104,7 @@ def log_api_request(func):
         except Exception as e:
             duration_ms = (time.time() - start_time) * 1000
             logger.error(
-                f"API Error: {endpoint} - {str(e)}",
+                "API Error: %s - %s", endpoint, e,
                 extra={
                     "duration_ms": duration_ms,
                     "status_code": 500,
@@ -0,0 +1,167 @@
+"""
+On-demand request profiler.
+
+An Admin request carrying the profiling header runs under pyinstrument
+(sampling, when installed) or cProfile. The result is written to
+PROFILE_DIR: a speedscope JSON (pyinstrument) or a pstats dump (cProfile,
+open with snakeviz / flameprof), plus a metadata file with a text summary.
+Only one request is profiled at a time per process; cProfile cannot run
+concurrently on Python 3.12+.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover - optional dependency
+    SamplingProfiler = None
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_SAFE_ID = re.compile(r'[^A-Za-z0-9._-]')
+
+
+class ActiveProfile:
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self.started = time.perf_counter()
+        if SamplingProfiler is not None:
+            self.engine = 'pyinstrument'
+            self._profiler = SamplingProfiler(interval=0.001)
+        else:
+            self.engine = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.engine == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> float:
+        if self.engine == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        return (time.perf_counter() - self.started) * 1000
+
+
+class ProfileStore:
+    """Profiles on disk, newest first, at most `keep` of them"""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = Path(directory)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = False
+
+    # ------------------------------------------------------------------ #
+    # Recording
+    # ------------------------------------------------------------------ #
+    def begin(self, request_id: str) -> Optional[ActiveProfile]:
+        """None when another request is being profiled in this process"""
+        with self._lock:
+            if self._active:
+                return None
+            self._active = True
+        profile = ActiveProfile(_SAFE_ID.sub('_', request_id)[:64] + '-' + datetime.now().strftime('%H%M%S%f'))
+        try:
+            profile.start()
+        except Exception as e:
+            self._release()
+            logger.warning(f"Profiler not started: {e}")
+            return None
+        return profile
+
+    def end(self, profile: ActiveProfile, meta: dict) -> Optional[str]:
+        try:
+            duration_ms = profile.stop()
+        finally:
+            self._release()
+        try:
+            return self._save(profile, dict(meta, duration_ms=round(duration_ms, 2)))
+        except Exception as e:
+            logger.warning(f"Profile {profile.profile_id} not saved: {e}")
+            return None
+
+    def _release(self):
+        with self._lock:
+            self._active = False
+
+    def _save(self, profile: ActiveProfile, meta: dict) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        pid = profile.profile_id
+        if profile.engine == 'pyinstrument':
+            data_file = f'{pid}.speedscope.json'
+            session = profile._profiler.last_session
+            (self.directory / data_file).write_text(SpeedscopeRenderer().render(session), encoding='utf-8')
+            summary = profile._profiler.output_text(unicode=True, color=False, show_all=False)
+        else:
+            data_file = f'{pid}.prof'
+            profile._profiler.dump_stats(str(self.directory / data_file))
+            out = io.StringIO()
+            pstats.Stats(profile._profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            summary = out.getvalue()
+
+        meta = dict(meta, id=pid, engine=profile.engine, file=data_file,
+                    created_at=datetime.now().isoformat(), summary=summary)
+        (self.directory / f'{pid}.meta.json').write_text(json.dumps(meta, ensure_ascii=False, default=str),
+                                                         encoding='utf-8')
+        self._prune()
+        logger.info(f"Profile {pid} saved ({profile.engine}, {meta['duration_ms']}ms {meta.get('path')})")
+        return pid
+
+    def _prune(self):
+        metas = sorted(self.directory.glob('*.meta.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for meta_path in metas[self.keep:]:
+            pid = meta_path.name[:-len('.meta.json')]
+            for path in self.directory.glob(f'{pid}.*'):
+                path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Listing
+    # ------------------------------------------------------------------ #
+    def list(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        metas = sorted(self.directory.glob('*.meta.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+        result = []
+        for path in metas:
+            try:
+                meta = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            meta.pop('summary', None)
+            result.append(meta)
+        return result
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        path = self.directory / f'{_SAFE_ID.sub("_", profile_id)}.meta.json'
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def data_path(self, profile_id: str) -> Optional[Path]:
+        meta = self.get(profile_id)
+        if not meta:
+            return None
+        path = self.directory / meta['file']
+        return path if path.exists() else None
+
+
+profile_store = ProfileStore(
+    os.environ.get('PROFILE_DIR', os.path.join(os.environ.get('LOG_DIR', 'logs'), 'profiles')),
+    keep=int(os.environ.get('PROFILE_KEEP', 50))
+)
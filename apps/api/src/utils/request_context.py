@@ -0,0 +1,87 @@
+"""
+Request-scoped context: request id, user id and phase timings.
+
+Values live in contextvars so they follow the request (or Celery task)
+through services and repositories without being passed around, and
+RequestContextFilter copies them onto every log record.
+"""
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+_user_id: ContextVar[Optional[int]] = ContextVar('user_id', default=None)
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar('phases', default=None)
+
+
+def accept_request_id(value: Optional[str]) -> str:
+    """Keep a well-formed incoming id (from a proxy or the client), otherwise generate one"""
+    if value and _VALID_REQUEST_ID.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def bind(request_id: str, user_id: Optional[int] = None):
+    _request_id.set(request_id)
+    _user_id.set(user_id)
+    _phases.set({})
+
+
+def clear():
+    _request_id.set(None)
+    _user_id.set(None)
+    _phases.set(None)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def set_user_id(user_id: Optional[int]):
+    _user_id.set(user_id)
+
+
+def outgoing_headers() -> Dict[str, str]:
+    """Headers for calls to other services (empty outside a request/task)"""
+    request_id = _request_id.get()
+    return {REQUEST_ID_HEADER: request_id} if request_id else {}
+
+
+@contextmanager
+def phase(name: str):
+    """Add the block's wall time to phase `name` of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, (time.perf_counter() - started) * 1000)
+
+
+def add_phase(name: str, ms: float):
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + ms
+
+
+def get_phases() -> Dict[str, float]:
+    return {name: round(ms, 2) for name, ms in (_phases.get() or {}).items()}
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request_id / user_id to records that do not carry them already"""
+
+    def filter(self, record):
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = _request_id.get()
+        if getattr(record, 'user_id', None) is None:
+            user_id = _user_id.get()
+            if user_id is not None:
+                record.user_id = user_id
+        return True
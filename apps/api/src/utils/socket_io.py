@@ -1,4 +1,5 @@
 from flask_socketio import SocketIO
+from config import Config
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -6,17 +7,20 @@ logger = get_logger(__name__)
 socketio = SocketIO(cors_allowed_origins="*")
 
 def init_socketio(app):
-    """Initialize SocketIO with the Flask app"""
+    """
+    Initialize SocketIO with the Flask app. Emits go through the message queue
+    so those made in a Celery worker (outbox consumers) reach the API's clients.
+    """
     logger.info("Initializing SocketIO...")
-    socketio.init_app(app)
+    socketio.init_app(app, message_queue=Config.SOCKETIO_MESSAGE_QUEUE or None)
 
 def notify_user(user_id, event, data):
     """Send a notification to a specific user via SocketIO"""
     room = f"user_{user_id}"
-    logger.info(f"Emitting {event} to room {room}")
+    logger.debug("Emitting %s to room %s", event, room)
     socketio.emit(event, data, room=room)
 
 def broadcast_notification(event, data):
     """Broadcast a notification to all connected users"""
-    logger.info(f"Broadcasting {event}")
+    logger.debug("Broadcasting %s", event)
     socketio.emit(event, data)
@@ -0,0 +1,220 @@
+"""
+Optional OpenTelemetry tracing (opentelemetry-api / opentelemetry-sdk).
+
+init_tracing() is a no-op unless OTEL_ENABLED is set and the SDK is
+installed. When active it creates spans for:
+- every request (server span per url rule, W3C traceparent accepted),
+- every public method of the repositories, SearchService, AiService and
+  EmailService.send_email (methods are wrapped once at startup, nothing is
+  wrapped while tracing is off),
+- every Celery task, parented to the publishing request through the task
+  message headers,
+- SQL statements when opentelemetry-instrumentation-sqlalchemy is installed.
+
+Exporters (Config.OTEL_TRACES_EXPORTER): 'file' writes JSON lines to
+OTEL_FILE_PATH to inspect traces locally, 'otlp' sends to
+OTEL_EXPORTER_OTLP_ENDPOINT (e.g. a local Jaeger on :4318), 'console'
+prints them. Sampling follows the standard OTEL_TRACES_SAMPLER variables.
+"""
+import functools
+import importlib
+import inspect
+import os
+import pkgutil
+import threading
+from pathlib import Path
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None
+    SpanExporter = object
+
+from config import Config
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_tracer = None
+_init_lock = threading.Lock()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """One JSON span per line, for inspecting traces without a collector"""
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        try:
+            with self._lock, open(self._path, 'a', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(span.to_json(indent=None) + '\n')
+            return SpanExportResult.SUCCESS
+        except OSError:
+            return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def get_tracer():
+    return _tracer
+
+
+def _exporter():
+    kind = Config.OTEL_TRACES_EXPORTER
+    if kind == 'otlp':
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if kind == 'console':
+        return ConsoleSpanExporter()
+    return JsonLinesSpanExporter(Config.OTEL_FILE_PATH)
+
+
+def init_tracing(service_name: str = 'smd-api', engine=None) -> bool:
+    """Set up the tracer provider and instrument the app's classes once per process"""
+    global _tracer
+    if not Config.OTEL_ENABLED:
+        return False
+    if trace is None:
+        logger.warning("OTEL_ENABLED is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+    with _init_lock:
+        if _tracer is not None:
+            return True
+        try:
+            provider = TracerProvider(resource=Resource.create({
+                'service.name': os.environ.get('OTEL_SERVICE_NAME', service_name)
+            }))
+            provider.add_span_processor(BatchSpanProcessor(_exporter()))
+            trace.set_tracer_provider(provider)
+        except Exception as e:
+            logger.error(f"Tracing not initialised: {e}")
+            return False
+        _tracer = trace.get_tracer('smd')
+        _instrument_app_classes()
+        if engine is not None:
+            _instrument_sqlalchemy(engine)
+        logger.info(f"OpenTelemetry tracing enabled ({Config.OTEL_TRACES_EXPORTER} exporter)")
+        return True
+
+
+# ---------------------------------------------------------------------- #
+# Method spans
+# ---------------------------------------------------------------------- #
+def _wrap(func, span_name: str):
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gen_wrapper(*args, **kwargs):
+            # The span covers the iteration, not just the call that creates the generator
+            with _tracer.start_as_current_span(span_name):
+                yield from func(*args, **kwargs)
+        return gen_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _tracer.start_as_current_span(span_name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def instrument_class(cls, methods=None):
+    """Wrap public instance methods (or the named ones) of `cls` in spans 'Class.method'"""
+    if getattr(cls, '_otel_instrumented', False):
+        return
+    for name, attr in list(vars(cls).items()):
+        if methods is not None and name not in methods:
+            continue
+        if name.startswith('_') or isinstance(attr, (staticmethod, classmethod)) or not inspect.isfunction(attr):
+            continue
+        setattr(cls, name, _wrap(attr, f'{cls.__name__}.{name}'))
+    cls._otel_instrumented = True
+
+
+def _instrument_app_classes():
+    import infrastructure.repositories as repositories
+    for module_info in pkgutil.iter_modules(repositories.__path__):
+        module = importlib.import_module(f'{repositories.__name__}.{module_info.name}')
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if name.endswith('Repository') and cls.__module__ == module.__name__:
+                instrument_class(cls)
+
+    from services.search_service import SearchService
+    from services.ai_service import AiService
+    from services.email_service import EmailService
+    instrument_class(SearchService)
+    instrument_class(AiService)
+    instrument_class(EmailService, methods={'send_email'})
+
+
+def _instrument_sqlalchemy(engine):
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    except ImportError:
+        return
+    SQLAlchemyInstrumentor().instrument(engine=engine)
+
+
+# ---------------------------------------------------------------------- #
+# Request and task spans (called from api.middleware / celery_utils)
+# ---------------------------------------------------------------------- #
+def start_span(name: str, carrier: dict = None, server: bool = False, attributes: dict = None):
+    """Start a span made current; returns a handle for end_span() (None when tracing is off)"""
+    if _tracer is None:
+        return None
+    parent = propagate.extract(carrier) if carrier else None
+    kind = trace.SpanKind.SERVER if server else trace.SpanKind.CONSUMER
+    span = _tracer.start_span(name, context=parent, kind=kind, attributes=attributes or {})
+    token = otel_context.attach(trace.set_span_in_context(span))
+    return span, token
+
+
+def end_span(handle, error: BaseException = None, attributes: dict = None, failed: bool = False):
+    if handle is None:
+        return
+    span, token = handle
+    for key, value in (attributes or {}).items():
+        if value is not None:
+            span.set_attribute(key, value)
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+    elif failed:
+        span.set_status(trace.Status(trace.StatusCode.ERROR))
+    span.end()
+    otel_context.detach(token)
+
+
+def extract_headers(source) -> dict:
+    """W3C trace headers present on `source` (a header dict or a Celery task request)"""
+    if source is None:
+        return {}
+    if isinstance(source, dict):
+        return {k: source[k] for k in ('traceparent', 'tracestate') if source.get(k)}
+    carrier = extract_headers(getattr(source, 'headers', None) or {})
+    for key in ('traceparent', 'tracestate'):
+        value = getattr(source, key, None)
+        if value and key not in carrier:
+            carrier[key] = value
+    return carrier
+
+
+def inject(carrier: dict):
+    """Add the current trace context (traceparent) to outgoing headers"""
+    if _tracer is not None:
+        propagate.inject(carrier)